@@ -1,18 +1,35 @@
 #!/usr/bin/env python3
 """Ansible Workflow Runner backend."""
 
+import asyncio
 import json
 import os
 import shlex
 import signal
 import subprocess
+import sys
 import threading
 import time
 import uuid
+import zlib
 from pathlib import Path
 
 from flask import Flask, Response, jsonify, render_template, request
 
+from catalog import CachedScan, scan_inventories, scan_workflows
+from coalesce import RunCoalescer, run_fingerprint
+from events import CALLBACK_DIR, CALLBACK_NAME, JobEvents
+from history import JobHistory
+from logstore import JobLog, LogRetention, iter_segment_bytes, list_segments
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from metrics import PROCESS_START, Registry, process_cpu_seconds, process_rss_bytes
+from pipelines import PipelineEngine, fanout_steps, parse_steps
+from resources import ResourceLimits, ResourceMonitor, ResourceUsage
+from scheduler import PRIORITIES, Scheduler, inventory_hosts
+from updates import UpdateFeed
+from validation import ValidationCache
+from warm import WarmPool
+
 app = Flask(__name__)
 
 # Project root is two levels up: tools/ansible_runner/app.py -> repo root
@@ -27,6 +44,64 @@ BROWSE_ROOTS = {
     "home": ("Home", HOME_DIR),
 }
 
+# Job output is written to disk; only a bounded tail of each log stays in memory
+DATA_DIR = Path(os.environ.get("RUNNER_DATA_DIR", HOME_DIR / ".ansible_workflow_runner")).expanduser()
+LOG_DIR = DATA_DIR / "logs"
+LOG_TAIL_LINES = int(os.environ.get("RUNNER_LOG_TAIL_LINES", "1000"))
+LOG_SEGMENT_BYTES = int(os.environ.get("RUNNER_LOG_SEGMENT_MB", "16")) * 1024 * 1024
+# Logs of finished jobs are deleted beyond the newest LOG_KEEP_JOBS or after
+# LOG_KEEP_DAYS (0 = no limit); their jobs leave the in-memory job table too
+LOG_KEEP_JOBS = int(os.environ.get("RUNNER_LOG_KEEP_JOBS", "1000"))
+LOG_KEEP_DAYS = float(os.environ.get("RUNNER_LOG_KEEP_DAYS", "30"))
+# Finished jobs are indexed for search; larger logs are indexed by head and tail
+HISTORY_INDEX_BYTES = int(os.environ.get("RUNNER_HISTORY_INDEX_MB", "32")) * 1024 * 1024
+SEARCH_PAGE_LIMIT = 200
+
+FINAL_STATUSES = ("completed", "failed", "cancelled")
+# Upper bound on lines sent in one SSE frame, and idle time before a keepalive
+STREAM_BATCH_LINES = 500
+STREAM_KEEPALIVE = 15.0
+EVENTS_PAGE_LIMIT = 1000
+# /api/jobs/<id> returns the last DETAILS_DEFAULT_TAIL lines unless paged explicitly
+DETAILS_DEFAULT_TAIL = 2000
+DETAILS_MAX_LINES = 10000
+# Raw logs larger than this are gzip-compressed for clients that accept it
+LOG_GZIP_MIN_BYTES = 64 * 1024
+
+# Seconds between directory mtime checks for the workflow/inventory catalogs
+CATALOG_TTL = float(os.environ.get("RUNNER_CATALOG_TTL", "2"))
+
+# Concurrency caps for ansible-playbook processes, globally and per Catalyst Center
+MAX_RUNNING_JOBS = int(os.environ.get("RUNNER_MAX_JOBS", str(os.cpu_count() or 2)))
+MAX_JOBS_PER_HOST = int(os.environ.get("RUNNER_MAX_JOBS_PER_HOST", "2"))
+FANOUT_PARALLELISM = int(os.environ.get("RUNNER_FANOUT_PARALLEL", "4"))
+
+# Per-job limits on the whole ansible-playbook process group (0 = unlimited)
+DEFAULT_LIMITS = ResourceLimits(
+    rss_bytes=int(os.environ.get("RUNNER_JOB_MAX_RSS_MB", "0")) * 1024 * 1024,
+    cpu_seconds=float(os.environ.get("RUNNER_JOB_MAX_CPU_SECONDS", "0")),
+    wall_seconds=float(os.environ.get("RUNNER_JOB_MAX_WALL_SECONDS", "0")),
+)
+RESOURCE_SAMPLE_INTERVAL = float(os.environ.get("RUNNER_RESOURCE_INTERVAL", "1"))
+
+# Read-only workflows/playbooks whose identical concurrent runs share one job
+# (none unless listed, e.g. "*_config_generator,*_info"), and how long a
+# completed run keeps answering identical requests (0 = off)
+COALESCE_PATTERNS = os.environ.get("RUNNER_COALESCE", "").split(",")
+COALESCE_TTL = float(os.environ.get("RUNNER_COALESCE_TTL", "0"))
+
+# /api/validate engine: "compiled" (schemas compiled to Python) or "yamale"
+VALIDATION_ENGINE = os.environ.get("RUNNER_VALIDATION_ENGINE", "compiled")
+
+# Idle ansible-playbook workers kept with ansible (and these modules) imported
+WARM_WORKERS = int(os.environ.get("RUNNER_WARM_WORKERS", "0"))
+WARM_PYTHON = os.environ.get("RUNNER_WARM_PYTHON", "")
+WARM_IMPORTS = os.environ.get(
+    "RUNNER_WARM_IMPORTS",
+    "ansible.executor.playbook_executor,ansible.inventory.manager,ansible.vars.manager,"
+    "ansible.plugins.loader,dnacentersdk,catalystcentersdk",
+)
+
 # In-memory job store (lost on restart — acceptable for a local tool)
 _jobs: dict[str, "Job"] = {}
 _jobs_lock = threading.Lock()
@@ -38,74 +113,346 @@ _jobs_lock = threading.Lock()
 class Job:
     """Represents a single ansible-playbook execution."""
 
-    def __init__(self, jid: str, argv: list[str], cwd: str, label: str = ""):
+    def __init__(
+        self,
+        jid: str,
+        argv: list[str],
+        cwd: str,
+        label: str = "",
+        priority: str = "interactive",
+        hosts: tuple[str, ...] = (),
+        workflow: str = "",
+        playbook: str = "",
+        limits: ResourceLimits | None = None,
+    ):
         self.id = jid
         self.argv = argv
         self.cmd = shlex.join(argv)
         self.cwd = cwd
         self.label = label
+        self.priority = priority
+        self.hosts = hosts
+        self.workflow = workflow
+        self.playbook = playbook
         self.status = "queued"
-        self.lines: list[str] = []
+        self.tq = time.time()
+        self.log = JobLog(LOG_DIR / jid, tail_lines=LOG_TAIL_LINES, segment_bytes=LOG_SEGMENT_BYTES)
+        self.events = JobEvents(self.log.directory / "events.jsonl")
+        self.limits = limits or DEFAULT_LIMITS
+        self.usage = ResourceUsage()
+        self.limit_exceeded: str | None = None
+        self.warm = False
         self.proc: subprocess.Popen | None = None
         self.t0: float | None = None
         self.t1: float | None = None
         self.rc: int | None = None
         self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._async_waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINAL_STATUSES
+
+    def _notify(self):
+        # Caller holds self._changed. Async waiters are one-shot and re-register.
+        self._changed.notify_all()
+        waiters, self._async_waiters = self._async_waiters, set()
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
 
     def put(self, line: str):
-        with self._lock:
-            self.lines.append(line)
+        self.log.append(line)
+        with self._changed:
+            self._notify()
+
+    def set_status(self, status: str):
+        with self._changed:
+            self.status = status
+            self._notify()
+        _updates.status(self)
+
+    def wait(self, index: int, timeout: float | None = None) -> bool:
+        """Block until the log grows past ``index`` or the job finishes."""
+        with self._changed:
+            return self._changed.wait_for(lambda: len(self.log) > index or self.finished, timeout)
+
+    async def wait_async(self, index: int, timeout: float | None = None) -> bool:
+        """Event-loop counterpart of :meth:`wait`."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._changed:
+            if len(self.log) > index or self.finished:
+                return True
+            self._async_waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._changed:
+                self._async_waiters.discard(waiter)
 
     def info(self):
         return dict(
             id=self.id,
             cmd=self.cmd,
             label=self.label,
+            workflow=self.workflow,
+            playbook=self.playbook,
             cwd=self.cwd,
             status=self.status,
+            priority=self.priority,
+            rc=self.rc,
+            tq=self.tq,
+            t0=self.t0,
+            t1=self.t1,
+            n=len(self.log),
+            events=len(self.events),
+            resources=self.usage.to_dict(),
+            limits=self.limits.to_dict(),
+            limit_exceeded=self.limit_exceeded,
+            warm=self.warm,
+        )
+
+    def summary(self):
+        """The subset of :meth:`info` pushed on the live-updates channel."""
+        return dict(
+            id=self.id,
+            label=self.label,
+            workflow=self.workflow,
+            playbook=self.playbook,
+            status=self.status,
+            priority=self.priority,
             rc=self.rc,
+            tq=self.tq,
             t0=self.t0,
             t1=self.t1,
-            n=len(self.lines),
+            n=len(self.log),
         )
 
-    def details(self):
-        with self._lock:
-            lines = list(self.lines)
+    def details(self, offset: int = 0, limit: int | None = None, tail: int | None = None):
+        """Job metadata plus a window of output lines.
+
+        ``tail`` selects the last N lines and takes precedence over ``offset``.
+        """
         data = self.info()
-        data["lines"] = lines
+        if tail is not None:
+            offset = max(0, data["n"] - tail)
+            limit = tail
+        lines = self.log.read(offset, None if limit is None else offset + limit)
+        data.update(lines=lines, offset=offset, next=offset + len(lines))
         return data
 
 
-def _exec(job: Job):
-    """Execute ansible-playbook in a background thread."""
-    job.status = "running"
-    job.t0 = time.time()
+_updates = UpdateFeed(Job.summary)
+
+
+def _runner_env() -> dict[str, str]:
+    """Environment shared by every ansible-playbook process the runner starts."""
     env = os.environ.copy()
     env["ANSIBLE_FORCE_COLOR"] = "true"
     env["PYTHONUNBUFFERED"] = "1"
+    # Load the JSON events callback alongside the normal stdout callback
+    env["ANSIBLE_CALLBACK_PLUGINS"] = os.pathsep.join(
+        filter(None, [str(CALLBACK_DIR), env.get("ANSIBLE_CALLBACK_PLUGINS")])
+    )
+    enabled = [name.strip() for name in env.get("ANSIBLE_CALLBACKS_ENABLED", "").split(",") if name.strip()]
+    env["ANSIBLE_CALLBACKS_ENABLED"] = ",".join(enabled + [CALLBACK_NAME])
+    return env
+
+
+def _job_env(job: Job) -> dict[str, str]:
+    env = _runner_env()
+    env["RUNNER_EVENTS_FILE"] = str(job.events.path)
+    return env
+
+
+def _exec(job: Job):
+    """Execute ansible-playbook in a background thread."""
+    job.t0 = time.time()
+    job.set_status("running")
+    env = _job_env(job)
     try:
-        job.proc = subprocess.Popen(
-            job.argv,
-            cwd=job.cwd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-            preexec_fn=os.setsid,
-            env=env,
-        )
+        job.proc = _warm_pool.take(job.argv, job.cwd, env)
+        job.warm = job.proc is not None
+        if job.proc is None:
+            job.proc = subprocess.Popen(
+                job.argv,
+                cwd=job.cwd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+                preexec_fn=os.setsid,
+                env=env,
+            )
+        JOB_STARTS.inc(mode="warm" if job.warm else "cold")
+        _resources.watch(job)
         if job.proc.stdout is not None:
             for line in iter(job.proc.stdout.readline, ""):
                 job.put(line)
-        job.proc.wait()
-        job.rc = job.proc.returncode
-        job.status = "completed" if job.rc == 0 else "failed"
+                job.events.poll(len(job.log))
+        job.rc = _reap(job)
+        if job.status != "cancelled":
+            job.set_status("completed" if job.rc == 0 else "failed")
     except Exception as exc:
         job.put(f"\n*** Error: {exc}\n")
-        job.status = "failed"
+        job.set_status("failed")
     finally:
-        job.t1 = time.time()
+        _job_finished(job)
+
+
+def _reap(job: Job) -> int:
+    """Wait for the job's process, recording a last sample and the group's rusage."""
+    _resources.sample(job)
+    # wait4 instead of Popen.wait to also get the group's rusage
+    _, wait_status, rusage = os.wait4(job.proc.pid, 0)
+    job.proc.returncode = os.waitstatus_to_exitcode(wait_status)
+    job.usage.finish(rusage)
+    return job.proc.returncode
+
+
+def _job_finished(job: Job):
+    """Record the end of a job and hand its slot back to the scheduler."""
+    job.t1 = time.time()
+    _resources.unwatch(job)
+    job.events.poll(len(job.log), force=True)
+    job.events.close()
+    JOBS_FINISHED.inc(status=job.status, workflow=job.workflow, playbook=job.playbook)
+    JOB_OUTPUT_BYTES.observe(job.log.size, workflow=job.workflow, playbook=job.playbook)
+    if job.t0 is not None:
+        JOB_DURATION.observe(job.t1 - job.t0, workflow=job.workflow, playbook=job.playbook)
+        JOB_CPU.observe(job.usage.cpu_seconds, workflow=job.workflow, playbook=job.playbook)
+    job.log.close()
+    OUTPUT_LINES.inc(len(job.log))
+    OUTPUT_BYTES.inc(job.log.size)
+    _history.submit(job.info(), job.log.directory)
+    _log_retention.wake()
+    _updates.finished(job)
+    _scheduler.release(job)
+    _pipelines.job_finished(job)
+
+
+def _launch_thread(job: Job):
+    threading.Thread(target=_exec, args=(job,), daemon=True).start()
+
+
+# Replaced by the ASGI entry point so jobs run on its event loop instead
+_launcher = _launch_thread
+
+
+def set_launcher(launcher):
+    """Install the callable used to start a queued job."""
+    global _launcher
+    _launcher = launcher
+
+
+def _limit_exceeded(job: Job, message: str):
+    job.limit_exceeded = message
+    job.put(f"\n*** Stopping job: {message}\n")
+    JOB_LIMIT_KILLS.inc(limit=message.split()[0].lower())
+
+
+_resources = ResourceMonitor(RESOURCE_SAMPLE_INTERVAL, on_exceeded=_limit_exceeded)
+_unenforced_limits = _resources.unenforced(DEFAULT_LIMITS)
+if _unenforced_limits:
+    print(
+        f"  Resource limits: {' and '.join(_unenforced_limits)} limits are not enforced "
+        "because /proc is not available; only RUNNER_JOB_MAX_WALL_SECONDS applies",
+        file=sys.stderr,
+    )
+_coalescer = RunCoalescer(COALESCE_PATTERNS, COALESCE_TTL)
+_history = JobHistory(DATA_DIR / "history.sqlite3", HISTORY_INDEX_BYTES)
+
+
+def _log_active(jid: str) -> bool:
+    job = _jobs.get(jid)
+    return job is not None and not job.finished
+
+
+def _log_removed(jid: str):
+    with _jobs_lock:
+        _jobs.pop(jid, None)
+    # Called before the directory goes: the history needs the log to unindex it
+    _history.delete(jid)
+
+
+_log_retention = LogRetention(
+    LOG_DIR,
+    keep_jobs=LOG_KEEP_JOBS,
+    keep_seconds=LOG_KEEP_DAYS * 86400,
+    is_active=_log_active,
+    on_removed=_log_removed,
+)
+_warm_pool = WarmPool(WARM_WORKERS, str(PROJECT_ROOT), _runner_env(), WARM_PYTHON or None, WARM_IMPORTS)
+
+
+def _start_job(job: Job):
+    JOB_QUEUE_WAIT.observe(time.time() - job.tq, priority=job.priority)
+    _launcher(job)
+
+
+_scheduler = Scheduler(
+    _start_job,
+    max_running=MAX_RUNNING_JOBS,
+    max_per_host=MAX_JOBS_PER_HOST,
+)
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+DURATION_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+QUEUE_WAIT_BUCKETS = (0.1, 0.5, 1, 5, 15, 30, 60, 300, 900)
+OUTPUT_BYTES_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+
+_metrics = Registry()
+JOBS_SUBMITTED = _metrics.counter("runner_jobs_submitted_total", "Jobs submitted, by priority class.", ["priority"])
+JOBS_FINISHED = _metrics.counter(
+    "runner_jobs_finished_total", "Jobs finished, by final status, workflow and playbook.", ["status", "workflow", "playbook"]
+)
+JOB_DURATION = _metrics.histogram(
+    "runner_job_duration_seconds", "Run time of ansible-playbook from start to exit.", ["workflow", "playbook"], DURATION_BUCKETS
+)
+JOB_QUEUE_WAIT = _metrics.histogram(
+    "runner_job_queue_wait_seconds", "Time jobs spent queued before starting.", ["priority"], QUEUE_WAIT_BUCKETS
+)
+JOB_OUTPUT_BYTES = _metrics.histogram(
+    "runner_job_output_bytes", "Size of each finished job's log.", ["workflow", "playbook"], OUTPUT_BYTES_BUCKETS
+)
+JOB_CPU = _metrics.histogram(
+    "runner_job_cpu_seconds", "CPU time of each job's process group.", ["workflow", "playbook"], DURATION_BUCKETS
+)
+# Counted once per job when it finishes, which keeps Job.put() free of metrics
+# and the totals monotonic when log retention drops old jobs
+OUTPUT_LINES = _metrics.counter("runner_output_lines_total", "Output lines of finished jobs.")
+OUTPUT_BYTES = _metrics.counter("runner_output_bytes_total", "Output bytes of finished jobs.")
+JOB_STARTS = _metrics.counter("runner_job_starts_total", "Jobs started, on a warm worker or a cold process.", ["mode"])
+_metrics.collected("runner_warm_workers_idle", "Idle warm workers ready to take a job.", "gauge", lambda: [((), _warm_pool.snapshot()["idle"])])
+RUNS_COALESCED = _metrics.counter(
+    "runner_runs_coalesced_total", "Run requests served by an identical running (attached) or recent (cached) job.", ["mode"]
+)
+JOB_LIMIT_KILLS = _metrics.counter("runner_job_limit_kills_total", "Jobs stopped for exceeding a resource limit.", ["limit"])
+STREAM_CLIENTS = _metrics.gauge("runner_stream_clients", "Open SSE log streams.")
+STREAM_FRAMES = _metrics.counter("runner_stream_frames_total", "SSE output and done frames sent to clients.")
+UPDATE_CLIENTS = _metrics.gauge("runner_update_clients", "Open live-updates channels.")
+UPDATE_FRAMES = _metrics.counter("runner_update_frames_total", "Job lifecycle events sent on live-updates channels.")
+
+
+def _jobs_by_status():
+    counts: dict[str, int] = {}
+    for job in list(_jobs.values()):
+        counts[job.status] = counts.get(job.status, 0) + 1
+    return [((status,), count) for status, count in counts.items()]
+
+
+_metrics.collected("runner_jobs", "Jobs known to the runner, by status.", "gauge", _jobs_by_status, ["status"])
+_metrics.collected("runner_queue_length", "Jobs waiting for a runner slot.", "gauge", lambda: [((), len(_scheduler.snapshot()["queued"]))])
+_metrics.collected("runner_running_jobs", "Jobs holding a runner slot.", "gauge", lambda: [((), len(_scheduler.snapshot()["running"]))])
+_metrics.collected("process_resident_memory_bytes", "Resident memory size of the runner.", "gauge", lambda: [((), process_rss_bytes())])
+_metrics.collected("process_cpu_seconds_total", "CPU time used by the runner.", "counter", lambda: [((), process_cpu_seconds())])
+_metrics.collected("process_start_time_seconds", "Start time of the runner since the epoch.", "gauge", lambda: [((), PROCESS_START)])
 
 
 # ---------------------------------------------------------------------------
@@ -222,6 +569,176 @@ def _json_error(message: str, status: int = 400):
     return jsonify(error=message), status
 
 
+def _sse(payload: dict) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def _drain_stream(job: Job, index: int) -> tuple[list[str], int, bool]:
+    """Collect pending SSE frames for ``job`` from line ``index`` onwards.
+
+    Returns the frames, the next line index and whether the stream is done.
+    """
+    status = job.status
+    frames = []
+    while True:
+        chunk = job.log.read(index, index + STREAM_BATCH_LINES)
+        if not chunk:
+            break
+        index += len(chunk)
+        frames.append(_sse(dict(t="o", ls=chunk)))
+    done = status in FINAL_STATUSES
+    if done:
+        frames.append(_sse(dict(t="d", s=status, rc=job.rc)))
+    if frames:
+        STREAM_FRAMES.inc(len(frames))
+    return frames, index, done
+
+
+def _drain_updates(since: int | None) -> tuple[list[str], int]:
+    """Collect live-update frames after sequence number ``since``.
+
+    A subscriber without a usable position (new, or too far behind) gets one
+    ``snapshot`` frame listing every job instead. Returns the frames and the
+    sequence number to continue from.
+    """
+    _updates.flush_lines()
+    events = _updates.read(since) if since is not None else None
+    if events is None:
+        seq = _updates.seq
+        with _jobs_lock:
+            jobs = [job.summary() for job in _jobs.values()]
+        return [f"id: {seq}\n" + _sse(dict(t="snapshot", seq=seq, jobs=jobs))], seq
+    if not events:
+        return [], since
+    UPDATE_FRAMES.inc(len(events))
+    return [f"id: {event['seq']}\n" + _sse(event) for event in events], events[-1]["seq"]
+
+
+def _updates_position(raw: str | None) -> int | None:
+    """Parse the ``since`` query parameter or ``Last-Event-ID`` header of an updates request."""
+    try:
+        return max(0, int(raw)) if raw else None
+    except ValueError:
+        return None
+
+
+def _prepare_run(data: dict) -> dict:
+    """Validate a run request and build the ansible-playbook invocation.
+
+    Raises ValueError with a user-facing message when the request is invalid.
+    """
+    playbook_path = _resolve_repo_path(data.get("playbook"), must_exist=True)
+    inventory_path = _resolve_user_file(data.get("inventory"), must_exist=True)
+    vars_path = _resolve_user_file(data.get("vars_file"), must_exist=True) if data.get("vars_file") else None
+    verbosity = data.get("verbosity", "")
+    priority = data.get("priority") or "interactive"
+    limit = str(data.get("limit") or "").strip()
+
+    if playbook_path is None:
+        raise ValueError("Playbook not found")
+    if inventory_path is None:
+        raise ValueError("Inventory file not found")
+    if vars_path is None and data.get("vars_file"):
+        raise ValueError("Vars file not found")
+    if verbosity not in VERBOSITY_FLAGS:
+        raise ValueError("Unsupported verbosity flag")
+    if priority not in PRIORITIES:
+        raise ValueError("Unsupported priority class")
+
+    try:
+        extra_args = shlex.split(data.get("extra_args", ""))
+    except ValueError as exc:
+        raise ValueError(f"Invalid extra arguments: {exc}") from exc
+    limits = DEFAULT_LIMITS.tightened(data.get("resource_limits"))
+
+    argv = ["ansible-playbook", "-i", str(inventory_path), str(playbook_path)]
+    if vars_path is not None:
+        argv += ["--extra-vars", f"VARS_FILE_PATH={vars_path}"]
+    if limit:
+        argv += ["--limit", limit]
+    if verbosity:
+        argv.append(verbosity)
+    argv.extend(extra_args)
+
+    workflow = playbook_path.relative_to(WORKFLOWS_DIR).parts[0] if _is_within(playbook_path, WORKFLOWS_DIR) else ""
+    coalesce_key = None
+    if data.get("coalesce", True) and _coalescer.eligible(workflow, playbook_path.name):
+        coalesce_key = run_fingerprint(
+            argv, [playbook_path, inventory_path, vars_path], dict(priority=priority, limits=limits.to_dict())
+        )
+    return dict(
+        argv=argv,
+        label=data.get("label") or playbook_path.stem,
+        workflow=workflow,
+        playbook=playbook_path.name,
+        priority=priority,
+        hosts=list(inventory_hosts(inventory_path, limit or None)),
+        limits=limits.to_dict(),
+        coalesce_key=coalesce_key,
+    )
+
+
+def _submit_run(run: dict) -> Job:
+    """Register a job for a prepared run and hand it to the scheduler."""
+    jid = uuid.uuid4().hex[:8]
+    job = Job(
+        jid,
+        run["argv"],
+        str(PROJECT_ROOT),
+        run["label"],
+        run["priority"],
+        tuple(run["hosts"]),
+        run.get("workflow", ""),
+        run.get("playbook", ""),
+        ResourceLimits.from_dict(run.get("limits")) if run.get("limits") else None,
+    )
+    unenforced = _resources.unenforced(job.limits)
+    if unenforced:
+        job.put(f"*** Note: {' and '.join(unenforced)} limits are not enforced: /proc is not available\n")
+    with _jobs_lock:
+        _jobs[jid] = job
+    JOBS_SUBMITTED.inc(priority=job.priority)
+    _updates.created(job)
+    _scheduler.submit(job, priority=job.priority, hosts=job.hosts)
+    return job
+
+
+def _cancel_job(job: Job):
+    if job.status == "queued" and _scheduler.cancel(job):
+        job.set_status("cancelled")
+        _job_finished(job)
+    elif job.proc and job.status == "running":
+        try:
+            os.killpg(os.getpgid(job.proc.pid), signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        job.set_status("cancelled")
+
+
+_pipelines = PipelineEngine(DATA_DIR / "pipelines", _submit_run, _cancel_job)
+_validator = ValidationCache(engine=VALIDATION_ENGINE, cache_dir=DATA_DIR / "schema_cache")
+_workflow_catalog = CachedScan(lambda: scan_workflows(WORKFLOWS_DIR), CATALOG_TTL)
+_inventory_catalog = CachedScan(lambda: scan_inventories(INVENTORY_DIR, PROJECT_ROOT), CATALOG_TTL)
+
+
+def _cached_json(scan: CachedScan):
+    body, etag = scan.get()
+    response = Response(body, mimetype="application/json", headers={"Cache-Control": "no-cache"})
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+def warm_caches():
+    """Build the catalogs and start warm workers so the first request does not wait for them.
+
+    Also prunes job logs left past their retention by earlier runs.
+    """
+    _workflow_catalog.get()
+    _inventory_catalog.get()
+    _warm_pool.start()
+    _log_retention.wake()
+
+
 # ---------------------------------------------------------------------------
 # Routes
 # ---------------------------------------------------------------------------
@@ -235,43 +752,19 @@ def job_detail(jid):
     return render_template("job.html", job_id=jid)
 
 
+@app.route("/metrics")
+def metrics():
+    return Response(_metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+
 @app.route("/api/workflows")
 def api_workflows():
-    out = []
-    if not WORKFLOWS_DIR.is_dir():
-        return jsonify(out)
-
-    for directory in sorted(WORKFLOWS_DIR.iterdir()):
-        if not directory.is_dir() or directory.name.startswith("."):
-            continue
-
-        record = dict(name=directory.name, playbooks=[], vars=[], schemas=[], has_readme=False)
-        for subdir, key in [("playbook", "playbooks"), ("vars", "vars"), ("schema", "schemas")]:
-            path = directory / subdir
-            if path.is_dir():
-                record[key] = sorted(
-                    file.name
-                    for file in path.iterdir()
-                    if file.is_file() and file.suffix.lower() in YAML_SUFFIXES
-                )
-        record["has_readme"] = (directory / "README.md").is_file()
-        if record["playbooks"]:
-            out.append(record)
-
-    return jsonify(out)
+    return _cached_json(_workflow_catalog)
 
 
 @app.route("/api/inventories")
 def api_inventories():
-    out = []
-    if not INVENTORY_DIR.is_dir():
-        return jsonify(out)
-
-    for root, _dirs, files in os.walk(INVENTORY_DIR):
-        for filename in files:
-            if filename.endswith((".yml", ".yaml")):
-                out.append(os.path.relpath(os.path.join(root, filename), PROJECT_ROOT))
-    return jsonify(sorted(out))
+    return _cached_json(_inventory_catalog)
 
 
 @app.route("/api/fs")
@@ -332,6 +825,8 @@ def api_write_file():
         return _json_error("Access denied")
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(data.get("content", ""))
+    _workflow_catalog.invalidate()
+    _inventory_catalog.invalidate()
     return jsonify(status="saved", path=_display_path(path))
 
 
@@ -345,64 +840,44 @@ def api_validate():
     if vars_path is None:
         return _json_error("Vars file not found")
 
-    try:
-        import yamale
-        from yamale import YamaleError
-    except ImportError:
+    if not _validator.available:
         return _json_error("yamale is not installed in the runner environment", 500)
 
     try:
-        schema = yamale.make_schema(str(schema_path))
-        payload = yamale.make_data(str(vars_path))
-        yamale.validate(schema, payload)
-        return jsonify(ok=True, out="Validation completed")
-    except YamaleError as exc:
-        details = []
-        for result in exc.results:
-            details.append(_display_path(Path(result.data)))
-            details.extend(f"  - {error}" for error in result.errors)
-        return jsonify(ok=False, out="\n".join(details))
+        failures = _validator.validate(schema_path, vars_path)
     except Exception as exc:
         return _json_error(str(exc), 500)
 
+    if not failures:
+        return jsonify(ok=True, out="Validation completed")
+    details = []
+    for errors in failures:
+        details.append(_display_path(vars_path))
+        details.extend(f"  - {error}" for error in errors)
+    return jsonify(ok=False, out="\n".join(details))
+
 
 @app.route("/api/run", methods=["POST"])
 def api_run():
-    data = request.json or {}
-
-    playbook_path = _resolve_repo_path(data.get("playbook"), must_exist=True)
-    inventory_path = _resolve_user_file(data.get("inventory"), must_exist=True)
-    vars_path = _resolve_user_file(data.get("vars_file"), must_exist=True) if data.get("vars_file") else None
-    verbosity = data.get("verbosity", "")
-
-    if playbook_path is None:
-        return _json_error("Playbook not found")
-    if inventory_path is None:
-        return _json_error("Inventory file not found")
-    if vars_path is None and data.get("vars_file"):
-        return _json_error("Vars file not found")
-    if verbosity not in VERBOSITY_FLAGS:
-        return _json_error("Unsupported verbosity flag")
-
     try:
-        extra_args = shlex.split(data.get("extra_args", ""))
+        run = _prepare_run(request.json or {})
     except ValueError as exc:
-        return _json_error(f"Invalid extra arguments: {exc}")
+        return _json_error(str(exc))
 
-    argv = ["ansible-playbook", "-i", str(inventory_path), str(playbook_path)]
-    if vars_path is not None:
-        argv += ["--extra-vars", f"VARS_FILE_PATH={vars_path}"]
-    if verbosity:
-        argv.append(verbosity)
-    argv.extend(extra_args)
-
-    jid = uuid.uuid4().hex[:8]
-    label = data.get("label") or playbook_path.stem
-    job = Job(jid, argv, str(PROJECT_ROOT), label)
-    with _jobs_lock:
-        _jobs[jid] = job
-    threading.Thread(target=_exec, args=(job,), daemon=True).start()
-    return jsonify(job_id=jid, command=job.cmd)
+    coalesced = False
+    if run["coalesce_key"]:
+        job, coalesced = _coalescer.share(run["coalesce_key"], lambda: _submit_run(run))
+        if coalesced:
+            RUNS_COALESCED.inc(mode="cached" if job.finished else "attached")
+    else:
+        job = _submit_run(run)
+    return jsonify(
+        job_id=job.id,
+        command=job.cmd,
+        status=job.status,
+        position=_scheduler.position(job),
+        coalesced=coalesced,
+    )
 
 
 @app.route("/api/run/<jid>/stream")
@@ -418,16 +893,46 @@ def api_stream(jid):
 
     def gen():
         nonlocal index
-        while True:
-            with job._lock:
-                chunk, status = job.lines[index:], job.status
-            for line in chunk:
-                yield f"data: {json.dumps(dict(t='o', l=line))}\n\n"
-                index += 1
-            if status in ("completed", "failed", "cancelled"):
-                yield f"data: {json.dumps(dict(t='d', s=status, rc=job.rc))}\n\n"
-                break
-            time.sleep(0.1)
+        STREAM_CLIENTS.inc()
+        try:
+            while True:
+                if not job.wait(index, STREAM_KEEPALIVE):
+                    yield ": keepalive\n\n"
+                    continue
+                frames, index, done = _drain_stream(job, index)
+                yield from frames
+                if done:
+                    break
+        finally:
+            STREAM_CLIENTS.dec()
+
+    return Response(
+        gen(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/api/updates")
+def api_updates():
+    since = _updates_position(request.args.get("since") or request.headers.get("Last-Event-ID"))
+
+    def gen():
+        nonlocal since
+        UPDATE_CLIENTS.inc()
+        try:
+            last_sent = time.monotonic()
+            while True:
+                frames, since = _drain_updates(since)
+                if frames:
+                    yield from frames
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= STREAM_KEEPALIVE:
+                    yield ": keepalive\n\n"
+                    last_sent = time.monotonic()
+                _updates.wait(since, _updates.lines_interval if _updates.busy else STREAM_KEEPALIVE)
+        finally:
+            UPDATE_CLIENTS.dec()
 
     return Response(
         gen(),
@@ -441,12 +946,7 @@ def api_cancel(jid):
     job = _jobs.get(jid)
     if not job:
         return _json_error("Not found", 404)
-    if job.proc and job.status == "running":
-        try:
-            os.killpg(os.getpgid(job.proc.pid), signal.SIGTERM)
-        except ProcessLookupError:
-            pass
-        job.status = "cancelled"
+    _cancel_job(job)
     return jsonify(status=job.status)
 
 
@@ -454,32 +954,205 @@ def api_cancel(jid):
 def api_jobs():
     with _jobs_lock:
         out = [job.info() for job in _jobs.values()]
-    out.sort(key=lambda item: item.get("t0") or 0, reverse=True)
+    out.sort(key=lambda item: item.get("t0") or item.get("tq") or 0, reverse=True)
+    return jsonify(out)
+
+
+@app.route("/api/jobs/search")
+def api_jobs_search():
+    try:
+        offset = max(0, int(request.args.get("offset", "0")))
+        limit = min(SEARCH_PAGE_LIMIT, max(1, int(request.args.get("limit", "50"))))
+    except ValueError:
+        return _json_error("Invalid offset or limit")
+    try:
+        results, total = _history.search(request.args.get("q", ""), offset, limit)
+    except ValueError as exc:
+        return _json_error(str(exc))
+    for result in results:
+        del result["log_dir"]
+        result["live"] = result["id"] in _jobs
+    next_offset = offset + len(results) if offset + len(results) < total else None
+    return jsonify(results=results, total=total, offset=offset, next=next_offset)
+
+
+@app.route("/api/jobs/<jid>/events")
+def api_job_events(jid):
+    job = _jobs.get(jid)
+    if not job:
+        return _json_error("Not found", 404)
+    try:
+        offset = max(0, int(request.args.get("offset", "0")))
+        limit = min(EVENTS_PAGE_LIMIT, max(1, int(request.args.get("limit", "100"))))
+    except ValueError:
+        return _json_error("Invalid offset or limit")
+
+    if not job.finished:
+        job.events.poll(len(job.log), force=True)
+    events, next_offset = job.events.read(offset, limit, request.args.get("event") or None)
+    return jsonify(events=events, next=next_offset, total=len(job.events))
+
+
+@app.route("/api/jobs/<jid>/tasks")
+def api_job_tasks(jid):
+    job = _jobs.get(jid)
+    if not job:
+        return _json_error("Not found", 404)
+    if not job.finished:
+        job.events.poll(len(job.log), force=True)
+    tasks = job.events.tasks()
+    if request.args.get("sort") == "duration":
+        tasks.sort(key=lambda task: task["duration"], reverse=True)
+    return jsonify(tasks)
+
+
+@app.route("/api/pipelines", methods=["POST"])
+def api_create_pipeline():
+    data = request.json or {}
+    try:
+        steps = parse_steps(data.get("steps"), _prepare_run)
+    except ValueError as exc:
+        return _json_error(str(exc))
+    pipeline = _pipelines.create(data.get("label") or "Pipeline", steps)
+    return jsonify(pipeline.info())
+
+
+@app.route("/api/fanout", methods=["POST"])
+def api_create_fanout():
+    data = request.json or {}
+    try:
+        max_parallel = int(data.get("max_parallel", FANOUT_PARALLELISM))
+        if max_parallel < 1:
+            raise ValueError
+    except (TypeError, ValueError):
+        return _json_error("max_parallel must be a positive integer")
+    try:
+        steps = fanout_steps(data, _prepare_run)
+    except ValueError as exc:
+        return _json_error(str(exc))
+    label = data.get("label") or f"{steps[0].run['label']} × {len(steps)}"
+    pipeline = _pipelines.create(label, steps, kind="fanout", max_parallel=max_parallel)
+    return jsonify(pipeline.info())
+
+
+@app.route("/api/pipelines")
+def api_pipelines():
+    out = _pipelines.summaries()
+    out.sort(key=lambda item: item["t0"], reverse=True)
     return jsonify(out)
 
 
+@app.route("/api/pipelines/<pid>")
+def api_pipeline(pid):
+    pipeline = _pipelines.get(pid)
+    if not pipeline:
+        return _json_error("Not found", 404)
+    _pipelines.refresh(pipeline)
+    return jsonify(pipeline.info())
+
+
+@app.route("/api/pipelines/<pid>/cancel", methods=["POST"])
+def api_cancel_pipeline(pid):
+    pipeline = _pipelines.cancel(pid)
+    if not pipeline:
+        return _json_error("Not found", 404)
+    return jsonify(status=pipeline.status)
+
+
+@app.route("/api/queue")
+def api_queue():
+    return jsonify(dict(_scheduler.snapshot(), warm=_warm_pool.snapshot()))
+
+
+@app.route("/api/jobs/<jid>/queue")
+def api_job_queue(jid):
+    job = _jobs.get(jid)
+    if not job:
+        return _json_error("Not found", 404)
+    return jsonify(id=job.id, status=job.status, position=_scheduler.position(job))
+
+
 @app.route("/api/jobs/<jid>")
 def api_job(jid):
     job = _jobs.get(jid)
     if not job:
         return _json_error("Not found", 404)
-    return jsonify(job.details())
+
+    try:
+        offset = max(0, int(request.args.get("offset", "0")))
+        limit = request.args.get("limit")
+        limit = min(DETAILS_MAX_LINES, max(0, int(limit))) if limit is not None else None
+        tail = request.args.get("tail")
+        tail = min(DETAILS_MAX_LINES, max(0, int(tail))) if tail is not None else None
+    except ValueError:
+        return _json_error("Invalid offset, limit or tail")
+
+    if tail is None and limit is None:
+        if "offset" in request.args:
+            limit = DETAILS_MAX_LINES
+        else:
+            tail = DETAILS_DEFAULT_TAIL
+    return jsonify(job.details(offset, limit, tail))
+
+
+def _gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _log_response(jid: str, size: int, iter_bytes) -> Response:
+    """Serve ``size`` bytes of job log, honouring Range requests and gzip.
+
+    ``iter_bytes(start, stop)`` yields the raw log bytes ``[start, stop)``.
+    """
+    headers = {
+        "Content-Disposition": f'inline; filename="{jid}.log"',
+        "Accept-Ranges": "bytes",
+        "Vary": "Accept-Encoding",
+    }
+
+    if request.range is not None:
+        byte_range = request.range.range_for_length(size)
+        if byte_range is None:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status=416, headers=headers)
+        start, stop = byte_range
+        headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+        headers["Content-Length"] = str(stop - start)
+        return Response(iter_bytes(start, stop), status=206, mimetype="text/plain", headers=headers)
+
+    wants_gzip = request.args.get("gzip", "auto")
+    if wants_gzip == "1" or (
+        wants_gzip == "auto" and size >= LOG_GZIP_MIN_BYTES and "gzip" in request.accept_encodings
+    ):
+        headers["Content-Encoding"] = "gzip"
+        return Response(_gzip_stream(iter_bytes(0, size)), mimetype="text/plain", headers=headers)
+
+    headers["Content-Length"] = str(size)
+    return Response(iter_bytes(0, size), mimetype="text/plain", headers=headers)
+
+
+def _history_log(jid: str):
+    """Serve the on-disk log of a job that is only known to the history index."""
+    record = _history.get(jid)
+    log_dir = Path(record["log_dir"]) if record else None
+    if log_dir is None or not log_dir.is_dir() or log_dir.resolve().parent != LOG_DIR.resolve():
+        return _json_error("Not found", 404)
+    segments = list_segments(log_dir)
+    size = sum(size for _, size in segments)
+    return _log_response(jid, size, lambda start, stop: iter_segment_bytes(segments, start, stop))
 
 
 @app.route("/api/jobs/<jid>/log")
 def api_job_log(jid):
     job = _jobs.get(jid)
     if not job:
-        return _json_error("Not found", 404)
-
-    with job._lock:
-        body = "".join(job.lines)
-
-    return Response(
-        body,
-        mimetype="text/plain",
-        headers={"Content-Disposition": f'inline; filename="{jid}.log"'},
-    )
+        return _history_log(jid)
+    return _log_response(jid, job.log.size, job.log.iter_bytes)
 
 
 # ---------------------------------------------------------------------------
@@ -493,4 +1166,8 @@ if __name__ == "__main__":
     print(f"  Workflows    : {WORKFLOWS_DIR}")
     print(f"  Inventory    : {INVENTORY_DIR}")
     print(f"  URL          : http://{host}:{port}\n")
+    # debug=True turns on the reloader, whose watching parent also runs this
+    # module but never serves a request; only the serving child warms up
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        warm_caches()
     app.run(host=host, port=port, debug=True, threaded=True)
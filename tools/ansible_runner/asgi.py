@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""ASGI serving mode for the Ansible Workflow Runner.
+
+Serves the same routes as ``app.py`` but runs jobs and SSE streams on a single
+asyncio event loop, so open EventSources and running playbooks do not each pin
+an OS thread. Regular API routes are delegated to the Flask app, each request
+on its own thread as under the threaded Flask server.
+
+    pip install -r tools/ansible_runner/requirements.txt
+    python tools/ansible_runner/asgi.py
+
+Job output, task events and job completion touch the disk, so they run on
+the thread executor; the loop itself only waits on pipes and sockets.
+"""
+
+import asyncio
+import json
+import os
+import re
+import subprocess
+import time
+from urllib.parse import parse_qs
+
+from asgiref.sync import ThreadSensitiveContext
+from asgiref.wsgi import WsgiToAsgi
+
+import app as runner
+
+STREAM_ROUTE = re.compile(r"^/api/run/(?P<jid>[^/]+)/stream$")
+UPDATES_ROUTE = "/api/updates"
+READ_CHUNK = 64 * 1024
+# The event loop only holds weak references to tasks, and nothing else holds
+# a job's task while it waits on its output pipe
+_job_tasks: set[asyncio.Task] = set()
+
+
+def _universal_newlines(data: bytes) -> str:
+    """Decode output the way the WSGI runner's text-mode pipe does."""
+    return data.decode(errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _ingest(job: runner.Job, data: bytes):
+    """Append output to the job log and pick up new task events (blocking I/O)."""
+    job.put(_universal_newlines(data))
+    job.events.poll(len(job.log))
+
+
+async def _aexec(job: runner.Job):
+    """Execute ansible-playbook on the event loop, reading its output without a thread."""
+    if runner._warm_pool.enabled:
+        # Warm workers are plain Popen children; run them on the thread executor
+        await asyncio.to_thread(runner._exec, job)
+        return
+    task = asyncio.current_task()
+    _job_tasks.add(task)
+    job.t0 = time.time()
+    job.set_status("running")
+    transport = None
+    try:
+        # A plain Popen rather than asyncio's subprocess support: the child is
+        # reaped with wait4 (for its rusage), not by asyncio's child watcher
+        job.proc = subprocess.Popen(
+            job.argv,
+            cwd=job.cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+            env=runner._job_env(job),
+        )
+        runner.JOB_STARTS.inc(mode="cold")
+        runner._resources.watch(job)
+        reader = asyncio.StreamReader(limit=READ_CHUNK)
+        transport, _ = await asyncio.get_running_loop().connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), job.proc.stdout
+        )
+        pending = b""
+        while chunk := await reader.read(READ_CHUNK):
+            pending += chunk
+            # A trailing "\r" waits for the next chunk in case it starts a "\r\n"
+            end = max(pending.rfind(b"\n"), pending.rfind(b"\r", 0, len(pending) - 1)) + 1
+            if end:
+                # Output arriving during the write waits in the pipe and is
+                # read as one larger chunk afterwards
+                await asyncio.to_thread(_ingest, job, pending[:end])
+                pending = pending[end:]
+        if pending:
+            await asyncio.to_thread(_ingest, job, pending)
+        job.rc = await asyncio.to_thread(runner._reap, job)
+        if job.status != "cancelled":
+            job.set_status("completed" if job.rc == 0 else "failed")
+    except Exception as exc:
+        await asyncio.to_thread(job.put, f"\n*** Error: {exc}\n")
+        job.set_status("failed")
+    finally:
+        if transport is not None:
+            transport.close()
+        try:
+            # Closes the log, forces a last events read and saves pipeline state
+            await asyncio.to_thread(runner._job_finished, job)
+        finally:
+            _job_tasks.discard(task)
+
+
+async def _send_json_error(send, message: str, status: int):
+    body = json.dumps(dict(error=message)).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json")],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class RunnerASGI:
+    """ASGI application: native SSE streaming, everything else through Flask."""
+
+    def __init__(self):
+        self.wsgi = WsgiToAsgi(runner.app)
+        self.loop: asyncio.AbstractEventLoop | None = None
+
+    def _bind_loop(self):
+        if self.loop is not None:
+            return
+        self.loop = asyncio.get_running_loop()
+        loop = self.loop
+        runner.set_launcher(lambda job: asyncio.run_coroutine_threadsafe(_aexec(job), loop))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+
+        self._bind_loop()
+        if scope["type"] == "http" and scope["method"] == "GET":
+            match = STREAM_ROUTE.match(scope["path"])
+            if match:
+                await self._stream(scope, receive, send, match.group("jid"))
+                return
+            if scope["path"] == UPDATES_ROUTE:
+                await self._updates(scope, receive, send)
+                return
+        # WsgiToAsgi runs the Flask app thread-sensitively, which on its own
+        # puts every request on one shared thread; a context per request gives
+        # each its own, so a long log download does not hold up /api/run
+        async with ThreadSensitiveContext():
+            await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._bind_loop()
+                await asyncio.to_thread(runner.warm_caches)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _stream(self, scope, receive, send, jid: str):
+        job = runner._jobs.get(jid)
+        if not job:
+            await _send_json_error(send, "Not found", 404)
+            return
+
+        query = parse_qs(scope.get("query_string", b"").decode())
+        try:
+            index = max(0, int(query.get("start", ["0"])[0]))
+        except ValueError:
+            await _send_json_error(send, "Invalid stream offset", 400)
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+
+        async def pump():
+            nonlocal index
+            while True:
+                if not await job.wait_async(index, runner.STREAM_KEEPALIVE):
+                    await send({"type": "http.response.body", "body": b": keepalive\n\n", "more_body": True})
+                    continue
+                if job.log.in_memory(index):
+                    frames, index, done = runner._drain_stream(job, index)
+                else:
+                    frames, index, done = await asyncio.to_thread(runner._drain_stream, job, index)
+                await send({"type": "http.response.body", "body": "".join(frames).encode(), "more_body": not done})
+                if done:
+                    return
+
+        async def disconnected():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        pump_task = asyncio.ensure_future(pump())
+        disconnect_task = asyncio.ensure_future(disconnected())
+        runner.STREAM_CLIENTS.inc()
+        try:
+            await asyncio.wait({pump_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            runner.STREAM_CLIENTS.dec()
+            for task in (pump_task, disconnect_task):
+                task.cancel()
+        if pump_task.done() and not pump_task.cancelled() and pump_task.exception():
+            raise pump_task.exception()
+
+    async def _updates(self, scope, receive, send):
+        query = parse_qs(scope.get("query_string", b"").decode())
+        headers = dict(scope.get("headers", []))
+        since = runner._updates_position(
+            query.get("since", [""])[0] or headers.get(b"last-event-id", b"").decode()
+        )
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+
+        async def pump():
+            nonlocal since
+            last_sent = time.monotonic()
+            while True:
+                frames, since = runner._drain_updates(since)
+                if frames:
+                    await send({"type": "http.response.body", "body": "".join(frames).encode(), "more_body": True})
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= runner.STREAM_KEEPALIVE:
+                    await send({"type": "http.response.body", "body": b": keepalive\n\n", "more_body": True})
+                    last_sent = time.monotonic()
+                feed = runner._updates
+                await feed.wait_async(since, feed.lines_interval if feed.busy else runner.STREAM_KEEPALIVE)
+
+        async def disconnected():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        pump_task = asyncio.ensure_future(pump())
+        disconnect_task = asyncio.ensure_future(disconnected())
+        runner.UPDATE_CLIENTS.inc()
+        try:
+            await asyncio.wait({pump_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            runner.UPDATE_CLIENTS.dec()
+            for task in (pump_task, disconnect_task):
+                task.cancel()
+        if pump_task.done() and not pump_task.cancelled() and pump_task.exception():
+            raise pump_task.exception()
+
+
+application = RunnerASGI()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    host = os.environ.get("RUNNER_HOST", "127.0.0.1")
+    port = int(os.environ.get("RUNNER_PORT", "5005"))
+    print("\n  Ansible Workflow Runner (ASGI)")
+    print(f"  Project root : {runner.PROJECT_ROOT}")
+    print(f"  Workflows    : {runner.WORKFLOWS_DIR}")
+    print(f"  Inventory    : {runner.INVENTORY_DIR}")
+    print(f"  URL          : http://{host}:{port}\n")
+    uvicorn.run(application, host=host, port=port)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Stand-in for ``ansible-playbook`` used by the runner benchmark.
+
+Ignores its arguments and prints ``BENCH_LINES_PER_SEC`` lines per second for
+``BENCH_SECONDS`` seconds, then exits with ``BENCH_RC``. Each line carries its
+sequence number and the wall-clock time it was written, so a client reading
+the job stream can measure end-to-end latency:
+
+    BENCH <seq> <unix time> <padding up to BENCH_LINE_BYTES>
+"""
+
+import os
+import sys
+import time
+
+# Lines are written in batches this many seconds apart
+TICK = 0.01
+
+
+def main() -> int:
+    rate = float(os.environ.get("BENCH_LINES_PER_SEC", "100"))
+    seconds = float(os.environ.get("BENCH_SECONDS", "5"))
+    line_bytes = int(os.environ.get("BENCH_LINE_BYTES", "120"))
+    total = int(rate * seconds)
+
+    out = sys.stdout
+    start = time.time()
+    written = 0
+    while written < total:
+        due = min(total, int((time.time() - start) * rate) + 1)
+        now = time.time()
+        while written < due:
+            written += 1
+            head = f"BENCH {written} {now:.6f} "
+            out.write(head + "x" * max(0, line_bytes - len(head)) + "\n")
+        out.flush()
+        time.sleep(TICK)
+    return int(os.environ.get("BENCH_RC", "0"))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
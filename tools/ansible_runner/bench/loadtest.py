@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""Load and latency benchmark for the Ansible Workflow Runner.
+
+Starts the runner (``app.py``, or ``asgi.py`` with ``--asgi``) with a stub
+``ansible-playbook`` (``fake_playbook.py``) on ``PATH``. It then submits jobs
+through ``/api/run`` from several concurrent clients and follows each job with
+``--viewers`` ``/api/run/<id>/stream`` readers while ``--pollers`` clients
+poll ``/api/jobs`` and ``--downloaders`` clients download the logs of
+finished jobs. It reports:
+
+- end-to-end line latency percentiles (stub write to client receipt)
+- output throughput
+- ``/api/jobs`` response times
+- log download times
+- the server's thread count and memory growth per job
+
+    python tools/ansible_runner/bench/loadtest.py --jobs 50 --concurrency 10 --viewers 2
+    python tools/ansible_runner/bench/loadtest.py --asgi --lines-per-sec 2000 --json result.json
+    python tools/ansible_runner/bench/loadtest.py --asgi --downloaders 2 --download-rate 512
+
+The runner's state (logs, history) goes to a temporary directory that is
+removed afterwards. Use ``--url`` to benchmark an already running runner
+instead; it must have been started with ``fake_playbook.py`` on ``PATH`` as
+``ansible-playbook`` and the ``BENCH_*`` variables in its environment.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+BENCH_DIR = Path(__file__).resolve().parent
+RUNNER_DIR = BENCH_DIR.parent
+PROJECT_ROOT = RUNNER_DIR.parent.parent
+PROC = Path("/proc")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _default_playbook() -> str:
+    playbooks = sorted(PROJECT_ROOT.glob("workflows/*/playbook/*.yml"))
+    if not playbooks:
+        raise SystemExit("No playbooks found under workflows/")
+    return str(playbooks[0].relative_to(PROJECT_ROOT))
+
+
+class Client:
+    """Minimal JSON/SSE client on http.client, one connection per request."""
+
+    def __init__(self, url: str):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+
+    def _connection(self, timeout: float = 60) -> http.client.HTTPConnection:
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def request(self, method: str, path: str, body: dict | None = None) -> tuple[int, bytes]:
+        conn = self._connection()
+        try:
+            headers = {"Content-Type": "application/json"} if body is not None else {}
+            conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        finally:
+            conn.close()
+
+    def download(self, path: str, rate: float = 0) -> int:
+        """Read a response body, at most ``rate`` bytes per second (0 = unlimited), and return its size."""
+        conn = self._connection(timeout=600)
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            if response.status != 200:
+                raise RuntimeError(f"GET {path}: HTTP {response.status}")
+            started = time.monotonic()
+            size = 0
+            while chunk := response.read(16 * 1024):
+                size += len(chunk)
+                if rate:
+                    time.sleep(max(0.0, size / rate - (time.monotonic() - started)))
+            return size
+        finally:
+            conn.close()
+
+    def stream(self, path: str):
+        """Yield the decoded JSON payload of every SSE ``data:`` line."""
+        conn = self._connection(timeout=600)
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            if response.status != 200:
+                raise RuntimeError(f"GET {path}: HTTP {response.status}")
+            for raw in response:
+                if raw.startswith(b"data: "):
+                    yield json.loads(raw[6:])
+        finally:
+            conn.close()
+
+
+class ServerSampler:
+    """Sample the runner process's RSS and thread count from /proc."""
+
+    def __init__(self, pid: int | None, interval: float = 0.2):
+        self.pid = pid
+        self.interval = interval
+        self.samples: list[tuple[float, int, int]] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def read(self) -> tuple[int, int] | None:
+        if self.pid is None:
+            return None
+        try:
+            fields = dict(
+                line.split(":", 1) for line in (PROC / str(self.pid) / "status").read_text().splitlines() if ":" in line
+            )
+        except OSError:
+            return None
+        return int(fields["VmRSS"].split()[0]) * 1024, int(fields["Threads"])
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            sample = self.read()
+            if sample:
+                self.samples.append((time.monotonic(), *sample))
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def _serving_pid(pid: int) -> int:
+    """The process that serves requests: the child of ``pid`` when Flask's reloader is active."""
+    for entry in PROC.glob("[0-9]*"):
+        try:
+            stat = (entry / "stat").read_bytes()
+        except OSError:
+            continue
+        if int(stat[stat.rfind(b")") + 2:].split()[1]) == pid:
+            return int(entry.name)
+    return pid
+
+
+def start_runner(args, data_dir: Path, bin_dir: Path) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = dict(
+        os.environ,
+        PATH=os.pathsep.join([str(bin_dir), os.environ.get("PATH", "")]),
+        RUNNER_HOST="127.0.0.1",
+        RUNNER_PORT=str(port),
+        RUNNER_DATA_DIR=str(data_dir),
+        RUNNER_MAX_JOBS=str(args.max_jobs),
+        RUNNER_MAX_JOBS_PER_HOST=str(args.max_jobs),
+        RUNNER_WARM_WORKERS="0",
+        BENCH_LINES_PER_SEC=str(args.lines_per_sec),
+        BENCH_SECONDS=str(args.seconds),
+        BENCH_LINE_BYTES=str(args.line_bytes),
+    )
+    script = RUNNER_DIR / ("asgi.py" if args.asgi else "app.py")
+    proc = subprocess.Popen(
+        [sys.executable, str(script)],
+        cwd=str(PROJECT_ROOT),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    client = Client(url)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"Runner exited with code {proc.returncode} during startup")
+        try:
+            if client.request("GET", "/api/queue")[0] == 200:
+                return proc, url
+        except OSError:
+            pass
+        time.sleep(0.1)
+    proc.kill()
+    raise SystemExit("Runner did not start within 30s")
+
+
+def follow_job(client: Client, jid: str, latencies: list[float], lock: threading.Lock) -> int:
+    """Read a job stream to the end, recording the latency of every bench line."""
+    received = 0
+    local = []
+    for frame in client.stream(f"/api/run/{jid}/stream"):
+        if frame.get("t") == "o":
+            now = time.time()
+            for line in frame["ls"]:
+                parts = line.split(" ", 3)
+                if len(parts) >= 3 and parts[0] == "BENCH":
+                    local.append(now - float(parts[2]))
+            received += len(frame["ls"])
+        elif frame.get("t") == "d":
+            break
+    with lock:
+        latencies.extend(local)
+    return received
+
+
+def run_job(client: Client, index: int, args, playbook: str, inventory: str, latencies, lock, finished: list[str]) -> dict:
+    submitted = time.monotonic()
+    status, body = client.request("POST", "/api/run", dict(
+        playbook=playbook,
+        inventory=inventory,
+        label=f"bench-{index}",
+        coalesce=False,
+    ))
+    if status != 200:
+        raise RuntimeError(f"/api/run: HTTP {status}: {body[:200]!r}")
+    jid = json.loads(body)["job_id"]
+    with ThreadPoolExecutor(max_workers=args.viewers) as viewers:
+        received = list(viewers.map(lambda _: follow_job(client, jid, latencies, lock), range(args.viewers)))
+    with lock:
+        finished.append(jid)
+    return dict(id=jid, received=received, seconds=time.monotonic() - submitted)
+
+
+def poll_jobs(client: Client, stop: threading.Event, interval: float, timings: list[float], sizes: list[int]):
+    while not stop.is_set():
+        started = time.monotonic()
+        status, body = client.request("GET", "/api/jobs")
+        if status == 200:
+            timings.append(time.monotonic() - started)
+            sizes.append(len(body))
+        stop.wait(interval)
+
+
+def download_logs(
+    client: Client, stop: threading.Event, finished: list[str], rate: float, timings: list[float], sizes: list[int]
+):
+    """Download the logs of finished jobs in turn until ``stop`` is set."""
+    index = 0
+    while not stop.is_set():
+        if not finished:
+            stop.wait(0.1)
+            continue
+        jid = finished[index % len(finished)]
+        index += 1
+        started = time.monotonic()
+        size = client.download(f"/api/jobs/{jid}/log?gzip=0", rate)
+        timings.append(time.monotonic() - started)
+        sizes.append(size)
+
+
+def benchmark(args, url: str, pid: int | None, inventory: str) -> dict:
+    client = Client(url)
+    playbook = args.playbook or _default_playbook()
+    sampler = ServerSampler(pid)
+    baseline = sampler.read()
+    sampler.start()
+
+    latencies: list[float] = []
+    lock = threading.Lock()
+    poll_timings: list[float] = []
+    poll_sizes: list[int] = []
+    stop_polling = threading.Event()
+    pollers = [
+        threading.Thread(target=poll_jobs, args=(client, stop_polling, args.poll_interval, poll_timings, poll_sizes), daemon=True)
+        for _ in range(args.pollers)
+    ]
+    finished: list[str] = []
+    download_timings: list[float] = []
+    download_sizes: list[int] = []
+    pollers += [
+        threading.Thread(
+            target=download_logs,
+            args=(client, stop_polling, finished, args.download_rate * 1024, download_timings, download_sizes),
+            daemon=True,
+        )
+        for _ in range(args.downloaders)
+    ]
+    for poller in pollers:
+        poller.start()
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        jobs = list(pool.map(
+            lambda index: run_job(client, index, args, playbook, inventory, latencies, lock, finished),
+            range(args.jobs),
+        ))
+    wall = time.monotonic() - started
+
+    stop_polling.set()
+    for poller in pollers:
+        poller.join()
+    sampler.stop()
+    final = sampler.read()
+
+    expected = int(args.lines_per_sec * args.seconds)
+    received = sum(sum(job["received"]) for job in jobs)
+    result = dict(
+        config=dict(
+            jobs=args.jobs, concurrency=args.concurrency, viewers=args.viewers, pollers=args.pollers,
+            downloaders=args.downloaders, download_rate_kib=args.download_rate,
+            lines_per_sec=args.lines_per_sec, seconds=args.seconds, line_bytes=args.line_bytes,
+            max_jobs=args.max_jobs, server="asgi" if args.asgi else "wsgi",
+        ),
+        wall_seconds=round(wall, 3),
+        job_seconds=dict(
+            p50=round(_percentile([job["seconds"] for job in jobs], 50), 3),
+            max=round(max(job["seconds"] for job in jobs), 3),
+        ),
+        lines=dict(
+            received=received,
+            # Streams that received at least every line the stub wrote
+            complete_streams=sum(1 for job in jobs for count in job["received"] if count >= expected),
+            streams=args.jobs * args.viewers,
+            per_second=round(received / wall, 1) if wall else 0.0,
+        ),
+        latency_ms={
+            f"p{pct:g}": round(_percentile(latencies, pct) * 1000, 2) for pct in (50, 90, 99, 99.9)
+        } | dict(max=round(max(latencies, default=0) * 1000, 2), samples=len(latencies)),
+        jobs_api=dict(
+            requests=len(poll_timings),
+            p50_ms=round(_percentile(poll_timings, 50) * 1000, 2),
+            p99_ms=round(_percentile(poll_timings, 99) * 1000, 2),
+            mean_bytes=round(statistics.fmean(poll_sizes)) if poll_sizes else 0,
+        ),
+        log_downloads=dict(
+            requests=len(download_timings),
+            p50_ms=round(_percentile(download_timings, 50) * 1000, 2),
+            max_ms=round(max(download_timings, default=0) * 1000, 2),
+            mean_bytes=round(statistics.fmean(download_sizes)) if download_sizes else 0,
+        ),
+    )
+    if baseline and final:
+        result["server"] = dict(
+            rss_start_bytes=baseline[0],
+            rss_end_bytes=final[0],
+            rss_peak_bytes=max([baseline[0], final[0]] + [sample[1] for sample in sampler.samples]),
+            rss_growth_per_job_bytes=round((final[0] - baseline[0]) / max(1, args.jobs)),
+            threads_start=baseline[1],
+            threads_peak=max([baseline[1], final[1]] + [sample[2] for sample in sampler.samples]),
+            threads_end=final[1],
+        )
+    return result
+
+
+def print_report(result: dict):
+    config, lines, latency, jobs_api = result["config"], result["lines"], result["latency_ms"], result["jobs_api"]
+    print(f"\n  Runner benchmark ({config['server']})")
+    print(f"  {config['jobs']} jobs × {config['lines_per_sec']:g} lines/s × {config['seconds']:g}s, "
+          f"{config['concurrency']} submitters, {config['viewers']} viewers/job, {config['pollers']} pollers, "
+          f"RUNNER_MAX_JOBS={config['max_jobs']}")
+    print(f"  Wall time        : {result['wall_seconds']:.2f}s "
+          f"(job p50 {result['job_seconds']['p50']:.2f}s, max {result['job_seconds']['max']:.2f}s)")
+    print(f"  Lines received   : {lines['received']} ({lines['per_second']:.0f}/s), "
+          f"{lines['complete_streams']}/{lines['streams']} streams complete")
+    print("  Line latency     : " + ", ".join(f"{key} {value}" for key, value in latency.items() if key != "samples")
+          + f" ms ({latency['samples']} samples)")
+    print(f"  /api/jobs        : {jobs_api['requests']} requests, p50 {jobs_api['p50_ms']} ms, "
+          f"p99 {jobs_api['p99_ms']} ms, {jobs_api['mean_bytes']} bytes/response")
+    downloads = result["log_downloads"]
+    if config["downloaders"]:
+        print(f"  Log downloads    : {downloads['requests']} requests, p50 {downloads['p50_ms']} ms, "
+              f"max {downloads['max_ms']} ms, {downloads['mean_bytes']} bytes/response")
+    server = result.get("server")
+    if server:
+        print(f"  Server RSS       : {server['rss_start_bytes'] / 2**20:.1f} → {server['rss_end_bytes'] / 2**20:.1f} MiB "
+              f"(peak {server['rss_peak_bytes'] / 2**20:.1f} MiB, {server['rss_growth_per_job_bytes'] / 1024:.1f} KiB/job)")
+        print(f"  Server threads   : {server['threads_start']} → {server['threads_end']} (peak {server['threads_peak']})")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load and latency benchmark for the Ansible Workflow Runner",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--jobs", type=int, default=20, help="Jobs to submit (default: 20)")
+    parser.add_argument("--concurrency", type=int, default=5, help="Clients submitting and following jobs at once (default: 5)")
+    parser.add_argument("--viewers", type=int, default=1, help="Stream readers per job (default: 1)")
+    parser.add_argument("--pollers", type=int, default=2, help="Clients polling /api/jobs (default: 2)")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between /api/jobs polls per poller (default: 1)")
+    parser.add_argument("--downloaders", type=int, default=0, help="Clients downloading finished job logs (default: 0)")
+    parser.add_argument("--download-rate", type=float, default=0, help="KiB/s each downloader reads at, 0 for unlimited (default: 0)")
+    parser.add_argument("--lines-per-sec", type=float, default=200, help="Output lines per second per job (default: 200)")
+    parser.add_argument("--seconds", type=float, default=5, help="Runtime of each stub playbook (default: 5)")
+    parser.add_argument("--line-bytes", type=int, default=120, help="Length of each output line (default: 120)")
+    parser.add_argument("--max-jobs", type=int, default=8, help="RUNNER_MAX_JOBS for the spawned runner (default: 8)")
+    parser.add_argument("--asgi", action="store_true", help="Benchmark the ASGI entry point instead of the Flask server")
+    parser.add_argument("--playbook", help="Repository playbook to submit (default: the first under workflows/)")
+    parser.add_argument("--url", help="Benchmark an already running runner instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="PID of the runner given with --url, for memory and thread figures")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    # The runner only accepts inventories under the repository or the home directory
+    work_dir = Path(tempfile.mkdtemp(prefix=".runner-bench-", dir=Path.home()))
+    proc = None
+    try:
+        inventory = work_dir / "inventory.yml"
+        inventory.write_text("all:\n  hosts:\n    bench:\n      catalyst_center_host: bench.invalid\n")
+        bin_dir = work_dir / "bin"
+        bin_dir.mkdir()
+        (bin_dir / "ansible-playbook").symlink_to(BENCH_DIR / "fake_playbook.py")
+
+        if args.url:
+            url, pid = args.url, args.server_pid
+        else:
+            proc, url = start_runner(args, work_dir / "data", bin_dir)
+            pid = _serving_pid(proc.pid)
+        result = benchmark(args, url, pid, str(inventory))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_report(result)
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Ansible callback plugin that records per-task JSON events for the runner."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+    name: runner_events
+    type: aggregate
+    short_description: Write per-task JSON events for the Ansible Workflow Runner
+    description:
+      - Appends one JSON object per line for playbook, play, task and host result
+        events to the file named by C(RUNNER_EVENTS_FILE).
+      - Enabled automatically by the Ansible Workflow Runner; it does not change
+        the normal stdout output.
+    requirements:
+      - enable in configuration
+"""
+
+import json
+import os
+import time
+
+from ansible.plugins.callback import CallbackBase
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = "aggregate"
+    CALLBACK_NAME = "runner_events"
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display=display)
+        path = os.environ.get("RUNNER_EVENTS_FILE")
+        self._fh = open(path, "a", buffering=1) if path else None
+
+    def _emit(self, event, **fields):
+        if self._fh is None:
+            return
+        fields["event"] = event
+        fields["time"] = time.time()
+        self._fh.write(json.dumps(fields, default=str) + "\n")
+
+    @staticmethod
+    def _task_fields(task):
+        return dict(
+            task=task.get_name().strip(),
+            task_uuid=str(task._uuid),
+            action=task.action,
+            path=task.get_path(),
+        )
+
+    def _host_result(self, status, result):
+        fields = self._task_fields(result._task)
+        fields.update(
+            host=result._host.get_name(),
+            status=status,
+            changed=bool(result._result.get("changed", False)),
+        )
+        if status in ("failed", "unreachable") and result._result.get("msg"):
+            fields["msg"] = result._result["msg"]
+        self._emit("host_result", **fields)
+
+    def v2_playbook_on_start(self, playbook):
+        self._emit("playbook_start", playbook=playbook._file_name)
+
+    def v2_playbook_on_play_start(self, play):
+        self._emit("play_start", play=play.get_name().strip(), play_uuid=str(play._uuid))
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        self._emit("task_start", handler=False, **self._task_fields(task))
+
+    def v2_playbook_on_handler_task_start(self, task):
+        self._emit("task_start", handler=True, **self._task_fields(task))
+
+    def v2_runner_on_start(self, host, task):
+        self._emit("host_start", host=host.get_name(), **self._task_fields(task))
+
+    def v2_runner_on_ok(self, result):
+        self._host_result("ok", result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._host_result("ignored" if ignore_errors else "failed", result)
+
+    def v2_runner_on_skipped(self, result):
+        self._host_result("skipped", result)
+
+    def v2_runner_on_unreachable(self, result):
+        self._host_result("unreachable", result)
+
+    def v2_playbook_on_stats(self, stats):
+        hosts = {host: stats.summarize(host) for host in sorted(stats.processed)}
+        self._emit("playbook_stats", hosts=hosts)
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
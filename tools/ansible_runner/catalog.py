@@ -0,0 +1,101 @@
+"""Cached directory scans for the workflow and inventory catalogs."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+YAML_SUFFIXES = (".yml", ".yaml")
+
+
+class CachedScan:
+    """Cache a JSON-serialisable directory scan until a watched directory changes.
+
+    ``build`` returns the scan result and the directories it depends on. Adding,
+    removing or renaming an entry updates the mtime of its parent directory, so
+    the cache is revalidated by stat-ing only those directories, and at most
+    once every ``ttl`` seconds.
+    """
+
+    def __init__(self, build: Callable[[], tuple[Any, list[Path]]], ttl: float = 2.0):
+        self._build = build
+        self.ttl = ttl
+        self._body: bytes | None = None
+        self._etag = ""
+        self._stamps: dict[Path, int | None] = {}
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stamp(path: Path) -> int | None:
+        try:
+            return path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _stale(self) -> bool:
+        return any(self._stamp(path) != stamp for path, stamp in self._stamps.items())
+
+    def invalidate(self):
+        with self._lock:
+            self._body = None
+
+    def get(self) -> tuple[bytes, str]:
+        """Return the serialised scan and its ETag, rebuilding it if needed."""
+        with self._lock:
+            now = time.monotonic()
+            if self._body is not None and now - self._checked < self.ttl:
+                return self._body, self._etag
+            if self._body is None or self._stale():
+                value, watched = self._build()
+                self._stamps = {path: self._stamp(path) for path in watched}
+                self._body = json.dumps(value).encode()
+                self._etag = hashlib.sha1(self._body).hexdigest()
+            self._checked = now
+            return self._body, self._etag
+
+
+def scan_workflows(workflows_dir: Path) -> tuple[list[dict], list[Path]]:
+    """List workflows that ship at least one playbook, with their vars and schemas."""
+    out: list[dict] = []
+    watched = [workflows_dir]
+    if not workflows_dir.is_dir():
+        return out, watched
+
+    for directory in sorted(workflows_dir.iterdir()):
+        if not directory.is_dir() or directory.name.startswith("."):
+            continue
+
+        watched.append(directory)
+        record = dict(name=directory.name, playbooks=[], vars=[], schemas=[], has_readme=False)
+        for subdir, key in [("playbook", "playbooks"), ("vars", "vars"), ("schema", "schemas")]:
+            path = directory / subdir
+            if path.is_dir():
+                watched.append(path)
+                record[key] = sorted(
+                    file.name
+                    for file in path.iterdir()
+                    if file.is_file() and file.suffix.lower() in YAML_SUFFIXES
+                )
+        record["has_readme"] = (directory / "README.md").is_file()
+        if record["playbooks"]:
+            out.append(record)
+    return out, watched
+
+
+def scan_inventories(inventory_dir: Path, project_root: Path) -> tuple[list[str], list[Path]]:
+    """List inventory YAML files relative to the project root."""
+    out: list[str] = []
+    watched = [inventory_dir]
+    if not inventory_dir.is_dir():
+        return out, watched
+
+    for root, _dirs, files in os.walk(inventory_dir):
+        watched.append(Path(root))
+        for filename in files:
+            if filename.endswith(YAML_SUFFIXES):
+                out.append(os.path.relpath(os.path.join(root, filename), project_root))
+    return sorted(out), watched
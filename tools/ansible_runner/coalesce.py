@@ -0,0 +1,70 @@
+"""Sharing of one job between identical runs of read-only playbooks."""
+
+import fnmatch
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+
+def run_fingerprint(argv: list[str], files: list[Path | None], settings: dict | None = None) -> str:
+    """Hash a command line together with the content of the files it reads.
+
+    ``settings`` holds whatever else shapes the job without showing up in
+    ``argv``, such as its priority and resource limits; runs that differ
+    there never share a job.
+    """
+    digest = hashlib.sha256(json.dumps([argv, settings or {}], sort_keys=True).encode())
+    for path in files:
+        if path is None:
+            continue
+        digest.update(str(path).encode() + b"\0")
+        try:
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+        except OSError:
+            digest.update(b"missing")
+    return digest.hexdigest()
+
+
+class RunCoalescer:
+    """Map run fingerprints to the job serving them.
+
+    Only workflows or playbooks matching one of ``patterns`` (shell-style, e.g.
+    ``*_config_generator``) take part, so with no patterns nothing is shared.
+    A queued or running job is shared with every identical request; a job
+    that completed successfully keeps serving identical requests for ``ttl``
+    seconds (0 disables this result cache).
+    """
+
+    def __init__(self, patterns: list[str], ttl: float = 0):
+        self.patterns = [pattern for pattern in patterns if pattern]
+        self.ttl = ttl
+        self._jobs: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def eligible(self, workflow: str, playbook: str) -> bool:
+        names = [name for name in (workflow, Path(playbook).stem) if name]
+        return any(fnmatch.fnmatch(name, pattern) for name in names for pattern in self.patterns)
+
+    def _usable(self, job, now: float) -> bool:
+        if not job.finished:
+            return True
+        return job.status == "completed" and job.t1 is not None and now - job.t1 < self.ttl
+
+    def share(self, key: str, start: Callable[[], Any]) -> tuple[Any, bool]:
+        """Return the job serving ``key`` and whether it already existed.
+
+        ``start`` is called (under the lock, so identical concurrent requests
+        cannot both start a job) when no usable job exists.
+        """
+        now = time.time()
+        with self._lock:
+            for stale in [name for name, job in self._jobs.items() if not self._usable(job, now)]:
+                del self._jobs[stale]
+            job = self._jobs.get(key)
+            if job is not None:
+                return job, True
+            job = self._jobs[key] = start()
+            return job, False
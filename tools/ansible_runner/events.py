@@ -0,0 +1,154 @@
+"""Indexed per-task events written by the ``runner_events`` callback plugin."""
+
+import json
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+
+CALLBACK_NAME = "runner_events"
+CALLBACK_DIR = Path(__file__).resolve().parent / "callback_plugins"
+# Seconds of line-count marks kept after a read, for events the callback
+# timestamped just before that read but had not finished writing yet
+MARK_WINDOW = 1.0
+
+
+class JobEvents:
+    """Tail a job's JSON-lines event file and index it by byte offset.
+
+    Each ingested event also records the number of log lines the job had
+    produced when the event was written, so the UI can jump from a task to its
+    output. Task summaries (start, end, per-host status) are aggregated as
+    events arrive.
+    """
+
+    def __init__(self, path: Path, open_retry: float = 0.2, interval: float = 0.05):
+        self.path = path
+        self.open_retry = open_retry
+        self.interval = interval
+        self._offsets = array("Q")
+        self._lines = array("Q")
+        self._fh = None
+        self._pending = b""
+        self._pos = 0
+        self._next_open = 0.0
+        self._next_read = 0.0
+        # (wall-clock time, log line count) noted by poll, to place events by
+        # the "time" the callback gave them
+        self._marks: list[tuple[float, int]] = [(0.0, 0)]
+        self._tasks: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def poll(self, line: int, force: bool = False):
+        """Note that the log has ``line`` lines and ingest new events when due.
+
+        The file is read at most once per ``interval``, and a missing file is
+        looked for again after ``open_retry``; ``force`` skips both waits. This
+        keeps the call cheap enough to make after every line of output. Events are placed at the line count the log had at their
+        ``time``, which keeps jumps to a task exact between reads.
+        """
+        with self._lock:
+            now = time.time()
+            self._marks.append((now, line))
+            if now < self._next_read and not force:
+                return
+            self._next_read = now + self.interval
+            try:
+                self._read(now, force)
+            finally:
+                # Keep the last mark at or before the window: later events may need it
+                at = bisect_right(self._marks, (now - MARK_WINDOW, float("inf")))
+                del self._marks[:max(0, at - 1)]
+
+    def _read(self, now: float, force: bool = False):
+        # Caller holds self._lock
+        if self._fh is None:
+            if now < self._next_open and not force:
+                return
+            self._next_open = now + self.open_retry
+            try:
+                self._fh = open(self.path, "rb")
+            except FileNotFoundError:
+                return
+        chunk = self._fh.read()
+        if not chunk:
+            return
+        data = self._pending + chunk
+        end = data.rfind(b"\n") + 1
+        self._pending = data[end:]
+        offset = self._pos
+        for raw in data[:end].splitlines(keepends=True):
+            try:
+                event = json.loads(raw)
+            except ValueError:
+                event = None
+            if isinstance(event, dict):
+                at = bisect_right(self._marks, (event.get("time") or now, float("inf")))
+                event_line = self._marks[max(0, at - 1)][1]
+                self._offsets.append(offset)
+                self._lines.append(event_line)
+                self._summarize(event, event_line)
+            offset += len(raw)
+        self._pos = offset
+
+    def close(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def _summarize(self, event: dict, line: int):
+        kind = event.get("event")
+        uuid = event.get("task_uuid")
+        if kind == "task_start" and uuid:
+            self._tasks[uuid] = dict(
+                uuid=uuid,
+                task=event.get("task"),
+                action=event.get("action"),
+                path=event.get("path"),
+                handler=event.get("handler", False),
+                start=event.get("time"),
+                end=event.get("time"),
+                line=line,
+                hosts={},
+            )
+        elif kind == "host_result" and uuid in self._tasks:
+            task = self._tasks[uuid]
+            task["hosts"][event.get("host")] = event.get("status")
+            task["end"] = max(task["end"] or 0, event.get("time") or 0)
+
+    def read(self, offset: int = 0, limit: int = 100, kind: str | None = None) -> tuple[list[dict], int]:
+        """Return up to ``limit`` events from index ``offset`` and the next offset.
+
+        When ``kind`` is given only events of that type are returned; the next
+        offset still points just past the last event examined.
+        """
+        with self._lock:
+            total = len(self._offsets)
+        out: list[dict] = []
+        index = max(0, offset)
+        if index >= total:
+            return out, index
+        with open(self.path, "rb") as fh:
+            fh.seek(self._offsets[index])
+            while index < total and len(out) < limit:
+                event = json.loads(fh.readline())
+                if kind is None or event.get("event") == kind:
+                    event["index"] = index
+                    event["line"] = self._lines[index]
+                    out.append(event)
+                index += 1
+        return out, index
+
+    def tasks(self) -> list[dict]:
+        """Task summaries in start order, each with its wall-clock duration."""
+        with self._lock:
+            tasks = [dict(task, hosts=dict(task["hosts"])) for task in self._tasks.values()]
+        for task in tasks:
+            task["duration"] = (task["end"] or 0) - (task["start"] or 0)
+            task["failed"] = any(status in ("failed", "unreachable") for status in task["hosts"].values())
+        return tasks
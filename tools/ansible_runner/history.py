@@ -0,0 +1,235 @@
+"""Persistent, full-text searchable history of finished jobs."""
+
+import logging
+import queue
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+from logstore import iter_segment_bytes, list_segments
+
+logger = logging.getLogger(__name__)
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+# ``status:failed``-style filters accepted in search queries
+QUERY_FILTERS = ("status", "workflow", "playbook", "id")
+QUERY_TOKEN = re.compile(r'(\w+):("[^"]*"|\S+)|"([^"]*)"|(\S+)')
+SNIPPET_SCAN_BYTES = 8 * 1024 * 1024
+SNIPPET_WIDTH = 240
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    rowid INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT UNIQUE NOT NULL,
+    label TEXT,
+    workflow TEXT,
+    playbook TEXT,
+    cmd TEXT,
+    status TEXT,
+    priority TEXT,
+    rc INTEGER,
+    tq REAL,
+    t0 REAL,
+    t1 REAL,
+    lines INTEGER,
+    bytes INTEGER,
+    log_dir TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_t0 ON jobs (t0);
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(label, cmd, log, content='');
+"""
+COLUMNS = ("id", "label", "workflow", "playbook", "cmd", "status", "priority", "rc", "tq", "t0", "t1", "lines", "bytes", "log_dir")
+
+
+def log_size(log_dir: Path) -> int:
+    return sum(size for _, size in list_segments(log_dir))
+
+
+def _read_for_index(log_dir: Path, max_bytes: int) -> str:
+    """Log text to index: all of it, or its head and tail when it is larger than ``max_bytes``."""
+    segments = list_segments(log_dir)
+    total = sum(size for _, size in segments)
+    if total <= max_bytes:
+        data = b"".join(iter_segment_bytes(segments))
+    else:
+        head, tail, half = [], [], max_bytes // 2
+        remaining = half
+        for path, size in segments:
+            if remaining <= 0:
+                break
+            with open(path, "rb") as fh:
+                head.append(fh.read(remaining))
+            remaining -= len(head[-1])
+        remaining = half
+        for path, size in reversed(segments):
+            if remaining <= 0:
+                break
+            with open(path, "rb") as fh:
+                fh.seek(max(0, size - remaining))
+                tail.insert(0, fh.read(remaining))
+            remaining -= len(tail[0])
+        data = b"".join(head) + b"\n" + b"".join(tail)
+    return ANSI_ESCAPE.sub("", data.decode("utf-8", errors="replace"))
+
+
+def parse_query(q: str) -> tuple[str, list[str], dict[str, str]]:
+    """Split a search query into an FTS5 MATCH expression, its terms and column filters.
+
+    Every word or ``"quoted phrase"`` becomes an FTS5 phrase, so input such as
+    IP addresses or file paths never hits FTS5 syntax; a trailing ``*`` keeps
+    prefix matching. Phrases are combined with AND; the plain terms (without
+    quoting or ``*``) are returned alongside for highlighting.
+    """
+    phrases, terms, filters = [], [], {}
+    for key, value, phrase, word in QUERY_TOKEN.findall(q or ""):
+        if key and key.lower() in QUERY_FILTERS:
+            filters[key.lower()] = value.strip('"')
+            continue
+        text = phrase or word or f"{key}:{value}"
+        prefix = text.endswith("*") and not phrase
+        text = text.rstrip("*") if prefix else text
+        if text:
+            phrases.append('"' + text.replace('"', '""') + '"' + ("*" if prefix else ""))
+            terms.append(text)
+    return " AND ".join(phrases), terms, filters
+
+
+def _snippet(log_dir: Path, terms: list[str]) -> str:
+    """First log line mentioning a search term, trimmed around the match."""
+    needles = [term.lower() for term in terms if term]
+    if not needles:
+        return ""
+    scanned = 0
+    for path, _ in list_segments(log_dir):
+        try:
+            fh = open(path, "rb")
+        except OSError:
+            return ""
+        with fh:
+            for raw in fh:
+                scanned += len(raw)
+                line = ANSI_ESCAPE.sub("", raw.decode("utf-8", errors="replace")).rstrip("\n")
+                lowered = line.lower()
+                for needle in needles:
+                    at = lowered.find(needle)
+                    if at >= 0:
+                        start = max(0, at - SNIPPET_WIDTH // 3)
+                        return ("…" if start else "") + line[start:start + SNIPPET_WIDTH]
+                if scanned >= SNIPPET_SCAN_BYTES:
+                    return ""
+    return ""
+
+
+class JobHistory:
+    """SQLite store of finished jobs with an FTS5 index over label, command and log.
+
+    The index is contentless: log text is tokenised but not copied into the
+    database, since the logs already live on disk. Jobs are indexed by a
+    background thread so that a finishing job never waits on SQLite; logs
+    larger than ``max_index_bytes`` are indexed by their head and tail.
+    """
+
+    def __init__(self, path: Path, max_index_bytes: int = 32 * 1024 * 1024):
+        self.path = path
+        self.max_index_bytes = max_index_bytes
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, info: dict, log_dir: Path):
+        """Queue a finished job for indexing."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="history-indexer", daemon=True)
+            self._thread.start()
+        self._queue.put((info, log_dir))
+
+    def _run(self):
+        while True:
+            info, log_dir = self._queue.get()
+            try:
+                self.record(info, log_dir)
+            except (OSError, sqlite3.Error) as exc:
+                logger.warning("History: could not index job %s: %s", info.get("id"), exc)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until every submitted job has been indexed."""
+        self._queue.join()
+
+    def record(self, info: dict, log_dir: Path):
+        if not log_dir.is_dir():
+            return
+        text = _read_for_index(log_dir, self.max_index_bytes)
+        row = dict(info, lines=info.get("n"), bytes=log_size(log_dir), log_dir=str(log_dir))
+        with self._lock, self._db:
+            if self._db.execute("SELECT 1 FROM jobs WHERE id = ?", (info["id"],)).fetchone():
+                return
+            cursor = self._db.execute(
+                f"INSERT INTO jobs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})",
+                [row.get(column) for column in COLUMNS],
+            )
+            self._db.execute(
+                "INSERT INTO jobs_fts (rowid, label, cmd, log) VALUES (?, ?, ?, ?)",
+                (cursor.lastrowid, info.get("label") or "", info.get("cmd") or "", text),
+            )
+
+    def delete(self, jid: str):
+        """Forget a job and remove it from the index; a no-op for unknown jobs.
+
+        A contentless FTS5 row is removed by replaying the text it was indexed
+        with, so this must run while the job's log is still on disk. Should
+        the text differ (say ``max_index_bytes`` changed since), stray tokens
+        stay behind under a rowid that is never reused and never matches a job.
+        """
+        with self._lock, self._db:
+            row = self._db.execute("SELECT rowid, label, cmd, log_dir FROM jobs WHERE id = ?", (jid,)).fetchone()
+            if row is None:
+                return
+            text = _read_for_index(Path(row["log_dir"]), self.max_index_bytes)
+            self._db.execute(
+                "INSERT INTO jobs_fts (jobs_fts, rowid, label, cmd, log) VALUES ('delete', ?, ?, ?, ?)",
+                (row["rowid"], row["label"] or "", row["cmd"] or "", text),
+            )
+            self._db.execute("DELETE FROM jobs WHERE rowid = ?", (row["rowid"],))
+
+    def get(self, jid: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE id = ?", (jid,)).fetchone()
+        return dict(row) if row else None
+
+    def search(self, q: str, offset: int = 0, limit: int = 50, snippets: bool = True) -> tuple[list[dict], int]:
+        """Return one page of matching jobs, newest first, and the total match count.
+
+        Raises ValueError when the query cannot be parsed by FTS5.
+        """
+        match, terms, filters = parse_query(q)
+        where, params = [], []
+        if match:
+            where.append("jobs.rowid IN (SELECT rowid FROM jobs_fts WHERE jobs_fts MATCH ?)")
+            params.append(match)
+        for column, value in filters.items():
+            where.append(f"jobs.{column} = ?")
+            params.append(value)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        try:
+            with self._lock:
+                total = self._db.execute(f"SELECT count(*) FROM jobs {clause}", params).fetchone()[0]
+                rows = self._db.execute(
+                    f"SELECT {', '.join(COLUMNS)} FROM jobs {clause} ORDER BY t0 DESC, rowid DESC LIMIT ? OFFSET ?",
+                    params + [limit, offset],
+                ).fetchall()
+        except sqlite3.OperationalError as exc:
+            raise ValueError(f"Invalid search query: {exc}") from exc
+
+        results = [dict(row) for row in rows]
+        if snippets and match:
+            for result in results:
+                result["snippet"] = _snippet(Path(result["log_dir"]), terms)
+        return results, total
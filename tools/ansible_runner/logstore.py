@@ -0,0 +1,304 @@
+"""Disk-backed, size-bounded storage for job output."""
+
+import itertools
+import logging
+import os
+import shutil
+import threading
+import time
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import Callable, Iterator
+
+DEFAULT_TAIL_LINES = 1000
+DEFAULT_SEGMENT_BYTES = 16 * 1024 * 1024
+DEFAULT_INDEX_STRIDE = 256
+
+logger = logging.getLogger(__name__)
+
+
+def list_segments(directory: Path) -> list[tuple[Path, int]]:
+    """The segment files of a job log on disk, in order, with their sizes."""
+    segments = []
+    for path in sorted(directory.glob("[0-9][0-9][0-9][0-9][0-9].log")):
+        try:
+            segments.append((path, path.stat().st_size))
+        except FileNotFoundError:
+            continue
+    return segments
+
+
+def iter_segment_bytes(
+    segments: list[tuple[Path, int]], start: int = 0, stop: int | None = None, chunk_size: int = 64 * 1024
+) -> Iterator[bytes]:
+    """Yield bytes ``[start, stop)`` of the log made of ``segments``.
+
+    Each segment is read up to the size it is listed with, so bytes appended
+    after the list was taken are not returned.
+    """
+    total = sum(size for _, size in segments)
+    stop = total if stop is None else min(stop, total)
+    segment_start = 0
+    for path, size in segments:
+        segment_stop = segment_start + size
+        if segment_stop > start and segment_start < stop:
+            with open(path, "rb") as fh:
+                fh.seek(max(0, start - segment_start))
+                remaining = min(segment_stop, stop) - max(start, segment_start)
+                while remaining > 0:
+                    chunk = fh.read(min(chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+        segment_start = segment_stop
+
+
+class JobLog:
+    """Append-only line log for a single job, split across segment files.
+
+    Lines are written to ``<directory>/NNNNN.log`` segments as UTF-8. Only a
+    bounded ring buffer of the most recent lines is kept in memory; older lines
+    are read back from disk through a sparse index that records the segment and
+    byte offset of every ``index_stride``-th line.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        tail_lines: int = DEFAULT_TAIL_LINES,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        index_stride: int = DEFAULT_INDEX_STRIDE,
+    ):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._max_segment_bytes = max(1, segment_bytes)
+        self._stride = max(1, index_stride)
+        self._tail: deque[str] = deque(maxlen=max(0, tail_lines))
+        self._count = 0
+        self._bytes = 0
+        self._segment_sizes: list[int] = []
+        self._index_segment = array("I")
+        self._index_offset = array("Q")
+        self._fh = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def size(self) -> int:
+        """Total number of bytes written."""
+        return self._bytes
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.directory / f"{segment:05d}.log"
+
+    def _roll(self):
+        if self._fh is not None:
+            self._fh.close()
+        self._segment_sizes.append(0)
+        self._fh = open(self._segment_path(len(self._segment_sizes) - 1), "wb")
+
+    def append(self, text: str) -> int:
+        """Append output and return the number of lines written.
+
+        ``text`` may hold several lines; every stored line ends with a newline.
+        """
+        parts = text.split("\n")
+        lines = [part + "\n" for part in parts[:-1]]
+        if parts[-1]:
+            lines.append(parts[-1] + "\n")
+        if not lines:
+            return 0
+
+        with self._lock:
+            if self._closed:
+                raise ValueError("job log is closed")
+            for line in lines:
+                data = line.encode("utf-8", errors="replace")
+                if self._fh is None or (
+                    self._segment_sizes[-1]
+                    and self._segment_sizes[-1] + len(data) > self._max_segment_bytes
+                ):
+                    self._roll()
+                if self._count % self._stride == 0:
+                    self._index_segment.append(len(self._segment_sizes) - 1)
+                    self._index_offset.append(self._segment_sizes[-1])
+                self._fh.write(data)
+                self._segment_sizes[-1] += len(data)
+                self._bytes += len(data)
+                self._tail.append(line)
+                self._count += 1
+        return len(lines)
+
+    def close(self):
+        """Flush and close the active segment and release the in-memory tail.
+
+        The directory's mtime is set to the close time, which is what
+        :class:`LogRetention` orders finished logs by.
+        """
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            self._tail.clear()
+            self._closed = True
+        try:
+            os.utime(self.directory)
+        except OSError:
+            pass
+
+    def _iter_disk(self, start: int, stop: int) -> Iterator[str]:
+        slot = start // self._stride
+        segment = self._index_segment[slot]
+        offset = self._index_offset[slot]
+        skip = start - slot * self._stride
+        remaining = stop - start
+        while remaining > 0:
+            with open(self._segment_path(segment), "rb") as fh:
+                fh.seek(offset)
+                for raw in fh:
+                    if skip:
+                        skip -= 1
+                        continue
+                    yield raw.decode("utf-8", errors="replace")
+                    remaining -= 1
+                    if not remaining:
+                        return
+            segment += 1
+            offset = 0
+
+    def iter_lines(self, start: int = 0, stop: int | None = None) -> Iterator[str]:
+        """Yield lines ``[start, stop)`` as they existed when called."""
+        with self._lock:
+            count = self._count
+            stop = count if stop is None else min(stop, count)
+            start = max(0, start)
+            if start >= stop:
+                return iter(())
+            tail_start = count - len(self._tail)
+            if start >= tail_start:
+                return iter(list(itertools.islice(self._tail, start - tail_start, stop - tail_start)))
+            if self._fh is not None:
+                self._fh.flush()
+        return self._iter_disk(start, stop)
+
+    def in_memory(self, start: int) -> bool:
+        """Whether lines from ``start`` onwards are served from the tail buffer."""
+        return start >= self._count - len(self._tail)
+
+    def read(self, start: int = 0, stop: int | None = None) -> list[str]:
+        return list(self.iter_lines(start, stop))
+
+    def tail(self, count: int) -> list[str]:
+        """Return the last ``count`` lines."""
+        return self.read(max(0, self._count - count))
+
+    def iter_bytes(self, start: int = 0, stop: int | None = None, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Yield raw log bytes ``[start, stop)`` of what was written so far."""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+            segments = [(self._segment_path(segment), size) for segment, size in enumerate(self._segment_sizes)]
+        return iter_segment_bytes(segments, start, stop, chunk_size)
+
+
+class LogRetention:
+    """Delete finished job logs beyond the newest ``keep_jobs`` or older than ``keep_seconds``.
+
+    Every subdirectory of ``root`` holds one job's log and is named after the
+    job. Directories for which ``is_active(name)`` is true belong to queued or
+    running jobs and are never removed; the rest are ordered by mtime, which
+    :meth:`JobLog.close` sets to the job's end. Directories modified within the
+    last ``grace_seconds`` are never removed either, since a job creates its
+    log before it is registered as active. ``on_removed(name)`` is called
+    before each directory is deleted. Zero disables a limit.
+
+    Pruning runs on a background thread every ``interval`` seconds and
+    whenever :meth:`wake` is called.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        keep_jobs: int = 0,
+        keep_seconds: float = 0,
+        interval: float = 600,
+        grace_seconds: float = 60,
+        is_active: Callable[[str], bool] = lambda name: False,
+        on_removed: Callable[[str], None] = lambda name: None,
+    ):
+        self.root = root
+        self.keep_jobs = max(0, keep_jobs)
+        self.keep_seconds = max(0.0, keep_seconds)
+        self.interval = interval
+        self.grace_seconds = max(0.0, grace_seconds)
+        self._is_active = is_active
+        self._on_removed = on_removed
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.keep_jobs or self.keep_seconds)
+
+    def wake(self):
+        """Prune soon, starting the background thread on first use."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-retention", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.prune()
+            except OSError as exc:
+                logger.warning("Log retention: could not prune %s: %s", self.root, exc)
+
+    def expired(self) -> list[str]:
+        """Names of the finished logs that are past a limit, oldest first."""
+        try:
+            entries = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return []
+        finished = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False) and not self._is_active(entry.name):
+                    finished.append((entry.stat(follow_symlinks=False).st_mtime, entry.name))
+            except FileNotFoundError:
+                continue
+        finished.sort(reverse=True)
+        now = time.time()
+        cutoff = now - self.keep_seconds if self.keep_seconds else None
+        expired = [
+            name
+            for position, (mtime, name) in enumerate(finished)
+            if mtime < now - self.grace_seconds
+            and ((self.keep_jobs and position >= self.keep_jobs) or (cutoff is not None and mtime < cutoff))
+        ]
+        return expired[::-1]
+
+    def prune(self) -> list[str]:
+        """Delete every expired log directory and return their names."""
+        removed = self.expired()
+        for name in removed:
+            self._on_removed(name)
+            shutil.rmtree(self.root / name, ignore_errors=True)
+        return removed
@@ -0,0 +1,326 @@
+"""Server-side execution of multi-step workflows as dependency graphs."""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable
+
+STEP_ACTIVE_STATUSES = ("queued", "running")
+STEP_FINAL_STATUSES = ("completed", "failed", "cancelled", "skipped", "interrupted")
+PIPELINE_FINAL_STATUSES = ("completed", "failed", "cancelled", "interrupted")
+
+
+class PipelineStep:
+    """One node of a pipeline: a prepared run plus its dependencies."""
+
+    def __init__(self, sid: str, label: str, depends_on: list[str], run: dict, source: dict):
+        self.id = sid
+        self.label = label
+        self.depends_on = depends_on
+        self.run = run
+        self.source = source
+        self.status = "pending"
+        self.job_id: str | None = None
+
+    def to_dict(self) -> dict:
+        return dict(
+            id=self.id,
+            label=self.label,
+            depends_on=self.depends_on,
+            run=self.run,
+            source=self.source,
+            status=self.status,
+            job_id=self.job_id,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PipelineStep":
+        step = cls(data["id"], data["label"], data["depends_on"], data["run"], data.get("source", {}))
+        step.status = data["status"]
+        step.job_id = data.get("job_id")
+        return step
+
+
+class Pipeline:
+    """A DAG of steps; a step starts once all of its dependencies completed.
+
+    ``max_parallel`` caps how many steps are queued or running at once; a
+    fan-out is a pipeline of independent steps with such a cap.
+    """
+
+    def __init__(self, pid: str, label: str, steps: list[PipelineStep], kind: str = "pipeline", max_parallel: int | None = None):
+        self.id = pid
+        self.label = label
+        self.kind = kind
+        self.max_parallel = max_parallel
+        self.steps = {step.id: step for step in steps}
+        self.status = "running"
+        self.t0 = time.time()
+        self.t1: float | None = None
+
+    def info(self) -> dict:
+        return dict(
+            id=self.id,
+            label=self.label,
+            kind=self.kind,
+            max_parallel=self.max_parallel,
+            status=self.status,
+            t0=self.t0,
+            t1=self.t1,
+            progress=dict(Counter(step.status for step in self.steps.values())),
+            steps=[
+                dict(id=step.id, label=step.label, depends_on=step.depends_on, status=step.status, job_id=step.job_id, source=step.source)
+                for step in self.steps.values()
+            ],
+        )
+
+    def to_dict(self) -> dict:
+        return dict(
+            id=self.id,
+            label=self.label,
+            kind=self.kind,
+            max_parallel=self.max_parallel,
+            status=self.status,
+            t0=self.t0,
+            t1=self.t1,
+            steps=[step.to_dict() for step in self.steps.values()],
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Pipeline":
+        pipeline = cls(
+            data["id"],
+            data["label"],
+            [PipelineStep.from_dict(step) for step in data["steps"]],
+            data.get("kind", "pipeline"),
+            data.get("max_parallel"),
+        )
+        pipeline.status = data["status"]
+        pipeline.t0 = data["t0"]
+        pipeline.t1 = data.get("t1")
+        return pipeline
+
+    def ready_steps(self) -> list[PipelineStep]:
+        ready = [
+            step
+            for step in self.steps.values()
+            if step.status == "pending"
+            and all(self.steps[dep].status == "completed" for dep in step.depends_on)
+        ]
+        if self.max_parallel:
+            active = sum(step.status in STEP_ACTIVE_STATUSES for step in self.steps.values())
+            ready = ready[: max(0, self.max_parallel - active)]
+        return ready
+
+    def skip_dependents(self, failed: PipelineStep):
+        """Mark every step that transitively depends on ``failed`` as skipped."""
+        blocked = {failed.id}
+        changed = True
+        while changed:
+            changed = False
+            for step in self.steps.values():
+                if step.status == "pending" and blocked.intersection(step.depends_on):
+                    step.status = "skipped"
+                    blocked.add(step.id)
+                    changed = True
+
+
+def parse_steps(raw_steps: Any, prepare: Callable[[dict], dict]) -> list[PipelineStep]:
+    """Validate a pipeline definition and prepare the run of every step.
+
+    Raises ValueError for malformed steps, unknown dependencies or cycles.
+    """
+    if not isinstance(raw_steps, list) or not raw_steps:
+        raise ValueError("A pipeline needs at least one step")
+
+    steps = []
+    for index, raw in enumerate(raw_steps, start=1):
+        if not isinstance(raw, dict):
+            raise ValueError(f"Step {index} must be an object")
+        sid = str(raw.get("id") or index)
+        depends_on = [str(dep) for dep in raw.get("depends_on") or []]
+        try:
+            run = prepare(raw)
+        except ValueError as exc:
+            raise ValueError(f"Step {sid}: {exc}") from exc
+        source = {key: raw.get(key) for key in ("playbook", "inventory", "vars_file", "workflow")}
+        steps.append(PipelineStep(sid, raw.get("label") or run["label"], depends_on, run, source))
+
+    ids = [step.id for step in steps]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Step ids must be unique")
+    for step in steps:
+        unknown = set(step.depends_on) - set(ids)
+        if unknown:
+            raise ValueError(f"Step {step.id} depends on unknown step(s): {', '.join(sorted(unknown))}")
+
+    # Kahn's algorithm: any step never reaching in-degree zero sits on a cycle
+    indegree = {step.id: len(set(step.depends_on)) for step in steps}
+    dependents: dict[str, list[str]] = {sid: [] for sid in ids}
+    for step in steps:
+        for dep in set(step.depends_on):
+            dependents[dep].append(step.id)
+    frontier = [sid for sid, degree in indegree.items() if degree == 0]
+    seen = 0
+    while frontier:
+        sid = frontier.pop()
+        seen += 1
+        for child in dependents[sid]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                frontier.append(child)
+    if seen != len(steps):
+        raise ValueError("Step dependencies contain a cycle")
+    return steps
+
+
+def fanout_steps(data: dict, prepare: Callable[[dict], dict]) -> list[PipelineStep]:
+    """Build one independent step per cluster for a fan-out run.
+
+    Clusters are given either as ``inventories`` (one inventory per cluster) or
+    as ``limits``: hosts of a single ``inventory``, each run with ``--limit``.
+    Every other field of ``data`` is shared by all steps.
+
+    Raises ValueError for a malformed request or a target that fails to prepare.
+    """
+    inventories = data.get("inventories")
+    limits = data.get("limits")
+    if inventories and limits:
+        raise ValueError("Give either inventories or limits, not both")
+    targets = inventories or limits
+    if not isinstance(targets, list) or not targets:
+        raise ValueError("A fan-out needs a list of inventories or limits")
+    targets = [str(target) for target in targets]
+    if len(set(targets)) != len(targets):
+        raise ValueError("Fan-out targets must be unique")
+
+    key = "inventory" if inventories else "limit"
+    steps = []
+    for index, target in enumerate(targets, start=1):
+        # Steps get their own target, not the fan-out's list of them
+        raw = {name: value for name, value in data.items() if name not in ("inventories", "limits")}
+        raw[key] = target
+        try:
+            run = prepare(raw)
+        except ValueError as exc:
+            raise ValueError(f"{target}: {exc}") from exc
+        label = Path(target).stem if key == "inventory" else target
+        source = {name: raw.get(name) for name in ("playbook", "inventory", "vars_file", "workflow", "limit")}
+        steps.append(PipelineStep(str(index), label, [], run, source))
+    return steps
+
+
+class PipelineEngine:
+    """Runs pipelines by submitting ready steps and advancing on job completion.
+
+    ``submit`` turns a prepared run into a job (anything with ``id`` and
+    ``status``) and ``cancel`` stops one; the owner must call
+    :meth:`job_finished` for every job that ends. State is written to one JSON
+    file per pipeline so that it survives restarts; pipelines that were still
+    running when the runner stopped are loaded as ``interrupted``.
+    """
+
+    def __init__(self, directory: Path, submit: Callable[[dict], Any], cancel: Callable[[Any], None]):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._submit = submit
+        self._cancel = cancel
+        self._pipelines: dict[str, Pipeline] = {}
+        self._by_job: dict[str, tuple[Pipeline, PipelineStep]] = {}
+        self._jobs: dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                pipeline = Pipeline.from_dict(json.loads(path.read_text()))
+            except (OSError, ValueError, KeyError):
+                continue
+            if pipeline.status not in PIPELINE_FINAL_STATUSES:
+                for step in pipeline.steps.values():
+                    if step.status not in STEP_FINAL_STATUSES:
+                        step.status = "interrupted"
+                pipeline.status = "interrupted"
+                pipeline.t1 = pipeline.t1 or time.time()
+                self._save(pipeline)
+            self._pipelines[pipeline.id] = pipeline
+
+    def _save(self, pipeline: Pipeline):
+        path = self.directory / f"{pipeline.id}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(pipeline.to_dict()))
+        os.replace(tmp, path)
+
+    def create(self, label: str, steps: list[PipelineStep], kind: str = "pipeline", max_parallel: int | None = None) -> Pipeline:
+        pipeline = Pipeline(uuid.uuid4().hex[:8], label, steps, kind, max_parallel)
+        with self._lock:
+            self._pipelines[pipeline.id] = pipeline
+            self._advance(pipeline)
+        return pipeline
+
+    def get(self, pid: str) -> Pipeline | None:
+        return self._pipelines.get(pid)
+
+    def summaries(self) -> list[dict]:
+        with self._lock:
+            for pipeline in self._pipelines.values():
+                self.refresh(pipeline)
+            return [pipeline.info() for pipeline in self._pipelines.values()]
+
+    def job_finished(self, job):
+        with self._lock:
+            entry = self._by_job.pop(job.id, None)
+            self._jobs.pop(job.id, None)
+            if entry is None:
+                return
+            pipeline, step = entry
+            step.status = job.status if job.status in STEP_FINAL_STATUSES else "failed"
+            if step.status != "completed":
+                pipeline.skip_dependents(step)
+            self._advance(pipeline)
+
+    def cancel(self, pid: str) -> Pipeline | None:
+        with self._lock:
+            pipeline = self._pipelines.get(pid)
+            if pipeline is None or pipeline.status in PIPELINE_FINAL_STATUSES:
+                return pipeline
+            pipeline.status = "cancelled"
+            for step in pipeline.steps.values():
+                if step.status == "pending":
+                    step.status = "cancelled"
+            running = [self._jobs[step.job_id] for step in pipeline.steps.values() if step.job_id in self._jobs]
+            self._save(pipeline)
+        for job in running:
+            self._cancel(job)
+        return pipeline
+
+    def _advance(self, pipeline: Pipeline):
+        # Caller holds self._lock
+        if pipeline.status == "running":
+            for step in pipeline.ready_steps():
+                run = dict(step.run, label=f"{pipeline.label} › {step.label}")
+                job = self._submit(run)
+                step.job_id = job.id
+                step.status = "queued"
+                self._by_job[job.id] = (pipeline, step)
+                self._jobs[job.id] = job
+
+        if all(step.status in STEP_FINAL_STATUSES for step in pipeline.steps.values()):
+            if pipeline.status == "running":
+                ok = all(step.status == "completed" for step in pipeline.steps.values())
+                pipeline.status = "completed" if ok else "failed"
+            pipeline.t1 = pipeline.t1 or time.time()
+        self._save(pipeline)
+
+    def refresh(self, pipeline: Pipeline):
+        """Copy live job states (queued/running) onto in-flight steps."""
+        with self._lock:
+            for step in pipeline.steps.values():
+                job = self._jobs.get(step.job_id or "")
+                if job is not None and step.status not in STEP_FINAL_STATUSES:
+                    step.status = job.status
@@ -0,0 +1,250 @@
+"""Resource accounting and limits for the process group of each running job."""
+
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+PROC = Path("/proc")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class ResourceLimits:
+    """Per-job ceilings; zero means unlimited."""
+
+    def __init__(self, rss_bytes: int = 0, cpu_seconds: float = 0, wall_seconds: float = 0):
+        self.rss_bytes = rss_bytes
+        self.cpu_seconds = cpu_seconds
+        self.wall_seconds = wall_seconds
+
+    def tightened(self, raw: Any) -> "ResourceLimits":
+        """Combine with per-run limits ``{rss_mb, cpu_seconds, wall_seconds}``.
+
+        A run may lower the configured limits but never raise them.
+        Raises ValueError for anything that is not a non-negative number.
+        """
+        if not raw:
+            return self
+        if not isinstance(raw, dict):
+            raise ValueError("resource_limits must be an object")
+
+        def pick(current: float, key: str, scale: float = 1) -> float:
+            value = raw.get(key)
+            if value in (None, "", 0):
+                return current
+            try:
+                value = float(value) * scale
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid {key} limit") from None
+            if value < 0:
+                raise ValueError(f"Invalid {key} limit")
+            return min(current, value) if current else value
+
+        return ResourceLimits(
+            int(pick(self.rss_bytes, "rss_mb", 1024 * 1024)),
+            pick(self.cpu_seconds, "cpu_seconds"),
+            pick(self.wall_seconds, "wall_seconds"),
+        )
+
+    def to_dict(self) -> dict:
+        return dict(rss_bytes=self.rss_bytes, cpu_seconds=self.cpu_seconds, wall_seconds=self.wall_seconds)
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "ResourceLimits":
+        data = data or {}
+        return cls(data.get("rss_bytes", 0), data.get("cpu_seconds", 0), data.get("wall_seconds", 0))
+
+
+class ResourceUsage:
+    """Usage of one job's process group, sampled while it runs.
+
+    CPU time includes children that were already reaped (through their
+    parents' ``cutime``/``cstime``); I/O counters are kept per process so that
+    workers which have exited still count.
+    """
+
+    def __init__(self):
+        self.cpu_seconds = 0.0
+        self.rss_bytes = 0
+        self.max_rss_bytes = 0
+        self.read_bytes = 0
+        self.write_bytes = 0
+        self.processes = 0
+        self.max_processes = 0
+        self._io: dict[int, tuple[int, int]] = {}
+
+    def update(self, processes: list[dict]):
+        self.processes = len(processes)
+        self.max_processes = max(self.max_processes, self.processes)
+        self.rss_bytes = sum(proc["rss"] for proc in processes)
+        self.max_rss_bytes = max(self.max_rss_bytes, self.rss_bytes)
+        self.cpu_seconds = max(self.cpu_seconds, sum(proc["cpu"] for proc in processes))
+        for proc in processes:
+            if proc["io"] is not None:
+                self._io[proc["pid"]] = proc["io"]
+        self.read_bytes = sum(io[0] for io in self._io.values())
+        self.write_bytes = sum(io[1] for io in self._io.values())
+
+    def finish(self, rusage):
+        """Fold in ``os.wait4`` usage of the group leader once it has been reaped."""
+        self.cpu_seconds = max(self.cpu_seconds, rusage.ru_utime + rusage.ru_stime)
+        # ru_maxrss is the peak of the largest single process, in kilobytes
+        self.max_rss_bytes = max(self.max_rss_bytes, rusage.ru_maxrss * 1024)
+        self.rss_bytes = 0
+        self.processes = 0
+
+    def to_dict(self) -> dict:
+        return dict(
+            cpu_seconds=round(self.cpu_seconds, 2),
+            rss_bytes=self.rss_bytes,
+            max_rss_bytes=self.max_rss_bytes,
+            read_bytes=self.read_bytes,
+            write_bytes=self.write_bytes,
+            processes=self.processes,
+            max_processes=self.max_processes,
+        )
+
+
+def session_processes(sid: int) -> list[dict]:
+    """Live processes of session ``sid`` with CPU seconds, RSS and I/O bytes."""
+    out = []
+    try:
+        entries = os.listdir(PROC)
+    except OSError:
+        return out
+    for name in entries:
+        if not name.isdigit():
+            continue
+        try:
+            stat = (PROC / name / "stat").read_bytes()
+        except OSError:
+            continue
+        # Fields after the parenthesised command name, which may contain spaces
+        fields = stat[stat.rfind(b")") + 2:].split()
+        if int(fields[3]) != sid:
+            continue
+        cpu_ticks = sum(int(value) for value in fields[11:15])
+        io = None
+        try:
+            counters = dict(
+                line.split(": ")
+                for line in (PROC / name / "io").read_text().splitlines()
+                if ": " in line
+            )
+            io = (int(counters.get("read_bytes", 0)), int(counters.get("write_bytes", 0)))
+        except (OSError, ValueError):
+            pass
+        out.append(dict(pid=int(name), cpu=cpu_ticks / CLOCK_TICKS, rss=int(fields[21]) * PAGE_SIZE, io=io))
+    return out
+
+
+class ResourceMonitor:
+    """Sample watched jobs on one background thread and enforce their limits.
+
+    A watched job needs ``proc`` (the session leader started with a new
+    session), ``t0``, ``usage``, ``limits`` and ``finished``. When a limit is
+    exceeded the whole process group gets SIGTERM, then SIGKILL after
+    ``grace`` seconds, and ``on_exceeded(job, message)`` is called once.
+    Limits are not enforced on jobs that have already finished.
+    """
+
+    def __init__(self, interval: float = 1.0, grace: float = 10.0, on_exceeded=None):
+        self.interval = interval
+        self.grace = grace
+        self.available = (PROC / "self" / "stat").exists()
+        self._on_exceeded = on_exceeded
+        self._jobs: dict[str, Any] = {}
+        self._terminated: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._sampling = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def unenforced(self, limits: ResourceLimits) -> list[str]:
+        """Names of the limits in ``limits`` that cannot be enforced on this system.
+
+        Memory and CPU time are sampled from ``/proc``; without it (macOS, for
+        one) only the wall-clock limit is enforced.
+        """
+        if self.available:
+            return []
+        return [name for name, value in (("memory", limits.rss_bytes), ("CPU time", limits.cpu_seconds)) if value]
+
+    def watch(self, job):
+        with self._lock:
+            self._jobs[job.id] = job
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="resource-monitor", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def unwatch(self, job):
+        with self._lock:
+            self._jobs.pop(job.id, None)
+            self._terminated.pop(job.id, None)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            with self._lock:
+                jobs = list(self._jobs.values())
+            for job in jobs:
+                if job.finished:
+                    continue
+                try:
+                    self.sample(job)
+                except Exception as exc:
+                    # One failing job must not stop the monitor for every other job
+                    print(f"  Resource monitor: could not sample job {job.id}: {exc}", file=sys.stderr)
+
+    def sample(self, job):
+        if job.proc is None:
+            return
+        with self._sampling:
+            self._sample(job)
+
+    def _sample(self, job):
+        if self.available:
+            job.usage.update(session_processes(job.proc.pid))
+
+        now = time.monotonic()
+        killed_at = self._terminated.get(job.id)
+        if killed_at is not None:
+            if now - killed_at >= self.grace:
+                self._signal(job, signal.SIGKILL)
+            return
+
+        # The job may have finished while it was being sampled
+        if job.finished:
+            return
+        message = self._exceeded(job)
+        if message:
+            self._terminated[job.id] = now
+            try:
+                if self._on_exceeded is not None:
+                    self._on_exceeded(job, message)
+            finally:
+                self._signal(job, signal.SIGTERM)
+
+    @staticmethod
+    def _exceeded(job) -> str | None:
+        limits, usage = job.limits, job.usage
+        if limits.rss_bytes and usage.rss_bytes > limits.rss_bytes:
+            return f"memory limit exceeded ({usage.rss_bytes // 2**20} MiB > {limits.rss_bytes // 2**20} MiB)"
+        if limits.cpu_seconds and usage.cpu_seconds > limits.cpu_seconds:
+            return f"CPU time limit exceeded ({usage.cpu_seconds:.1f}s > {limits.cpu_seconds:g}s)"
+        if limits.wall_seconds and job.t0 and time.time() - job.t0 > limits.wall_seconds:
+            return f"wall-time limit exceeded ({limits.wall_seconds:g}s)"
+        return None
+
+    @staticmethod
+    def _signal(job, signum: int):
+        try:
+            os.killpg(job.proc.pid, signum)
+        except (ProcessLookupError, PermissionError):
+            pass
@@ -0,0 +1,165 @@
+"""Bounded job scheduler for the Ansible Workflow Runner."""
+
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable
+
+import yaml
+
+# Lower value wins; jobs in the same class run in submission order
+PRIORITIES = {"interactive": 0, "batch": 1}
+ENV_LOOKUP = re.compile(r"""lookup\(\s*['"](?:ansible\.builtin\.)?env['"]\s*,\s*['"](\w+)['"]\s*\)""")
+
+
+def _resolve_host_value(value: Any) -> str | None:
+    if not isinstance(value, str) or not value.strip():
+        return None
+    if "{{" not in value:
+        return value.strip()
+    match = ENV_LOOKUP.search(value)
+    if match and os.environ.get(match.group(1)):
+        return os.environ[match.group(1)]
+    return None
+
+
+def _walk_inventory_hosts(group: Any, inherited: dict, found: dict[str, str | None]):
+    if not isinstance(group, dict):
+        return
+    group_vars = {**inherited, **(group.get("vars") or {})}
+    for name, host_vars in (group.get("hosts") or {}).items():
+        merged = {**group_vars, **(host_vars or {})}
+        found[name] = _resolve_host_value(merged.get("catalyst_center_host")) or found.get(name)
+    for child in (group.get("children") or {}).values():
+        _walk_inventory_hosts(child, group_vars, found)
+
+
+@lru_cache(maxsize=128)
+def _inventory_host_keys(path: str, _mtime: float) -> dict[str, str]:
+    try:
+        with open(path) as fh:
+            data = yaml.safe_load(fh)
+    except (OSError, yaml.YAMLError):
+        data = None
+    if not isinstance(data, dict):
+        return {}
+
+    found: dict[str, str | None] = {}
+    for group in data.values():
+        _walk_inventory_hosts(group, {}, found)
+    return {name: address or f"{path}::{name}" for name, address in found.items()}
+
+
+def inventory_hosts(path: Path, limit: str | None = None) -> tuple[str, ...]:
+    """Return the Catalyst Center hosts a YAML inventory targets.
+
+    Each host is keyed by its ``catalyst_center_host`` address (resolving
+    ``lookup('env', ...)`` templates from the runner environment) or, when that
+    cannot be determined, by inventory path and host name. Non-YAML inventories
+    are treated as a single host. A ``limit`` of plain host names (as passed to
+    ``--limit``) narrows the result; any other pattern keeps every host.
+    """
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return (str(path),)
+    keys = _inventory_host_keys(str(path), mtime)
+    if limit:
+        names = [name for name in re.split(r"[,:]", limit) if name]
+        if names and all(name in keys for name in names):
+            return tuple(sorted({keys[name] for name in names}))
+    return tuple(sorted(set(keys.values()))) or (str(path),)
+
+
+@dataclass(order=True)
+class _Entry:
+    priority: int
+    seq: int
+    job: Any = field(compare=False)
+    hosts: tuple[str, ...] = field(compare=False)
+
+
+class Scheduler:
+    """Admit queued jobs under a global cap and per-Catalyst-Center caps.
+
+    Jobs are started through ``launch`` when a slot frees up and must be handed
+    back with :meth:`release` once they finish. A job whose hosts are all busy
+    does not block lower-priority jobs that target other hosts.
+    """
+
+    def __init__(self, launch: Callable[[Any], None], *, max_running: int, max_per_host: int):
+        self._launch = launch
+        self.max_running = max(1, max_running)
+        self.max_per_host = max(1, max_per_host)
+        self._queue: list[_Entry] = []
+        self._running: dict[str, tuple[str, ...]] = {}
+        self._host_load: Counter[str] = Counter()
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def submit(self, job, *, priority: str = "interactive", hosts: tuple[str, ...] = ()):
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority class: {priority}")
+        with self._lock:
+            self._seq += 1
+            self._queue.append(_Entry(PRIORITIES[priority], self._seq, job, hosts))
+            self._queue.sort()
+        self._dispatch()
+
+    def release(self, job):
+        """Return the slots held by a finished job and start whatever fits."""
+        with self._lock:
+            hosts = self._running.pop(job.id, None)
+            if hosts is not None:
+                self._host_load -= Counter(hosts)
+        self._dispatch()
+
+    def cancel(self, job) -> bool:
+        """Drop a job that has not started yet. Returns False if it is not queued."""
+        with self._lock:
+            for entry in self._queue:
+                if entry.job is job:
+                    self._queue.remove(entry)
+                    return True
+        return False
+
+    def position(self, job) -> int | None:
+        """1-based position of a queued job, or None if it is not queued."""
+        with self._lock:
+            for index, entry in enumerate(self._queue, start=1):
+                if entry.job is job:
+                    return index
+        return None
+
+    def snapshot(self) -> dict:
+        priority_names = {value: name for name, value in PRIORITIES.items()}
+        with self._lock:
+            return dict(
+                max_running=self.max_running,
+                max_per_host=self.max_per_host,
+                running=sorted(self._running),
+                host_load=dict(self._host_load),
+                queued=[
+                    dict(id=entry.job.id, position=index, priority=priority_names[entry.priority], hosts=list(entry.hosts))
+                    for index, entry in enumerate(self._queue, start=1)
+                ],
+            )
+
+    def _dispatch(self):
+        ready = []
+        with self._lock:
+            for entry in list(self._queue):
+                if len(self._running) >= self.max_running:
+                    break
+                if any(self._host_load[host] >= self.max_per_host for host in entry.hosts):
+                    continue
+                self._queue.remove(entry)
+                self._running[entry.job.id] = entry.hosts
+                self._host_load.update(entry.hosts)
+                ready.append(entry.job)
+        for job in ready:
+            self._launch(job)
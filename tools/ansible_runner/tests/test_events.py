@@ -0,0 +1,50 @@
+"""Tests for the per-task event index of runner jobs."""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from events import JobEvents  # noqa: E402
+
+
+def _write_events(path: Path, *events: dict):
+    with open(path, "a") as fh:
+        for event in events:
+            fh.write(json.dumps(event) + "\n")
+
+
+def test_forced_poll_reads_events_of_a_job_that_finished_immediately(tmp_path):
+    path = tmp_path / "events.jsonl"
+    events = JobEvents(path, open_retry=60)
+    # The first line of output arrives before the callback has created the file
+    events.poll(1)
+
+    now = time.time()
+    _write_events(
+        path,
+        dict(event="task_start", task="Gather facts", task_uuid="t1", time=now),
+        dict(event="host_result", task_uuid="t1", host="cc1", status="ok", time=now),
+    )
+    # The job exits well within open_retry; its final poll must still open the file
+    events.poll(2, force=True)
+    events.close()
+
+    assert len(events) == 2
+    read, next_offset = events.read()
+    assert [event["event"] for event in read] == ["task_start", "host_result"]
+    assert next_offset == 2
+    assert [(task["task"], task["hosts"]) for task in events.tasks()] == [("Gather facts", {"cc1": "ok"})]
+
+
+def test_unforced_poll_waits_for_open_retry(tmp_path):
+    path = tmp_path / "events.jsonl"
+    events = JobEvents(path, open_retry=60, interval=0)
+    events.poll(0)
+    _write_events(path, dict(event="task_start", task="Ping", task_uuid="t1", time=time.time()))
+
+    events.poll(1)
+
+    assert len(events) == 0
@@ -0,0 +1,128 @@
+"""Sequenced job lifecycle events for the runner's live-updates channel."""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Callable
+
+DEFAULT_BACKLOG = 10000
+DEFAULT_LINES_INTERVAL = 0.5
+
+
+class UpdateFeed:
+    """Ordered log of job lifecycle events that many subscribers can follow.
+
+    Every event carries a sequence number ``seq``; a subscriber remembers the
+    last one it saw and reads what came after it. Only the most recent
+    ``backlog`` events are kept, so a subscriber that falls further behind (or
+    reconnects after a long gap) is told to start over from a snapshot.
+
+    Event kinds (``t``): ``created`` and ``finished`` carry the job summary,
+    ``status`` the new status with ``rc``/``t0``/``t1``, and ``lines`` the
+    current line count ``n`` of a running job. Line counts are not published
+    from the output path: :meth:`flush_lines` compares the logs of running
+    jobs at most every ``lines_interval`` seconds and is driven by the
+    subscribers themselves, so a runner nobody watches does no extra work.
+    """
+
+    def __init__(
+        self,
+        summary: Callable[[Any], dict],
+        backlog: int = DEFAULT_BACKLOG,
+        lines_interval: float = DEFAULT_LINES_INTERVAL,
+    ):
+        self.lines_interval = lines_interval
+        self._summary = summary
+        self._events: deque[dict] = deque(maxlen=max(1, backlog))
+        self._seq = 0
+        self._running: dict[str, Any] = {}
+        self._counts: dict[str, int] = {}
+        self._flushed = 0.0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._async_waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    @property
+    def busy(self) -> bool:
+        """Whether any job is running, i.e. line counts may still change."""
+        return bool(self._running)
+
+    def _publish(self, event: dict):
+        # Caller holds self._changed. Async waiters are one-shot and re-register.
+        self._seq += 1
+        event["seq"] = self._seq
+        self._events.append(event)
+        self._changed.notify_all()
+        waiters, self._async_waiters = self._async_waiters, set()
+        for loop, ready in waiters:
+            loop.call_soon_threadsafe(ready.set)
+
+    def created(self, job):
+        summary = self._summary(job)
+        with self._changed:
+            self._publish(dict(t="created", id=job.id, job=summary))
+
+    def status(self, job):
+        with self._changed:
+            if job.status == "running":
+                self._running[job.id] = job
+                self._counts[job.id] = len(job.log)
+            self._publish(dict(t="status", id=job.id, s=job.status, rc=job.rc, t0=job.t0, t1=job.t1))
+
+    def finished(self, job):
+        summary = self._summary(job)
+        with self._changed:
+            self._running.pop(job.id, None)
+            self._counts.pop(job.id, None)
+            self._publish(dict(t="finished", id=job.id, job=summary))
+
+    def flush_lines(self):
+        """Publish a ``lines`` event for each running job whose log grew."""
+        now = time.monotonic()
+        with self._changed:
+            if now - self._flushed < self.lines_interval:
+                return
+            self._flushed = now
+            for jid, job in self._running.items():
+                count = len(job.log)
+                if count != self._counts.get(jid):
+                    self._counts[jid] = count
+                    self._publish(dict(t="lines", id=jid, n=count))
+
+    def read(self, since: int) -> list[dict] | None:
+        """Events after ``since``, or None when the subscriber must start from a snapshot."""
+        with self._lock:
+            if since == self._seq:
+                return []
+            # Positions ahead of the feed come from before a runner restart
+            if since > self._seq:
+                return None
+            if not self._events or self._events[0]["seq"] > since + 1:
+                return None
+            return [event for event in self._events if event["seq"] > since]
+
+    def wait(self, since: int, timeout: float | None = None) -> bool:
+        """Block until an event after ``since`` exists."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self._seq > since, timeout)
+
+    async def wait_async(self, since: int, timeout: float | None = None) -> bool:
+        """Event-loop counterpart of :meth:`wait`."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._changed:
+            if self._seq > since:
+                return True
+            self._async_waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._changed:
+                self._async_waiters.discard(waiter)
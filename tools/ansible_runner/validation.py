@@ -0,0 +1,99 @@
+"""Cached yamale validation for the runner's /api/validate endpoint."""
+
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# schema_compiler lives next to the runner in tools/
+TOOLS_DIR = Path(__file__).resolve().parent.parent
+if str(TOOLS_DIR) not in sys.path:
+    sys.path.append(str(TOOLS_DIR))
+
+try:
+    import yamale
+    from yamale import YamaleError
+
+    import schema_compiler
+except ImportError:  # reported by the endpoint instead of at startup
+    yamale = None
+    YamaleError = None
+    schema_compiler = None
+
+
+class _LRU:
+    def __init__(self, size: int):
+        self.size = size
+        self._items: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+def _file_stamp(path: Path) -> tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ValidationCache:
+    """Validate vars files against yamale schemas, reusing previous work.
+
+    Schemas are compiled to Python by schema_compiler (``engine="compiled"``)
+    or parsed by yamale (``engine="yamale"``) and cached per schema path and
+    mtime/size; compiled schemas are also kept on disk under ``cache_dir``.
+    Results are cached per schema version and SHA-256 of the vars content, so
+    re-validating an unchanged file skips both YAML parsing and validation.
+    """
+
+    def __init__(self, max_schemas: int = 64, max_results: int = 256, engine: str = "compiled",
+                 cache_dir: Path | None = None):
+        self.engine = engine
+        self.cache_dir = cache_dir
+        self._schemas = _LRU(max_schemas)
+        self._results = _LRU(max_results)
+
+    @property
+    def available(self) -> bool:
+        return yamale is not None
+
+    def schema(self, schema_path: Path):
+        key = (str(schema_path), _file_stamp(schema_path))
+        schema = self._schemas.get(key)
+        if schema is None:
+            schema = schema_compiler.make_schema(schema_path, self.engine, self.cache_dir)
+            self._schemas.put(key, schema)
+        return schema, key
+
+    def validate(self, schema_path: Path, vars_path: Path) -> list[list[str]]:
+        """Return the errors of every failing document; empty when valid.
+
+        YAML parse errors and other unexpected failures propagate.
+        """
+        schema, schema_key = self.schema(schema_path)
+        content = vars_path.read_bytes()
+        key = (schema_key, hashlib.sha256(content).hexdigest())
+        failures = self._results.get(key)
+        if failures is not None:
+            return failures
+
+        payload = yamale.make_data(content=content.decode("utf-8"))
+        try:
+            yamale.validate(schema, payload)
+            failures = []
+        except YamaleError as exc:
+            failures = [list(result.errors) for result in exc.results if not result.isValid()]
+        self._results.put(key, failures)
+        return failures
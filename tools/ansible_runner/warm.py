@@ -0,0 +1,152 @@
+"""Pool of pre-started ansible-playbook workers that skip interpreter and import cost."""
+
+import json
+import shutil
+import subprocess
+import sys
+import threading
+from collections import deque
+from pathlib import Path
+
+WORKER = Path(__file__).resolve().parent / "warm_worker.py"
+EXIT_UNAVAILABLE = 3
+# Environment variables that must match between a worker and a job, because
+# ansible reads its configuration when it is imported
+_CONFIG_PREFIXES = ("ANSIBLE_", "PYTHON")
+
+
+def ansible_python() -> str:
+    """Interpreter that runs ``ansible-playbook``, from its shebang line."""
+    path = shutil.which("ansible-playbook")
+    if path:
+        try:
+            with open(path, "rb") as fh:
+                first = fh.readline().decode(errors="replace").strip()
+        except OSError:
+            first = ""
+        if first.startswith("#!"):
+            parts = first[2:].split()
+            if parts and Path(parts[0]).name == "env" and len(parts) > 1:
+                return shutil.which(parts[1]) or sys.executable
+            if parts:
+                return parts[0]
+    return sys.executable
+
+
+def _config_env(env: dict[str, str]) -> dict[str, str]:
+    return {key: value for key, value in env.items() if key.startswith(_CONFIG_PREFIXES)}
+
+
+class WarmPool:
+    """Keep ``size`` idle workers with ansible already imported.
+
+    :meth:`take` hands out a worker for an ``ansible-playbook`` invocation and
+    returns its ``Popen``: stdout carries the job output, the worker leads its
+    own session and exits with the playbook's return code, exactly like a cold
+    ``ansible-playbook`` child. A replacement is started in the background.
+    Jobs whose working directory or ansible configuration differ from the
+    pool's fall back to a cold start (``take`` returns None), as does
+    everything once a worker finds that ansible cannot be imported.
+    """
+
+    def __init__(self, size: int, cwd: str, env: dict[str, str], python: str | None = None, imports: str = ""):
+        self.size = max(0, size)
+        self.cwd = cwd
+        self.python = python or ansible_python()
+        self.env = dict(env, RUNNER_WARM_IMPORTS=imports)
+        self.disabled_reason: str | None = None
+        self._idle: deque[subprocess.Popen] = deque()
+        self._filling = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0 and self.disabled_reason is None
+
+    def start(self):
+        """Top the pool up to ``size`` idle workers in the background."""
+        with self._lock:
+            if not self.enabled or self._filling:
+                return
+            self._filling = True
+        threading.Thread(target=self._fill, name="warm-pool", daemon=True).start()
+
+    def _spawn(self) -> subprocess.Popen:
+        return subprocess.Popen(
+            [self.python, str(WORKER)],
+            cwd=self.cwd,
+            env=self.env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            start_new_session=True,
+        )
+
+    def _fill(self):
+        while True:
+            with self._lock:
+                if not self.enabled or len(self._idle) >= self.size:
+                    self._filling = False
+                    return
+            try:
+                proc = self._spawn()
+            except OSError as exc:
+                with self._lock:
+                    self._filling = False
+                self._disable(f"cannot start {self.python}: {exc}")
+                return
+            with self._lock:
+                self._idle.append(proc)
+
+    def _disable(self, reason: str):
+        with self._lock:
+            if self.disabled_reason is None:
+                self.disabled_reason = reason
+                print(f"  Warm workers disabled: {reason}", file=sys.stderr)
+
+    def take(self, argv: list[str], cwd: str, env: dict[str, str]) -> subprocess.Popen | None:
+        """Start ``argv`` on an idle worker, or return None to cold-start it."""
+        if not self.enabled or not argv or Path(argv[0]).name != "ansible-playbook":
+            return None
+        if cwd != self.cwd or _config_env(env) != _config_env(self.env):
+            return None
+
+        proc = None
+        unavailable = False
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.popleft()
+                if candidate.poll() is None:
+                    proc = candidate
+                    break
+                unavailable = unavailable or candidate.returncode == EXIT_UNAVAILABLE
+        if unavailable:
+            self._disable(f"ansible is not importable by {self.python}")
+        if proc is None:
+            self.start()
+            return None
+
+        try:
+            proc.stdin.write(json.dumps(dict(argv=argv, cwd=cwd, env=env)) + "\n")
+            proc.stdin.close()
+        except OSError:
+            proc.kill()
+            proc.wait()
+            self.start()
+            return None
+        self.start()
+        return proc
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+            self.size = 0
+        for proc in idle:
+            proc.kill()
+            proc.wait()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(size=self.size, idle=len(self._idle), python=self.python, disabled=self.disabled_reason)
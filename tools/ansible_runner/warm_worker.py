@@ -0,0 +1,62 @@
+"""Pre-imported ``ansible-playbook`` process for the runner's warm-worker pool.
+
+Started by :class:`warm.WarmPool` with the interpreter that runs
+``ansible-playbook``. It imports ansible and the modules listed in
+``RUNNER_WARM_IMPORTS`` up front, then blocks until the runner writes one JSON
+request (``argv``, ``cwd``, ``env``) to stdin and runs that playbook in-process.
+Each worker runs a single job: ansible keeps process-wide state (CLI arguments,
+plugin loader caches) that must not leak between runs.
+"""
+
+import importlib
+import json
+import os
+import sys
+
+# Exit code telling the pool that ansible cannot be imported by this interpreter
+EXIT_UNAVAILABLE = 3
+
+
+def _preload(names: list[str]):
+    # Keep import-time warnings out of the job output
+    saved = os.dup(2)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 2)
+    try:
+        for name in names:
+            try:
+                importlib.import_module(name)
+            except Exception:
+                pass
+    finally:
+        os.dup2(saved, 2)
+        os.close(saved)
+        os.close(devnull)
+
+
+def main() -> int:
+    try:
+        from ansible.cli.playbook import PlaybookCLI
+    except ImportError:
+        return EXIT_UNAVAILABLE
+    _preload([name.strip() for name in os.environ.get("RUNNER_WARM_IMPORTS", "").split(",") if name.strip()])
+
+    line = sys.stdin.readline()
+    if not line:
+        return 0
+    request = json.loads(line)
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+    sys.argv = list(request["argv"])
+    # Exits the process with the playbook's return code
+    PlaybookCLI.cli_executor(sys.argv)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,27 +3,248 @@
 Comprehensive Schema Validation Tool for DNAC Ansible Workflows
 
 This tool validates all workflow variable files against their corresponding schema files
-using yamale for YAML schema validation.
+using yamale for YAML schema validation. Which schema validates which vars file comes
+from the schema index (see schema_index.py); workflows missing from it are matched by
+file name and reported. Schemas are compiled to Python by schema_compiler.py unless
+--engine yamale asks for yamale's own validator. With --stream, vars files are
+validated while they are parsed (see stream_validation.py).
 """
 
 import os
 import sys
 import argparse
 import glob
+import hashlib
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 import yamale
 from yamale import YamaleError
 import yaml
-from typing import List, Tuple, Dict
+from typing import Iterable, Iterator, List, Optional, Tuple, Dict, Union
 import json
+from schema_index import SchemaIndex
+import schema_compiler
+import stream_validation
+
+# Statuses produced by an actual schema/vars validation (warnings are not counted)
+VALIDATION_STATUSES = ('success', 'failed', 'error')
+
+DEFAULT_CACHE_FILE = ".validation_cache.sqlite"
+# Part of every cache key: results from another yamale release (or another
+# result format of this tool) are never reused
+CACHE_ENGINE = f"yamale-{yamale.__version__}/1"
+# Only outcomes decided by the file contents are cached; 'error' also covers
+# missing files and unexpected exceptions
+CACHEABLE_STATUSES = ('success', 'failed')
+
+
+def cache_engine(engine: str = schema_compiler.DEFAULT_ENGINE, stream_max_errors: Optional[int] = None) -> str:
+    """Engine column of cached results validated by ``engine``, streaming when ``stream_max_errors`` is set."""
+    name = CACHE_ENGINE
+    if engine == "compiled":
+        name = f"compiled-{schema_compiler.COMPILER_VERSION}+{name}"
+    if stream_max_errors is not None:
+        # Streamed results list at most this many errors per document
+        name = f"stream-{stream_max_errors}+{name}"
+    return name
+
+
+class ValidationCache:
+    """Persistent results of earlier validations, keyed by content hashes.
+
+    One row per schema-vars pair holds the SHA-256 of both files and the
+    validation engine that produced the result. A stored result is reused
+    only while all three still match, so editing either file (or upgrading
+    yamale) revalidates just the affected pairs.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_FILE, engine: str = cache_engine()):
+        self.path = path
+        self.engine = engine
+        self.hits = 0
+        self._hashes: Dict[Path, Optional[str]] = {}
+        self._db = sqlite3.connect(path)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS validations (
+                schema_path TEXT NOT NULL,
+                vars_path TEXT NOT NULL,
+                schema_hash TEXT NOT NULL,
+                vars_hash TEXT NOT NULL,
+                engine TEXT NOT NULL,
+                result TEXT NOT NULL,
+                checked_at REAL NOT NULL,
+                PRIMARY KEY (schema_path, vars_path)
+            )""")
+
+    def file_hash(self, path: Path) -> Optional[str]:
+        """SHA-256 of a file's contents, or None when it cannot be read; computed once per run."""
+        if path not in self._hashes:
+            try:
+                self._hashes[path] = hashlib.sha256(path.read_bytes()).hexdigest()
+            except OSError:
+                self._hashes[path] = None
+        return self._hashes[path]
+
+    def key(self, schema_file: Path, vars_file: Path) -> Optional[Tuple[str, str, str, str]]:
+        schema_hash = self.file_hash(schema_file)
+        vars_hash = self.file_hash(vars_file)
+        if schema_hash is None or vars_hash is None:
+            return None
+        return str(schema_file), str(vars_file), schema_hash, vars_hash
+
+    def get(self, schema_file: Path, vars_file: Path) -> Optional[Dict]:
+        key = self.key(schema_file, vars_file)
+        if key is None:
+            return None
+        row = self._db.execute(
+            "SELECT result FROM validations WHERE schema_path = ? AND vars_path = ?"
+            " AND schema_hash = ? AND vars_hash = ? AND engine = ?",
+            (*key, self.engine),
+        ).fetchone()
+        if row is None:
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, schema_file: Path, vars_file: Path, result: Dict) -> None:
+        key = self.key(schema_file, vars_file)
+        if key is None or result['status'] not in CACHEABLE_STATUSES:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO validations VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (*key, self.engine, json.dumps(result), time.time()),
+        )
+
+    def prune(self) -> int:
+        """Drop entries whose files are gone or changed, or that another engine produced."""
+        stale = []
+        for schema_path, vars_path, schema_hash, vars_hash, engine in self._db.execute(
+            "SELECT schema_path, vars_path, schema_hash, vars_hash, engine FROM validations"
+        ).fetchall():
+            if (engine != self.engine
+                    or self.file_hash(Path(schema_path)) != schema_hash
+                    or self.file_hash(Path(vars_path)) != vars_hash):
+                stale.append((schema_path, vars_path))
+        self._db.executemany("DELETE FROM validations WHERE schema_path = ? AND vars_path = ?", stale)
+        self._db.commit()
+        return len(stale)
+
+    def close(self) -> None:
+        self._db.commit()
+        self._db.close()
+
+
+def validate_pair(schema_file: Path, vars_file: Path, engine: str = schema_compiler.DEFAULT_ENGINE,
+                  schema_cache_dir: Optional[str] = schema_compiler.DEFAULT_CACHE_DIR,
+                  stream_max_errors: Optional[int] = None) -> Dict:
+    """Validate a single vars file against a schema file.
+
+    With ``stream_max_errors`` the vars file is validated while it is parsed,
+    and only that many errors are listed per document.
+
+    Has no side effects beyond the compiled schema cache, so it can run in a
+    worker process; the result is a plain dict that pickles back to the parent.
+    """
+    result = {
+        'workflow': schema_file.parent.parent.name,
+        'schema_file': schema_file.name,
+        'vars_file': vars_file.name,
+        'status': 'unknown',
+        'errors': [],
+        'warnings': []
+    }
+
+    try:
+        if stream_max_errors is not None:
+            results = stream_validation.validate_path(schema_file, vars_file, engine, schema_cache_dir,
+                                                      stream_max_errors)
+            if not all(validation.isValid() for validation in results):
+                raise YamaleError(results)
+        else:
+            # Load schema
+            schema = schema_compiler.make_schema(schema_file, engine, schema_cache_dir)
+
+            # Load data
+            data = yamale.make_data(str(vars_file))
+
+            # Validate
+            yamale.validate(schema, data)
+
+        result['status'] = 'success'
+
+    except YamaleError as e:
+        # yamale reports unexpected keys in set order, which changes between
+        # runs; sort them so reports from any worker compare equal
+        for validation in e.results:
+            validation.errors.sort()
+        result['status'] = 'failed'
+        result['errors'] = ["\n".join(str(validation) for validation in e.results if not validation.isValid())]
+
+    except FileNotFoundError as e:
+        result['status'] = 'error'
+        result['errors'] = [f"File not found: {e}"]
+
+    except yaml.YAMLError as e:
+        result['status'] = 'error'
+        result['errors'] = [f"YAML parsing error: {e}"]
+
+    except Exception as e:
+        result['status'] = 'error'
+        result['errors'] = [f"Unexpected error: {e}"]
+
+    return result
+
+
+def _validate_task(task: Tuple[Path, Path], **options) -> Dict:
+    return validate_pair(*task, **options)
+
+
+def print_result(result: Dict) -> None:
+    """Print one validation result the way the per-workflow listing shows it."""
+    status_symbol = "✓" if result['status'] == 'success' else "✗" if result['status'] == 'failed' else "⚠"
+    print(f"{status_symbol} {result['schema_file']} -> {result['vars_file']}: {result['status'].upper()}")
+
+    if result['errors']:
+        for error in result['errors']:
+            print(f"    ERROR: {error}")
+
+    if result['warnings']:
+        for warning in result['warnings']:
+            print(f"    WARNING: {warning}")
+
 
 class WorkflowValidator:
-    def __init__(self, workflows_dir: str = "workflows"):
+    def __init__(self, workflows_dir: str = "workflows", jobs: int = 1, cache: Optional[ValidationCache] = None,
+                 index: Optional[SchemaIndex] = None, engine: str = schema_compiler.DEFAULT_ENGINE,
+                 schema_cache_dir: Optional[str] = schema_compiler.DEFAULT_CACHE_DIR,
+                 stream_max_errors: Optional[int] = None):
         self.workflows_dir = Path(workflows_dir)
+        self.engine = engine
+        self.schema_cache_dir = schema_cache_dir
+        self.stream_max_errors = stream_max_errors
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        self.cache = cache
+        self.index = index if index is not None else SchemaIndex.load(workflows_dir)
         self.results = []
-        self.total_validations = 0
-        self.successful_validations = 0
-        self.failed_validations = 0
+        # Workflows planned with match_schema_to_vars because the index has no entry for them
+        self.heuristic_workflows = []
+
+    # Counters are derived from the merged results rather than kept as
+    # running totals, so results produced by worker processes count the same
+    @property
+    def total_validations(self) -> int:
+        return sum(1 for r in self.results if r['status'] in VALIDATION_STATUSES)
+
+    @property
+    def successful_validations(self) -> int:
+        return sum(1 for r in self.results if r['status'] == 'success')
+
+    @property
+    def failed_validations(self) -> int:
+        return sum(1 for r in self.results if r['status'] in ('failed', 'error'))
         
     def find_workflow_directories(self) -> List[Path]:
         """Find all workflow directories that contain both schema and vars subdirectories."""
@@ -63,7 +284,11 @@ class WorkflowValidator:
         return sorted(vars_files)
     
     def match_schema_to_vars(self, schema_files: List[Path], vars_files: List[Path]) -> List[Tuple[Path, Path]]:
-        """Match schema files to their corresponding variable files based on naming patterns."""
+        """Match schema files to their corresponding variable files based on naming patterns.
+
+        Only used for workflows the schema index does not cover, and to seed
+        the manifest for them (``--write-manifest``).
+        """
         matches = []
         
         for schema_file in schema_files:
@@ -129,127 +354,145 @@ class WorkflowValidator:
     
     def validate_file_pair(self, schema_file: Path, vars_file: Path) -> Dict:
         """Validate a single vars file against a schema file."""
-        result = {
-            'workflow': schema_file.parent.parent.name,
-            'schema_file': schema_file.name,
-            'vars_file': vars_file.name,
-            'status': 'unknown',
-            'errors': [],
-            'warnings': []
-        }
-        
-        try:
-            # Load schema
-            schema = yamale.make_schema(str(schema_file))
-            
-            # Load data
-            data = yamale.make_data(str(vars_file))
-            
-            # Validate
-            yamale.validate(schema, data)
-            
-            result['status'] = 'success'
-            self.successful_validations += 1
-            
-        except YamaleError as e:
-            result['status'] = 'failed'
-            result['errors'] = [str(e)]
-            self.failed_validations += 1
-            
-        except FileNotFoundError as e:
-            result['status'] = 'error'
-            result['errors'] = [f"File not found: {e}"]
-            self.failed_validations += 1
-            
-        except yaml.YAMLError as e:
-            result['status'] = 'error'
-            result['errors'] = [f"YAML parsing error: {e}"]
-            self.failed_validations += 1
-            
-        except Exception as e:
-            result['status'] = 'error'
-            result['errors'] = [f"Unexpected error: {e}"]
-            self.failed_validations += 1
-            
-        self.total_validations += 1
-        return result
-    
-    def validate_workflow(self, workflow_dir: Path) -> List[Dict]:
-        """Validate all schema-vars pairs in a workflow directory."""
-        workflow_results = []
-        
+        return validate_pair(schema_file, vars_file, self.engine, self.schema_cache_dir, self.stream_max_errors)
+
+    def plan_workflow(self, workflow_dir: Path) -> List[Union[Dict, Tuple[Path, Path]]]:
+        """List the schema-vars pairs to validate for a workflow, or the warning explaining why there are none."""
         schema_files = self.get_schema_files(workflow_dir)
         vars_files = self.get_vars_files(workflow_dir)
-        
+
         if not schema_files:
-            workflow_results.append({
+            return [{
                 'workflow': workflow_dir.name,
                 'schema_file': 'N/A',
                 'vars_file': 'N/A',
                 'status': 'warning',
                 'errors': [],
                 'warnings': ['No schema files found']
-            })
-            return workflow_results
-            
+            }]
+
         if not vars_files:
-            workflow_results.append({
+            return [{
                 'workflow': workflow_dir.name,
                 'schema_file': 'N/A',
                 'vars_file': 'N/A',
                 'status': 'warning',
                 'errors': [],
                 'warnings': ['No vars files found']
-            })
-            return workflow_results
-        
-        # Match schemas to vars and validate
+            }]
+
+        pairs = self.index.pairs(workflow_dir.name)
+        if pairs is not None:
+            # Vars files the index does not map are reported rather than dropped,
+            # so new files show up until someone maps them
+            mapped = {vars_file.name for _, vars_file in pairs}
+            unmapped = [vars_file.name for vars_file in vars_files if vars_file.name not in mapped]
+            if not unmapped:
+                return list(pairs)
+            return list(pairs) + [{
+                'workflow': workflow_dir.name,
+                'schema_file': 'N/A',
+                'vars_file': 'N/A',
+                'status': 'warning',
+                'errors': [],
+                'warnings': [f'Vars file not in the schema index, not validated: {name}' for name in unmapped]
+            }]
+
+        # Not indexed: match schemas to vars by name and report it
+        self.heuristic_workflows.append(workflow_dir.name)
         matches = self.match_schema_to_vars(schema_files, vars_files)
-        
+
         if not matches:
             # If no matches found, validate each schema against each vars file
-            for schema_file in schema_files:
-                for vars_file in vars_files:
-                    result = self.validate_file_pair(schema_file, vars_file)
-                    workflow_results.append(result)
+            return [(schema_file, vars_file) for schema_file in schema_files for vars_file in vars_files]
+        return list(matches)
+
+    def iter_validations(self, workflow_dirs: Iterable[Path]) -> Iterator[Tuple[Path, Dict]]:
+        """Yield ``(workflow_dir, result)`` for every planned entry, in plan order.
+
+        Pairs with a result in the cache are not validated again. With
+        ``jobs > 1`` the others are validated in a process pool; results are
+        still yielded in the order they were planned, so the output and the
+        report do not depend on scheduling.
+        """
+        plan = [(workflow_dir, entry) for workflow_dir in workflow_dirs for entry in self.plan_workflow(workflow_dir)]
+        cached = {}
+        if self.cache is not None:
+            for _, entry in plan:
+                if isinstance(entry, tuple) and entry not in cached:
+                    result = self.cache.get(*entry)
+                    if result is not None:
+                        cached[entry] = result
+        tasks = [entry for _, entry in plan if isinstance(entry, tuple) and entry not in cached]
+        validate_task = partial(_validate_task, engine=self.engine, schema_cache_dir=self.schema_cache_dir,
+                                stream_max_errors=self.stream_max_errors)
+
+        if self.jobs > 1 and len(tasks) > 1:
+            pool = ProcessPoolExecutor(max_workers=min(self.jobs, len(tasks)))
+            validated = pool.map(validate_task, tasks, chunksize=max(1, len(tasks) // (self.jobs * 4)))
         else:
-            for schema_file, vars_file in matches:
-                result = self.validate_file_pair(schema_file, vars_file)
-                workflow_results.append(result)
-                
-        return workflow_results
-    
-    def validate_all_workflows(self) -> None:
+            pool = None
+            validated = map(validate_task, tasks)
+
+        try:
+            for workflow_dir, entry in plan:
+                if not isinstance(entry, tuple):
+                    yield workflow_dir, entry
+                elif entry in cached:
+                    yield workflow_dir, cached[entry]
+                else:
+                    result = next(validated)
+                    if self.cache is not None:
+                        self.cache.put(*entry, result)
+                    yield workflow_dir, result
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+    def update_manifest(self) -> List[str]:
+        """Add heuristic matches of every unindexed workflow to the index; return the workflows added."""
+        added = []
+        for workflow_dir in self.find_workflow_directories():
+            if workflow_dir.name in self.index:
+                continue
+            matches = self.match_schema_to_vars(self.get_schema_files(workflow_dir), self.get_vars_files(workflow_dir))
+            if matches:
+                self.index.entries[workflow_dir.name] = {
+                    vars_file.name: schema_file.name for schema_file, vars_file in matches
+                }
+                self.index.sources[workflow_dir.name] = "manifest"
+                added.append(workflow_dir.name)
+        return added
+
+    def validate_workflow(self, workflow_dir: Path) -> List[Dict]:
+        """Validate all schema-vars pairs in a workflow directory."""
+        return [result for _, result in self.iter_validations([workflow_dir])]
+
+    def validate_all_workflows(self, quiet: bool = False) -> None:
         """Validate all workflows in the workflows directory."""
         workflow_dirs = self.find_workflow_directories()
-        
+
         if not workflow_dirs:
             print("No workflow directories with both schema and vars found.")
             return
-            
-        print(f"Found {len(workflow_dirs)} workflows to validate...")
-        print("=" * 80)
-        
-        for workflow_dir in workflow_dirs:
-            print(f"\nValidating workflow: {workflow_dir.name}")
-            print("-" * 50)
-            
-            workflow_results = self.validate_workflow(workflow_dir)
-            self.results.extend(workflow_results)
-            
+
+        if not quiet:
+            print(f"Found {len(workflow_dirs)} workflows to validate...")
+            print("=" * 80)
+
+        current = None
+        for workflow_dir, result in self.iter_validations(workflow_dirs):
+            self.results.append(result)
+            if quiet:
+                continue
+
             # Print immediate results for this workflow
-            for result in workflow_results:
-                status_symbol = "✓" if result['status'] == 'success' else "✗" if result['status'] == 'failed' else "⚠"
-                print(f"{status_symbol} {result['schema_file']} -> {result['vars_file']}: {result['status'].upper()}")
-                
-                if result['errors']:
-                    for error in result['errors']:
-                        print(f"    ERROR: {error}")
-                        
-                if result['warnings']:
-                    for warning in result['warnings']:
-                        print(f"    WARNING: {warning}")
-    
+            if workflow_dir != current:
+                current = workflow_dir
+                print(f"\nValidating workflow: {workflow_dir.name}")
+                print("-" * 50)
+            print_result(result)
+
     def generate_summary_report(self) -> None:
         """Generate a summary report of all validations."""
         print("\n" + "=" * 80)
@@ -264,6 +507,12 @@ class WorkflowValidator:
             success_rate = (self.successful_validations / self.total_validations) * 100
             print(f"Success rate: {success_rate:.1f}%")
         
+        if self.cache is not None:
+            print(f"Results reused from cache: {self.cache.hits}")
+        if self.heuristic_workflows:
+            print(f"Workflows not in the schema index, matched by file name: {len(self.heuristic_workflows)} "
+                  f"({', '.join(self.heuristic_workflows)})")
+        
         # Group results by status
         failed_results = [r for r in self.results if r['status'] == 'failed']
         error_results = [r for r in self.results if r['status'] == 'error']
@@ -300,7 +549,10 @@ class WorkflowValidator:
                 'total_validations': self.total_validations,
                 'successful_validations': self.successful_validations,
                 'failed_validations': self.failed_validations,
-                'success_rate': (self.successful_validations / self.total_validations * 100) if self.total_validations > 0 else 0
+                'success_rate': (self.successful_validations / self.total_validations * 100) if self.total_validations > 0 else 0,
+                'heuristic_workflows': self.heuristic_workflows,
+                'engine': self.engine,
+                'stream': self.stream_max_errors is not None
             },
             'results': self.results
         }
@@ -329,6 +581,24 @@ Examples:
   
   # Validate a specific workflow
   python comprehensive_schema_validation.py --workflow device_discovery
+
+  # Validate in 8 worker processes (0 uses every CPU)
+  python comprehensive_schema_validation.py --jobs 8
+
+  # Revalidate everything, ignoring (and not updating) the results cache
+  python comprehensive_schema_validation.py --no-cache
+
+  # Drop cached results for files that were changed or removed
+  python comprehensive_schema_validation.py --prune
+
+  # Validate with yamale itself instead of the compiled schemas
+  python comprehensive_schema_validation.py --engine yamale
+
+  # Validate very large vars files in bounded memory, listing at most 20 errors per file
+  python comprehensive_schema_validation.py --stream --max-errors 20
+
+  # Add name-matched pairs of workflows missing from workflows/schema_manifest.json
+  python comprehensive_schema_validation.py --write-manifest
         """
     )
     
@@ -355,10 +625,90 @@ Examples:
         help='Only show summary, suppress detailed output'
     )
     
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        help='Number of worker processes validating schema-vars pairs; 0 uses every CPU (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--cache-file',
+        default=DEFAULT_CACHE_FILE,
+        help=f'SQLite file holding results of earlier validations (default: {DEFAULT_CACHE_FILE})'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Validate every pair without reading or writing the results cache'
+    )
+    
+    parser.add_argument(
+        '--prune',
+        action='store_true',
+        help='Remove cached results of changed or deleted files before validating'
+    )
+    
+    parser.add_argument(
+        '--engine',
+        choices=schema_compiler.ENGINES,
+        default=schema_compiler.DEFAULT_ENGINE,
+        help='compiled validates with schemas compiled to Python, yamale with yamale itself '
+             f'(default: {schema_compiler.DEFAULT_ENGINE})'
+    )
+    
+    parser.add_argument(
+        '--schema-cache-dir',
+        default=schema_compiler.DEFAULT_CACHE_DIR,
+        help=f'Directory holding compiled schemas (default: {schema_compiler.DEFAULT_CACHE_DIR})'
+    )
+    
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Validate vars files while parsing them, one list element at a time, instead of loading them whole'
+    )
+    
+    parser.add_argument(
+        '--max-errors',
+        type=int,
+        default=stream_validation.DEFAULT_MAX_ERRORS,
+        help='With --stream, errors listed per vars file document; the rest are only counted '
+             f'(default: {stream_validation.DEFAULT_MAX_ERRORS})'
+    )
+    
+    parser.add_argument(
+        '--write-manifest',
+        action='store_true',
+        help='Add workflows missing from the schema index to the manifest using file name matching, then exit'
+    )
+    
     args = parser.parse_args()
+    if args.max_errors < 1:
+        parser.error("--max-errors must be at least 1")
+    stream_max_errors = args.max_errors if args.stream else None
+    
+    if args.write_manifest:
+        validator = WorkflowValidator(args.workflows_dir)
+        added = validator.update_manifest()
+        path = validator.index.write_manifest()
+        print(f"Added {len(added)} workflows to {path}" + (f": {', '.join(added)}" if added else ""))
+        sys.exit(0)
+    
+    cache = None
+    if not args.no_cache:
+        try:
+            cache = ValidationCache(args.cache_file, cache_engine(args.engine, stream_max_errors))
+        except sqlite3.Error as e:
+            print(f"Warning: validation cache '{args.cache_file}' unavailable, validating everything: {e}")
+    if cache is not None and args.prune:
+        print(f"Pruned {cache.prune()} stale entries from {args.cache_file}")
     
     # Initialize validator
-    validator = WorkflowValidator(args.workflows_dir)
+    validator = WorkflowValidator(args.workflows_dir, jobs=args.jobs, cache=cache,
+                                  engine=args.engine, schema_cache_dir=args.schema_cache_dir,
+                                  stream_max_errors=stream_max_errors)
     
     if args.workflow:
         # Validate specific workflow
@@ -373,26 +723,10 @@ Examples:
         
         if not args.quiet:
             for result in results:
-                status_symbol = "✓" if result['status'] == 'success' else "✗" if result['status'] == 'failed' else "⚠"
-                print(f"{status_symbol} {result['schema_file']} -> {result['vars_file']}: {result['status'].upper()}")
-                
-                if result['errors']:
-                    for error in result['errors']:
-                        print(f"    ERROR: {error}")
-                        
-                if result['warnings']:
-                    for warning in result['warnings']:
-                        print(f"    WARNING: {warning}")
+                print_result(result)
     else:
-        # Validate all workflows
-        if not args.quiet:
-            validator.validate_all_workflows()
-        else:
-            # Quiet mode - just collect results
-            workflow_dirs = validator.find_workflow_directories()
-            for workflow_dir in workflow_dirs:
-                workflow_results = validator.validate_workflow(workflow_dir)
-                validator.results.extend(workflow_results)
+        # Validate all workflows; quiet mode just collects results
+        validator.validate_all_workflows(quiet=args.quiet)
     
     # Generate summary report
     validator.generate_summary_report()
@@ -400,6 +734,9 @@ Examples:
     # Save detailed report
     validator.save_detailed_report(args.output)
     
+    if cache is not None:
+        cache.close()
+    
     # Exit with appropriate code
     if validator.failed_validations > 0:
         sys.exit(1)
@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+Compiled yamale Schemas for DNAC Ansible Workflows
+
+yamale interprets a schema for every value it validates: each node goes
+through the generic Schema._validate dispatch, builds DataPath objects and
+collects errors in fresh lists. This module turns a parsed yamale schema into
+Python source with one function per map node and include, the type checks
+and constraints inlined, and paths only formatted when an error is reported.
+
+The generated code reproduces yamale's behaviour and error messages (the
+messages of one document come out in the same order, except that unexpected
+keys are listed in document order rather than set order). Schemas using
+validators it does not cover (subset, day, timestamp, map key constraints,
+static lists or custom validators) raise UnsupportedSchema, and make_schema
+falls back to yamale for them.
+
+The generated code is cached on disk as marshalled bytecode, keyed by the
+SHA-256 of the schema file, the yamale version, COMPILER_VERSION and the
+interpreter's bytecode magic number, so a schema is parsed and compiled once:
+
+    import yamale
+    from schema_compiler import make_schema
+    schema = make_schema("workflows/sites/schema/sites_schema.yml")
+    yamale.validate(schema, yamale.make_data("workflows/sites/vars/sites_vars.yml"))
+"""
+
+import argparse
+import hashlib
+import marshal
+import os
+import re
+import sys
+import tempfile
+import threading
+from collections.abc import Mapping, Sequence
+from importlib.util import MAGIC_NUMBER
+from ipaddress import ip_interface
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+import yamale
+from yamale import validators as val
+from yamale.schema.validationresults import ValidationResult
+from yamale.validators import constraints as con
+
+# Bump when the generated code changes; part of every cache key
+COMPILER_VERSION = 2
+ENGINES = ("compiled", "yamale")
+DEFAULT_ENGINE = "compiled"
+DEFAULT_CACHE_DIR = ".schema_cache"
+
+_SCALAR_CHECKS = {
+    val.String: "isinstance({v}, str)",
+    val.Integer: "isinstance({v}, int) and not isinstance({v}, bool)",
+    val.Number: "isinstance({v}, (int, float)) and not isinstance({v}, bool)",
+    val.Boolean: "isinstance({v}, bool)",
+    val.Null: "{v} is None",
+    val.Map: "isinstance({v}, Mapping)",
+    val.List: "isinstance({v}, Sequence) and not isinstance({v}, str)",
+}
+_REGEX_VALIDATORS = (val.Regex, val.Mac, val.SemVer)
+_PASS_VALIDATORS = (val.Include, val.Any)
+SUPPORTED_VALIDATORS = tuple(_SCALAR_CHECKS) + _REGEX_VALIDATORS + _PASS_VALIDATORS + (val.Enum, val.Ip)
+
+
+class UnsupportedSchema(Exception):
+    """The schema uses a validator or option the compiler does not translate."""
+
+
+class FatalValidation(Exception):
+    """Mirror of yamale's FatalValidationError: replaces all errors of the document."""
+
+
+def _join(path, key):
+    return str(key) if path is None else path + "." + str(key)
+
+
+def _p(path):
+    return "" if path is None else path
+
+
+def _is_ip(value):
+    try:
+        ip_interface(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _ip_version(value):
+    try:
+        return ip_interface(value).version
+    except ValueError:
+        return None
+
+
+# Names the generated code may use besides its own constants and functions
+RUNTIME = dict(
+    Mapping=Mapping,
+    Sequence=Sequence,
+    re=re,
+    _join=_join,
+    _p=_p,
+    _is_ip=_is_ip,
+    _ip_version=_ip_version,
+    _MISSING=object(),
+    FatalValidation=FatalValidation,
+)
+
+
+class _Generator:
+    """Emit the Python source of one schema."""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.constants: List[str] = []
+        self.functions: List[List[str]] = []
+        self._node_functions: Dict[int, str] = {}
+        # Include name -> function validating its body, for includes the schema uses
+        self._include_functions: Dict[str, str] = {}
+        # Keep nodes alive while their id() names a function
+        self._nodes = []
+
+    def constant(self, expression: str) -> str:
+        name = f"C{len(self.constants)}"
+        self.constants.append(f"{name} = {expression}")
+        return name
+
+    def source(self) -> str:
+        root = self.node_function(self.schema._schema)
+        lines = [
+            f"# Generated by schema_compiler {COMPILER_VERSION} from {self.schema.name}; do not edit.",
+            *self.constants,
+            "",
+        ]
+        for function in self.functions:
+            lines.extend(function)
+            lines.append("")
+        includes = "".join(f"{name!r}: {function}, " for name, function in sorted(self._include_functions.items()))
+        lines.extend([
+            f"INCLUDES = {{{includes}}}",
+            "",
+            "def validate(data, strict=True):",
+            "    errors = []",
+            "    try:",
+            f"        {root}(data, None, strict, errors)",
+            "    except FatalValidation as exc:",
+            "        return [exc.args[0]]",
+            "    return errors",
+            "",
+        ])
+        return "\n".join(lines)
+
+    def node_function(self, node) -> str:
+        """Name of the function validating ``node``; generated on first use."""
+        name = self._node_functions.get(id(node))
+        if name is not None:
+            return name
+        name = f"n{len(self._node_functions)}"
+        self._node_functions[id(node)] = name
+        self._nodes.append(node)
+        body: List[str] = [f"def {name}(data, path, strict, errors):"]
+        self.functions.append(body)
+        if isinstance(node, Mapping):
+            self._map_body(node, body)
+        else:
+            self.emit(node, "data", "path", "strict", "errors", 0, body, 1)
+            if len(body) == 1:
+                body.append("    pass")
+        return name
+
+    def _map_body(self, node, out: List[str]):
+        keys = self.constant("frozenset((" + "".join(f"{key!r}, " for key in node) + "))")
+        out.extend([
+            "    if not isinstance(data, Mapping):",
+            "        errors.append(\"%s : '%s' is not a map\" % (_p(path), data))",
+            "        return",
+            "    if strict:",
+            "        for key in data:",
+            f"            if key not in {keys}:",
+            "                errors.append(\"%s: Unexpected element\" % _join(path, key))",
+        ])
+        for key, validator in node.items():
+            child = f"_join(path, {key!r})"
+            out.append(f"    value = data.get({key!r}, _MISSING)")
+            out.append("    if value is _MISSING:")
+            if isinstance(validator, val.Validator) and validator.is_optional:
+                out.append("        pass")
+            else:
+                out.append(f"        errors.append(\"%s: Required field missing\" % {child})")
+            out.append("    else:")
+            before = len(out)
+            self.emit(validator, "value", child, "strict", "errors", 0, out, 2)
+            if len(out) == before:
+                out.append("        pass")
+
+    def emit(self, validator, value: str, path: str, strict: str, errors: str, depth: int, out: List[str], indent: int):
+        """Append statements validating ``value`` with ``validator`` into the list named ``errors``."""
+        pad = "    " * indent
+        if isinstance(validator, Mapping):
+            out.append(f"{pad}{self.node_function(validator)}({value}, {path}, {strict}, {errors})")
+            return
+        if not isinstance(validator, val.Validator):
+            raise UnsupportedSchema(f"static list node {validator!r}")
+        if type(validator) not in SUPPORTED_VALIDATORS:
+            raise UnsupportedSchema(f"validator {type(validator).__name__}")
+
+        if validator.is_optional and validator.can_be_none:
+            out.append(f"{pad}if {value} is not None:")
+            indent += 1
+            pad = "    " * indent
+
+        check = self._type_check(validator, value)
+        constraints = self._constraints(validator, value, path, errors)
+        contents: List[str] = []
+        self._contents(validator, value, path, strict, errors, depth, contents, 0)
+
+        if check is None and not constraints and not contents:
+            if out and out[-1].endswith(":"):
+                out.append(f"{pad}pass")
+            return
+
+        body_pad = pad
+        if check is not None:
+            out.append(f"{pad}if not ({check}):")
+            out.append(f"{pad}    {errors}.append({self._type_error(validator, value, path)})")
+            if not constraints and not contents:
+                return
+            out.append(f"{pad}else:")
+            body_pad = pad + "    "
+        if constraints and contents:
+            mark = f"mark{depth}"
+            out.append(f"{body_pad}{mark} = len({errors})")
+        out.extend(body_pad + line for line in constraints)
+        if contents:
+            if constraints:
+                out.append(f"{body_pad}if len({errors}) == {mark}:")
+                body_pad += "    "
+            out.extend(body_pad + line for line in contents)
+
+    def _type_check(self, validator, value: str) -> Optional[str]:
+        kind = type(validator)
+        if kind in _SCALAR_CHECKS:
+            return _SCALAR_CHECKS[kind].format(v=value)
+        if kind is val.Enum:
+            return f"{value} in {self.constant(repr(validator.enums))}"
+        if kind in _REGEX_VALIDATORS:
+            regexes = self.constant(
+                "(" + "".join(f"re.compile({r.pattern!r}, {int(r.flags)}), " for r in validator.regexes) + ")"
+            )
+            return f"isinstance({value}, str) and any(r.match({value}) for r in {regexes})"
+        if kind is val.Ip:
+            return f"_is_ip({value})"
+        return None
+
+    def _type_error(self, validator, value: str, path: str) -> str:
+        if type(validator) is val.Enum:
+            return f"\"%s: '%s' not in %s\" % (_p({path}), {value}, {self.constant(repr(validator.enums))})"
+        name = validator.get_name()
+        return f"\"%s: '%s' is not a %s.\" % (_p({path}), {value}, {name!r})"
+
+    def _constraints(self, validator, value: str, path: str, errors: str) -> List[str]:
+        """Statements for the active constraints, in yamale's order."""
+        lines: List[str] = []
+
+        def fail(condition: str, message: str, *args: str):
+            lines.append(f"if {condition}:")
+            lines.append(f"    {errors}.append(\"%s: \" % _p({path}) + {message!r} % ({', '.join(args)},))")
+
+        for constraint in validator._constraints_inst:
+            if not constraint.is_active:
+                continue
+            kind = type(constraint)
+            ignore_case = bool(getattr(constraint, "ignore_case", None))
+            if kind is con.Min:
+                fail(f"not {constraint.min!r} <= {value}", constraint.fail, value, repr(constraint.min))
+            elif kind is con.Max:
+                fail(f"not {constraint.max!r} >= {value}", constraint.fail, value, repr(constraint.max))
+            elif kind is con.LengthMin:
+                fail(f"not {constraint.min!r} <= len({value})", constraint.fail, value, repr(constraint.min))
+            elif kind is con.LengthMax:
+                fail(f"not {constraint.max!r} >= len({value})", constraint.fail, value, repr(constraint.max))
+            elif kind is con.StringEquals:
+                if constraint.equals is not None:
+                    if ignore_case:
+                        fail(f"{value}.casefold() != {constraint.equals.casefold()!r}",
+                             constraint.fail, value, repr(constraint.equals))
+                    else:
+                        fail(f"{value} != {constraint.equals!r}", constraint.fail, value, repr(constraint.equals))
+            elif kind is con.StringStartsWith:
+                prefix = constraint.starts_with
+                if prefix is not None:
+                    test = (f"{value}[:{len(prefix)}].casefold() == {prefix.casefold()!r}"
+                            f" and {len(prefix)} <= len({value})") if ignore_case else f"{value}.startswith({prefix!r})"
+                    fail(f"not ({test})", constraint.fail, value, repr(prefix))
+            elif kind is con.StringEndsWith:
+                suffix = constraint.ends_with
+                if suffix is not None:
+                    test = (f"{len(suffix)} <= len({value}) and {value}[-{len(suffix)}:].casefold() == {suffix.casefold()!r}"
+                            if ignore_case else f"{value}.endswith({suffix!r})")
+                    fail(f"not ({test})", constraint.fail, value, repr(suffix))
+            elif kind is con.StringMatches:
+                if constraint.matches is not None:
+                    regex = self.constant(f"re.compile({constraint.matches!r}, {int(constraint._flags)})")
+                    fail(f"not {regex}.match({value})", constraint.fail, value)
+            elif kind is con.CharacterExclude:
+                if constraint.exclude is not None:
+                    lines.append(f"for char in {constraint.exclude!r}:")
+                    test = f"char.casefold() in {value}.casefold()" if ignore_case else f"char in {value}"
+                    lines.append(f"    if {test}:")
+                    lines.append(f"        {errors}.append(\"%s: \" % _p({path}) + {constraint.fail!r} % ({value}, char))")
+                    lines.append("        break")
+            elif kind is con.IpVersion:
+                fail(f"_ip_version({value}) != {constraint.version!r}", constraint.fail, value, repr(constraint.version))
+            else:
+                raise UnsupportedSchema(f"constraint {kind.__name__}")
+        return lines
+
+    def _contents(self, validator, value: str, path: str, strict: str, errors: str, depth: int, out: List[str], indent: int):
+        """Statements validating what a container, include or any() holds."""
+        pad = "    " * indent
+        if isinstance(validator, val.Include):
+            include = self.schema.includes.get(validator.include_name)
+            if include is None:
+                message = "Include '%s' has not been defined." % validator.include_name
+                out.append(f"{pad}raise FatalValidation({message!r})")
+                return
+            include_strict = strict if validator.strict is None else repr(validator.strict)
+            function = self._include_functions[validator.include_name] = self.node_function(include._schema)
+            out.append(f"{pad}{function}({value}, {path}, {include_strict}, {errors})")
+            return
+
+        if isinstance(validator, (val.Map, val.List)):
+            if not validator.validators:
+                return
+            item, index, item_path = f"item{depth}", f"key{depth}", f"path{depth}"
+            out.append(f"{pad}{item_path} = {path}")
+            if isinstance(validator, val.Map):
+                out.append(f"{pad}for {index}, {item} in {value}.items():")
+            else:
+                out.append(f"{pad}for {index}, {item} in enumerate({value}):")
+            self._alternatives(validator.validators, item, f"_join({item_path}, {index})", strict, errors,
+                               depth + 1, out, indent + 1)
+            return
+
+        if isinstance(validator, val.Any) and validator.validators:
+            self._alternatives(validator.validators, value, path, strict, errors, depth + 1, out, indent)
+
+    def _alternatives(self, validators, value: str, path: str, strict: str, errors: str, depth: int, out: List[str], indent: int):
+        """Errors of ``validators`` on ``value`` are reported only when all of them fail."""
+        pad = "    " * indent
+        if len(validators) == 1:
+            before = len(out)
+            self.emit(validators[0], value, path, strict, errors, depth, out, indent)
+            if len(out) == before:
+                out.append(f"{pad}pass")
+            return
+        failed = f"failed{depth}"
+        out.append(f"{pad}{failed} = []")
+        for number, validator in enumerate(validators):
+            attempt = f"attempt{depth}_{number}"
+            out.append(f"{pad}{attempt} = []")
+            self.emit(validator, value, path, strict, attempt, depth, out, indent)
+            out.append(f"{pad}if {attempt}:")
+            out.append(f"{pad}    {failed}.append({attempt})")
+        out.append(f"{pad}if len({failed}) == {len(validators)}:")
+        out.append(f"{pad}    for attempt in {failed}:")
+        out.append(f"{pad}        {errors}.extend(attempt)")
+
+
+def compile_schema(schema) -> str:
+    """Python source validating data like the parsed yamale ``schema`` does."""
+    return _Generator(schema).source()
+
+
+def compile_code(schema, name: str):
+    """Code object of :func:`compile_schema`'s source for the schema file ``name``."""
+    return compile(compile_schema(schema), f"<compiled schema {name}>", "exec")
+
+
+class CompiledSchema:
+    """Drop-in for a yamale Schema in ``yamale.validate``."""
+
+    engine = "compiled"
+
+    def __init__(self, name: str, code):
+        self.name = name
+        namespace = dict(RUNTIME)
+        exec(code, namespace)
+        self._validate = namespace["validate"]
+        # Include name -> function(data, path, strict, errors) validating the include's body
+        self.includes = namespace["INCLUDES"]
+
+    def validate(self, data, data_name, strict):
+        return ValidationResult(data_name, self.name, self._validate(data, strict))
+
+
+def cache_key(content: bytes) -> str:
+    digest = hashlib.sha256(content)
+    digest.update(f"\0yamale-{yamale.__version__}\0compiler-{COMPILER_VERSION}\0".encode())
+    digest.update(MAGIC_NUMBER)
+    return digest.hexdigest()
+
+
+_loaded: Dict[tuple, CompiledSchema] = {}
+_loaded_lock = threading.Lock()
+
+
+def load_compiled(schema_path, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> CompiledSchema:
+    """Compiled form of the schema file, from memory, the disk cache or freshly compiled.
+
+    Raises UnsupportedSchema when the schema needs yamale itself.
+    """
+    name = str(schema_path)
+    content = Path(schema_path).read_bytes()
+    key = cache_key(content)
+    with _loaded_lock:
+        compiled = _loaded.get((name, key))
+    if compiled is not None:
+        return compiled
+
+    cached = Path(cache_dir) / f"{key}.bin" if cache_dir else None
+    code = None
+    if cached is not None:
+        try:
+            code = marshal.loads(cached.read_bytes())
+        except (OSError, EOFError, ValueError, TypeError):
+            code = None
+    if code is None:
+        code = compile_code(yamale.make_schema(name), name)
+        if cached is not None:
+            _write_atomic(cached, marshal.dumps(code))
+
+    compiled = CompiledSchema(name, code)
+    with _loaded_lock:
+        _loaded[(name, key)] = compiled
+    return compiled
+
+
+def _write_atomic(path: Path, content: bytes) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(content)
+        os.replace(tmp, path)
+    except OSError:
+        # The cache is an optimisation; an unwritable directory only costs a recompile
+        pass
+
+
+def make_schema(schema_path, engine: str = DEFAULT_ENGINE, cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+    """Schema object for ``yamale.validate``: compiled unless ``engine`` is 'yamale' or the schema is unsupported."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown validation engine '{engine}'; expected one of {', '.join(ENGINES)}")
+    if engine == "compiled":
+        try:
+            return load_compiled(schema_path, cache_dir)
+        except UnsupportedSchema:
+            pass
+    return yamale.make_schema(str(schema_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile yamale schemas and show the generated validator")
+    parser.add_argument('schemas', nargs='+', help='Schema files to compile')
+    parser.add_argument(
+        '--cache-dir',
+        default=DEFAULT_CACHE_DIR,
+        help=f'Directory for compiled schemas (default: {DEFAULT_CACHE_DIR})'
+    )
+    parser.add_argument('--show', action='store_true', help='Print the generated source')
+    args = parser.parse_args()
+
+    status = 0
+    for schema_path in args.schemas:
+        try:
+            load_compiled(schema_path, args.cache_dir)
+        except UnsupportedSchema as e:
+            print(f"{schema_path}: not compiled, validated by yamale ({e})")
+            continue
+        except (OSError, SyntaxError, ValueError, yaml.YAMLError) as e:
+            print(f"{schema_path}: {e}", file=sys.stderr)
+            status = 1
+            continue
+        print(f"{schema_path}: compiled")
+        if args.show:
+            print(compile_schema(yamale.make_schema(schema_path)))
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Schema Index for DNAC Ansible Workflows
+
+Maps every workflow vars file to the schema file that validates it. The
+mapping is explicit: it is read once from the generated manifest
+(workflows/schema_manifest.json) and from a "schemas" object in a
+workflow's description.json, which takes precedence for that workflow:
+
+    {
+      "summary": "...",
+      "schemas": {
+        "site_hierarchy_design_vars.yml": "sites_schema.yml"
+      }
+    }
+
+Both map vars file names to schema file names within the workflow. Lookups
+by workflow or by vars file are dictionary lookups, so other tools can use
+the index directly:
+
+    from schema_index import SchemaIndex
+    index = SchemaIndex.load("workflows")
+    schema = index.schema_for("workflows/sites/vars/sites_vars.yml")
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+MANIFEST_FILE = "schema_manifest.json"
+DESCRIPTION_FILE = "description.json"
+DESCRIPTION_KEY = "schemas"
+
+
+class SchemaIndex:
+    def __init__(self, workflows_dir: str = "workflows", entries: Optional[Dict[str, Dict[str, str]]] = None,
+                 sources: Optional[Dict[str, str]] = None):
+        self.workflows_dir = Path(workflows_dir)
+        # workflow -> {vars file name: schema file name}
+        self.entries = entries or {}
+        # workflow -> where its entry came from ('manifest' or 'description')
+        self.sources = sources or {}
+        root = self.workflows_dir.resolve()
+        self._by_vars = {
+            root / workflow / "vars" / vars_name: root / workflow / "schema" / schema_name
+            for workflow, mapping in self.entries.items()
+            for vars_name, schema_name in mapping.items()
+        }
+
+    @classmethod
+    def load(cls, workflows_dir: str = "workflows") -> "SchemaIndex":
+        """Build the index from the manifest and every workflow's description.json."""
+        workflows_dir = Path(workflows_dir)
+        entries: Dict[str, Dict[str, str]] = {}
+        sources: Dict[str, str] = {}
+
+        manifest = workflows_dir / MANIFEST_FILE
+        if manifest.is_file():
+            for workflow, mapping in read_json(manifest).items():
+                entries[workflow] = dict(mapping)
+                sources[workflow] = "manifest"
+
+        for description in sorted(workflows_dir.glob(f"*/{DESCRIPTION_FILE}")):
+            mapping = read_json(description).get(DESCRIPTION_KEY)
+            if isinstance(mapping, dict):
+                workflow = description.parent.name
+                entries[workflow] = dict(mapping)
+                sources[workflow] = "description"
+
+        return cls(workflows_dir, entries, sources)
+
+    def __contains__(self, workflow: str) -> bool:
+        return workflow in self.entries
+
+    def pairs(self, workflow: str) -> Optional[List[Tuple[Path, Path]]]:
+        """``(schema_file, vars_file)`` pairs of a workflow in schema order, or None when it is not indexed."""
+        mapping = self.entries.get(workflow)
+        if mapping is None:
+            return None
+        directory = self.workflows_dir / workflow
+        return sorted(
+            ((directory / "schema" / schema_name, directory / "vars" / vars_name)
+             for vars_name, schema_name in mapping.items()),
+            key=lambda pair: (pair[0].name, pair[1].name),
+        )
+
+    def schema_for(self, vars_file) -> Optional[Path]:
+        """Schema file that validates ``vars_file``, or None when the index has no entry for it."""
+        return self._by_vars.get(Path(vars_file).resolve())
+
+    def write_manifest(self, path: Optional[Path] = None) -> Path:
+        """Write the manifest-sourced entries (description.json entries stay where they are)."""
+        path = path or self.workflows_dir / MANIFEST_FILE
+        manifest = {
+            workflow: dict(sorted(mapping.items()))
+            for workflow, mapping in sorted(self.entries.items())
+            if self.sources.get(workflow) != "description"
+        }
+        path.write_text(json.dumps(manifest, indent=2) + "\n")
+        return path
+
+
+def read_json(path: Path) -> Dict:
+    """Parse a JSON object from ``path``; empty or invalid files count as empty."""
+    try:
+        data = json.loads(path.read_text() or "{}")
+    except (OSError, ValueError) as e:
+        print(f"Warning: ignoring {path}: {e}", file=sys.stderr)
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up the schema that validates a workflow vars file")
+    parser.add_argument('vars_files', nargs='+', help='Vars files to look up')
+    parser.add_argument(
+        '--workflows-dir',
+        default='workflows',
+        help='Directory containing workflow subdirectories (default: workflows)'
+    )
+    args = parser.parse_args()
+
+    index = SchemaIndex.load(args.workflows_dir)
+    missing = False
+    for vars_file in args.vars_files:
+        schema = index.schema_for(vars_file)
+        if schema is None:
+            missing = True
+            print(f"{vars_file}: no schema in index", file=sys.stderr)
+        else:
+            print(f"{vars_file}: {schema}")
+    sys.exit(1 if missing else 0)
+
+
+if __name__ == "__main__":
+    main()
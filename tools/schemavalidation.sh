@@ -40,6 +40,9 @@ show_help() {
     echo "  -s, --schema FILE       Validate specific schema file"
     echo "  -v, --vars FILE         Validate specific vars file (requires -s)"
     echo "  --python-tool           Use Python validation tool instead of yamale directly"
+    echo "  -j, --jobs N            Worker processes for the Python tool (0 = all CPUs)"
+    echo "  --stream                Python tool validates vars files while parsing them (bounded memory)"
+    echo "  --max-errors N          Errors listed per vars file with --stream (default: 100)"
     echo "  --list-workflows        List all available workflows"
     echo
     echo "Examples:"
@@ -321,6 +324,9 @@ main() {
     local output_file=""
     local quiet_mode="false"
     local use_python_tool="false"
+    local jobs=""
+    local stream_mode="false"
+    local max_errors=""
     local list_only="false"
     
     # Parse command line arguments
@@ -358,6 +364,18 @@ main() {
                 use_python_tool="true"
                 shift
                 ;;
+            -j|--jobs)
+                jobs="$2"
+                shift 2
+                ;;
+            --stream)
+                stream_mode="true"
+                shift
+                ;;
+            --max-errors)
+                max_errors="$2"
+                shift 2
+                ;;
             --list-workflows)
                 list_only="true"
                 shift
@@ -420,6 +438,15 @@ main() {
         if [ "$quiet_mode" = "true" ]; then
             python_args+=(--quiet)
         fi
+        if [ -n "$jobs" ]; then
+            python_args+=(--jobs "$jobs")
+        fi
+        if [ "$stream_mode" = "true" ]; then
+            python_args+=(--stream)
+        fi
+        if [ -n "$max_errors" ]; then
+            python_args+=(--max-errors "$max_errors")
+        fi
         
         "$PYTHON_BIN" "$python_script" "${python_args[@]}"
         exit $?
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Streaming Schema Validation for DNAC Ansible Workflows
+
+yamale.make_data loads a whole vars file before validating it, and yamale
+keeps every error it finds. This module validates a vars file while it is
+being parsed instead: it walks the YAML event stream alongside the schema,
+descends into maps, includes and lists as their events arrive, and builds
+only one list element (or one scalar-sized value) at a time, which is
+validated and released before the next is read. Memory stays proportional
+to the largest single element rather than to the file, and only the first
+max_errors messages of each document are kept; the rest are counted.
+
+Errors are the ones yamale reports, in document order. Values that cannot
+be walked this way (lists with length constraints, any() alternatives,
+anchored collections, explicit tags) are built in full and validated as
+yamale would. A key repeated in a map is validated with its last value, as
+PyYAML loads it. Files whose streamed maps use merge keys (<<), or whose
+map() entries repeat a key, raise NotStreamable, so the caller can load
+them whole instead.
+
+    import yamale
+    from stream_validation import stream_validate
+    schema = yamale.make_schema("workflows/inventory/schema/inventory_schema.yml")
+    for result in stream_validate(schema, "inventory_vars.yml", max_errors=50):
+        print(result)
+"""
+
+import argparse
+import sys
+from collections.abc import Mapping
+from typing import List, Optional
+
+import yaml
+import yamale
+from yaml.composer import Composer
+from yaml.constructor import SafeConstructor
+from yaml.events import (CollectionStartEvent, DocumentEndEvent, MappingEndEvent,
+                         MappingStartEvent, SequenceEndEvent, SequenceStartEvent, StreamEndEvent)
+from yaml.resolver import Resolver
+from yamale import validators as val
+from yamale.schema.datapath import DataPath
+from yamale.schema.schema import FatalValidationError
+from yamale.schema.validationresults import ValidationResult
+
+import schema_compiler
+
+DEFAULT_MAX_ERRORS = 100
+MERGE_TAG = "tag:yaml.org,2002:merge"
+
+try:
+    from yaml.cyaml import CParser
+
+    class _EventLoader(CParser, Composer, SafeConstructor, Resolver):
+        """libyaml events, composed into nodes one value at a time."""
+
+        def __init__(self, stream):
+            CParser.__init__(self, stream)
+            Composer.__init__(self)
+            SafeConstructor.__init__(self)
+            Resolver.__init__(self)
+except ImportError:  # PyYAML without libyaml
+    from yaml.parser import Parser
+    from yaml.reader import Reader
+    from yaml.scanner import Scanner
+
+    class _EventLoader(Reader, Scanner, Parser, Composer, SafeConstructor, Resolver):
+        """PyYAML events, composed into nodes one value at a time."""
+
+        def __init__(self, stream):
+            Reader.__init__(self, stream)
+            Scanner.__init__(self)
+            Parser.__init__(self)
+            Composer.__init__(self)
+            SafeConstructor.__init__(self)
+            Resolver.__init__(self)
+
+
+class NotStreamable(Exception):
+    """The file uses YAML features the streaming walk cannot reproduce; load it whole instead."""
+
+
+class StreamResult(ValidationResult):
+    """ValidationResult holding the first errors of a document and the total count."""
+
+    def __init__(self, data, schema, errors, error_count):
+        super().__init__(data, schema, errors)
+        self.error_count = error_count
+
+    def isValid(self):
+        return self.error_count == 0
+
+    def __str__(self):
+        text = super().__str__()
+        omitted = self.error_count - len(self.errors)
+        if omitted > 0:
+            text += f"\n\t... {omitted} more errors ({self.error_count} in total)"
+        return text
+
+
+class _ErrorLog:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.errors: List[str] = []
+        self.count = 0
+
+    def add(self, errors: List[str]) -> None:
+        self.count += len(errors)
+        room = self.limit - len(self.errors)
+        if room > 0:
+            self.errors.extend(errors[:room])
+
+    def merge(self, other: "_ErrorLog") -> None:
+        self.add(other.errors)
+        self.count += other.count - len(other.errors)
+
+
+def _path_str(path: tuple) -> str:
+    return ".".join(map(str, path))
+
+
+class StreamValidator:
+    """Validate vars files against one parsed yamale schema while they are parsed.
+
+    ``compiled`` is the schema's CompiledSchema, if any; its include functions
+    then validate list elements instead of yamale.
+    """
+
+    def __init__(self, schema, compiled: Optional["schema_compiler.CompiledSchema"] = None,
+                 max_errors: int = DEFAULT_MAX_ERRORS):
+        if max_errors < 1:
+            raise ValueError("max_errors must be at least 1")
+        self.schema = schema
+        self.compiled = compiled
+        self.max_errors = max_errors
+        self._loader = None
+
+    def validate_file(self, vars_path, strict: bool = True) -> List[StreamResult]:
+        """One StreamResult per YAML document of ``vars_path``, as yamale.validate returns them."""
+        name = str(vars_path)
+        results = []
+        with open(vars_path) as stream:
+            loader = self._loader = _EventLoader(stream)
+            try:
+                loader.get_event()  # StreamStart
+                while not loader.check_event(StreamEndEvent):
+                    loader.get_event()  # DocumentStart
+                    loader.anchors = {}
+                    log = self._document(strict)
+                    loader.get_event()  # DocumentEnd
+                    results.append(StreamResult(name, self.schema.name, log.errors, log.count))
+            finally:
+                self._loader = None
+                loader.dispose()
+        if not results:
+            # yamale validates an empty file as an empty map
+            log = _ErrorLog(self.max_errors)
+            try:
+                log.add(self._check(self.schema._schema, {}, (), strict))
+            except (FatalValidationError, schema_compiler.FatalValidation) as exc:
+                log = self._fatal(exc)
+            results.append(StreamResult(name, self.schema.name, log.errors, log.count))
+        return results
+
+    def _document(self, strict: bool) -> _ErrorLog:
+        log = _ErrorLog(self.max_errors)
+        try:
+            self._value(self.schema._schema, (), strict, log)
+        except (FatalValidationError, schema_compiler.FatalValidation) as exc:
+            # As in yamale, a fatal error replaces everything else found in the document
+            while not self._loader.check_event(DocumentEndEvent):
+                self._loader.get_event()
+            return self._fatal(exc)
+        return log
+
+    def _fatal(self, exc) -> _ErrorLog:
+        log = _ErrorLog(self.max_errors)
+        log.add([exc.error if isinstance(exc, FatalValidationError) else exc.args[0]])
+        return log
+
+    def _value(self, validator, path: tuple, strict: bool, log: _ErrorLog) -> None:
+        """Validate the value whose events come next, streaming into it where possible."""
+        event = self._loader.peek_event()
+        walkable = (isinstance(event, CollectionStartEvent) and event.anchor is None and event.implicit)
+        if walkable and isinstance(event, MappingStartEvent):
+            if isinstance(validator, Mapping):
+                return self._static_map(validator, path, strict, log)
+            if isinstance(validator, val.Include):
+                include = self.schema.includes.get(validator.include_name)
+                if include is not None and isinstance(include._schema, Mapping):
+                    include_strict = strict if validator.strict is None else validator.strict
+                    return self._static_map(include._schema, path, include_strict, log)
+            if type(validator) is val.Map and not any(c.is_active for c in validator._constraints_inst):
+                return self._items(validator.validators, path, strict, log, MappingEndEvent)
+        if walkable and isinstance(event, SequenceStartEvent):
+            if type(validator) is val.List and not any(c.is_active for c in validator._constraints_inst):
+                return self._items(validator.validators, path, strict, log, SequenceEndEvent)
+        log.add(self._check(validator, self._compose(), path, strict))
+
+    def _static_map(self, node: Mapping, path: tuple, strict: bool, log: _ErrorLog) -> None:
+        loader = self._loader
+        loader.get_event()
+        # Errors per key; a repeated key replaces them, as its last value is the one loaded
+        entries = {}
+        while not loader.check_event(MappingEndEvent):
+            key = self._key()
+            known = key in node
+            entry = entries[key] = _ErrorLog(log.limit)
+            if known:
+                self._value(node[key], path + (key,), strict, entry)
+            else:
+                if strict:
+                    entry.add(["%s: Unexpected element" % _path_str(path + (key,))])
+                loader.compose_node(None, None)
+        loader.get_event()
+        for entry in entries.values():
+            log.merge(entry)
+        for key, validator in node.items():
+            if key not in entries and not (isinstance(validator, val.Validator) and validator.is_optional):
+                log.add(["%s: Required field missing" % _path_str(path + (key,))])
+
+    def _items(self, validators, path: tuple, strict: bool, log: _ErrorLog, end_event) -> None:
+        """Validate the entries of a list() or map() one at a time."""
+        loader = self._loader
+        loader.get_event()
+        index = 0
+        seen = set()
+        while not loader.check_event(end_event):
+            if end_event is MappingEndEvent:
+                mark = loader.peek_event().start_mark
+                key = self._key()
+                if key in seen:
+                    raise NotStreamable(f"duplicate key '{key}' at {mark}")
+                seen.add(key)
+            else:
+                key = index
+                index += 1
+            if not validators:
+                loader.compose_node(None, None)
+                continue
+            item = self._compose()
+            failed = [errors for errors in (self._check(v, item, path + (key,), strict) for v in validators) if errors]
+            if len(failed) == len(validators):
+                for errors in failed:
+                    log.add(errors)
+        loader.get_event()
+
+    def _key(self):
+        key_node = self._loader.compose_node(None, None)
+        if key_node.tag == MERGE_TAG:
+            raise NotStreamable(f"merge key at {key_node.start_mark}")
+        key = self._loader.construct_document(key_node)
+        try:
+            hash(key)
+        except TypeError:
+            raise yaml.constructor.ConstructorError(
+                "while constructing a mapping", None, "found unhashable key", key_node.start_mark)
+        return key
+
+    def _compose(self):
+        loader = self._loader
+        return loader.construct_document(loader.compose_node(None, None))
+
+    def _check(self, validator, value, path: tuple, strict: bool) -> List[str]:
+        """Errors yamale reports for ``value`` at ``path``."""
+        if self.compiled is not None and isinstance(validator, val.Include):
+            function = self.compiled.includes.get(validator.include_name)
+            if function is not None:
+                if value is None and validator.is_optional and validator.can_be_none:
+                    return []
+                errors: List[str] = []
+                function(value, _path_str(path) if path else None,
+                         strict if validator.strict is None else validator.strict, errors)
+                return errors
+        return self.schema._validate(validator, value, DataPath(*path), strict)
+
+
+def stream_validate(schema, vars_path, strict: bool = True, max_errors: int = DEFAULT_MAX_ERRORS,
+                    compiled=None) -> List[StreamResult]:
+    """Validate ``vars_path`` against the parsed yamale ``schema`` while streaming it."""
+    return StreamValidator(schema, compiled, max_errors).validate_file(vars_path, strict)
+
+
+def validate_path(schema_path, vars_path, engine: str = schema_compiler.DEFAULT_ENGINE,
+                  cache_dir: Optional[str] = schema_compiler.DEFAULT_CACHE_DIR,
+                  max_errors: int = DEFAULT_MAX_ERRORS, strict: bool = True) -> List[StreamResult]:
+    """Stream-validate ``vars_path`` against the schema file ``schema_path``.
+
+    A file raising NotStreamable is loaded whole and validated by ``engine``;
+    its errors are capped the same way.
+    """
+    schema = yamale.make_schema(str(schema_path))
+    compiled = None
+    if engine == "compiled":
+        try:
+            compiled = schema_compiler.load_compiled(schema_path, cache_dir)
+        except schema_compiler.UnsupportedSchema:
+            compiled = None
+    try:
+        return stream_validate(schema, vars_path, strict, max_errors, compiled)
+    except NotStreamable:
+        results = yamale.validate(compiled or schema, yamale.make_data(str(vars_path)), strict, _raise_error=False)
+        return [StreamResult(r.data, r.schema, r.errors[:max_errors], len(r.errors)) for r in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate large vars files against a yamale schema while parsing them")
+    parser.add_argument('schema', help='Schema file')
+    parser.add_argument('vars_files', nargs='+', help='Vars files to validate')
+    parser.add_argument(
+        '--max-errors',
+        type=int,
+        default=DEFAULT_MAX_ERRORS,
+        help=f'Errors listed per document; the rest are only counted (default: {DEFAULT_MAX_ERRORS})'
+    )
+    parser.add_argument(
+        '--schema-cache-dir',
+        default=schema_compiler.DEFAULT_CACHE_DIR,
+        help=f'Directory holding compiled schemas (default: {schema_compiler.DEFAULT_CACHE_DIR})'
+    )
+    args = parser.parse_args()
+
+    status = 0
+    for vars_file in args.vars_files:
+        try:
+            results = validate_path(args.schema, vars_file, cache_dir=args.schema_cache_dir, max_errors=args.max_errors)
+        except (OSError, yaml.YAMLError) as e:
+            print(f"{vars_file}: {e}", file=sys.stderr)
+            status = 1
+            continue
+        for result in results:
+            print(result)
+            if not result.isValid():
+                status = 1
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Tests for planning schema-vars validations from the schema index."""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from comprehensive_schema_validation import WorkflowValidator  # noqa: E402
+
+
+def _workflow(root: Path, name: str, schemas: list, vars_files: list) -> Path:
+    directory = root / name
+    (directory / "schema").mkdir(parents=True)
+    (directory / "vars").mkdir()
+    for schema in schemas:
+        (directory / "schema" / schema).write_text("name: str()\n")
+    for vars_file in vars_files:
+        (directory / "vars" / vars_file).write_text("name: value\n")
+    return directory
+
+
+def test_indexed_workflow_reports_unmapped_vars_files(tmp_path):
+    workflow = _workflow(
+        tmp_path, "sites", ["sites_schema.yml"], ["sites_vars.yml", "jinja_sites_vars.yml", "new_sites_vars.yml"]
+    )
+    (tmp_path / "schema_manifest.json").write_text(json.dumps({"sites": {"sites_vars.yml": "sites_schema.yml"}}))
+
+    plan = WorkflowValidator(str(tmp_path)).plan_workflow(workflow)
+
+    assert plan[0] == (workflow / "schema" / "sites_schema.yml", workflow / "vars" / "sites_vars.yml")
+    warning = plan[1]
+    assert warning["status"] == "warning"
+    assert warning["warnings"] == [
+        "Vars file not in the schema index, not validated: jinja_sites_vars.yml",
+        "Vars file not in the schema index, not validated: new_sites_vars.yml",
+    ]
+    assert len(plan) == 2
+
+
+def test_fully_mapped_workflow_has_no_warning(tmp_path):
+    workflow = _workflow(tmp_path, "sites", ["sites_schema.yml"], ["sites_vars.yml"])
+    (tmp_path / "schema_manifest.json").write_text(json.dumps({"sites": {"sites_vars.yml": "sites_schema.yml"}}))
+
+    validator = WorkflowValidator(str(tmp_path))
+
+    assert validator.plan_workflow(workflow) == [
+        (workflow / "schema" / "sites_schema.yml", workflow / "vars" / "sites_vars.yml")
+    ]
+    assert validator.heuristic_workflows == []
@@ -0,0 +1,169 @@
+"""Ansible action plugin that adds, updates or removes keys of a vault file in one task."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+    name: ansible_vault_merge
+    short_description: Merge passwords_details into an Ansible Vault encrypted YAML file
+    description:
+      - Decrypts the vault file in memory with the vault secrets the playbook
+        was started with (C(--ask-vault-pass), C(--vault-password-file) or
+        C(vault_password_file) in ansible.cfg).
+      - Applies every entry of I(passwords_details) in one pass, re-encrypts
+        the result and replaces the file atomically. No plaintext is written
+        to disk and no C(ansible-vault) process is started.
+      - Creates the vault file when it does not exist yet.
+      - Runs on the controller.
+    options:
+      path:
+        description:
+          - Vault file to update. Relative paths are resolved against the
+            playbook directory, as C(include_vars) does.
+        required: true
+        type: path
+      passwords_details:
+        description: List of C(key)/C(value) entries; C(value) is ignored when I(state=absent).
+        required: true
+        type: list
+        elements: dict
+      state:
+        description: C(present) adds or replaces the keys, C(absent) removes them.
+        type: str
+        choices: [present, absent]
+        default: present
+      vault_id:
+        description: Vault id to encrypt with; defaults to C(DEFAULT_VAULT_ENCRYPT_IDENTITY) or the only secret loaded.
+        type: str
+"""
+
+EXAMPLES = """
+- name: Merge the passwords into the vault
+  ansible_vault_merge:
+    path: ../../../ansible_vault_encrypted_inputs/mypasswordfile.yaml
+    passwords_details: "{{ passwords_details }}"
+"""
+
+RETURN = """
+added: {description: Keys that were not in the vault before, type: list}
+updated: {description: Keys whose value changed, type: list}
+removed: {description: Keys removed with I(state=absent), type: list}
+key_count: {description: Number of keys in the vault after the update, type: int}
+path: {description: Vault file that was updated, type: str}
+"""
+
+import os
+import tempfile
+
+import yaml
+from ansible import constants as C
+from ansible.errors import AnsibleError
+from ansible.module_utils.common.text.converters import to_bytes, to_native, to_text
+from ansible.parsing.vault import VaultLib, is_encrypted, match_encrypt_secret
+from ansible.parsing.yaml.dumper import AnsibleDumper
+from ansible.plugins.action import ActionBase
+
+ARGUMENT_SPEC = dict(
+    path=dict(type="path", required=True),
+    passwords_details=dict(type="list", elements="dict", required=True, no_log=True),
+    state=dict(type="str", choices=["present", "absent"], default="present"),
+    vault_id=dict(type="str"),
+)
+# Mode of a vault file this plugin creates; existing files keep theirs
+NEW_FILE_MODE = 0o600
+
+
+def merge_secrets(current, entries, state="present"):
+    """Return ``(merged, added, updated, removed)`` for ``entries`` applied to ``current``."""
+    merged = dict(current)
+    added, updated, removed = [], [], []
+    for entry in entries:
+        key = to_text(entry["key"])
+        if state == "absent":
+            if key in merged:
+                del merged[key]
+                removed.append(key)
+            continue
+        value = entry.get("value")
+        if key not in merged:
+            added.append(key)
+        elif merged[key] != value and key not in added and key not in updated:
+            updated.append(key)
+        merged[key] = value
+    return merged, added, updated, removed
+
+
+def read_vault(vault, path):
+    """Decrypted mapping stored in ``path``, or ``{}`` when the file does not exist."""
+    try:
+        with open(path, "rb") as fh:
+            b_data = fh.read()
+    except FileNotFoundError:
+        return {}
+    if not is_encrypted(b_data):
+        raise AnsibleError("{0} is not an Ansible Vault encrypted file".format(path))
+    data = yaml.safe_load(vault.decrypt(b_data))
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise AnsibleError("{0} does not contain a YAML mapping".format(path))
+    return data
+
+
+def write_vault(vault, secret, vault_id, path, data):
+    """Encrypt ``data`` as the playbook's ``to_nice_yaml`` + ``ansible-vault encrypt`` did and replace ``path``."""
+    text = yaml.dump(data, Dumper=AnsibleDumper, indent=4, allow_unicode=True, default_flow_style=False)
+    b_ciphertext = vault.encrypt(to_bytes(text), secret=secret, vault_id=vault_id)
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = NEW_FILE_MODE
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp-")
+    try:
+        os.fchmod(fd, mode)
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(b_ciphertext)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class ActionModule(ActionBase):
+    TRANSFERS_FILES = False
+    _requires_connection = False
+
+    def run(self, tmp=None, task_vars=None):
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp
+
+        _, args = self.validate_argument_spec(argument_spec=ARGUMENT_SPEC)
+        for entry in args["passwords_details"]:
+            if "key" not in entry or args["state"] == "present" and "value" not in entry:
+                result.update(failed=True, msg="Every passwords_details entry needs a key and a value")
+                return result
+
+        secrets = self._loader._vault.secrets
+        if not secrets:
+            result.update(failed=True, msg="No vault secret loaded; run with --ask-vault-pass or --vault-password-file")
+            return result
+
+        path = self._loader.path_dwim(args["path"])
+        try:
+            vault_id, secret = match_encrypt_secret(secrets, encrypt_vault_id=args["vault_id"] or C.DEFAULT_VAULT_ENCRYPT_IDENTITY)
+            vault = VaultLib(secrets)
+            current = read_vault(vault, path)
+            merged, added, updated, removed = merge_secrets(current, args["passwords_details"], args["state"])
+            changed = merged != current or not os.path.exists(path)
+            if changed and not self._task.check_mode:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                write_vault(vault, secret, vault_id, path, merged)
+        except (AnsibleError, OSError, yaml.YAMLError) as exc:
+            result.update(failed=True, msg="Updating vault {0} failed: {1}".format(path, to_native(exc)))
+            return result
+
+        result.update(changed=changed, path=path, added=added, updated=updated, removed=removed, key_count=len(merged))
+        return result
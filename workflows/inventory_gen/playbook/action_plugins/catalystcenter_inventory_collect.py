@@ -0,0 +1,262 @@
+"""Ansible action plugin that collects Catalyst Center device inventory in one task."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+    name: catalystcenter_inventory_collect
+    short_description: Collect network devices, access points and sensors into host_inventory files
+    description:
+      - Pages C(get_device_list) for each device family until Catalyst Center
+        returns a short page, instead of probing a fixed range of offsets.
+      - Fetches C(get_device_detail) for the network devices with a bounded
+        number of concurrent requests, each worker thread using its own SDK
+        client.
+      - Builds the C(network_devices), C(unified_access_points) and
+        C(wireless_sensors) lists in a single pass and writes C(hosts.yml),
+        C(host_vars/<name>.yml) and C(group_vars/all.yml) under I(dest).
+      - Runs on the controller and requires the C(catalystcentersdk) Python package.
+    options:
+      catalystcenter_host: {required: true, type: str}
+      catalystcenter_username: {required: true, type: str}
+      catalystcenter_password: {required: true, type: str, no_log: true}
+      catalystcenter_port: {type: raw, default: 443}
+      catalystcenter_version:
+        description: Catalyst Center API version the SDK talks to, as set in the inventory.
+        required: true
+        type: str
+      catalystcenter_verify: {type: bool, default: true}
+      catalystcenter_debug: {type: bool, default: false}
+      dest:
+        description: Directory to write the inventory to; created when missing.
+        required: true
+        type: path
+      inventory_name:
+        description: Host name used in C(hosts.yml) and for the C(host_vars) file.
+        required: true
+        type: str
+      page_size:
+        description: Devices requested per C(get_device_list) page (at most 500).
+        type: int
+        default: 500
+      concurrency:
+        description: Maximum number of C(get_device_detail) requests in flight.
+        type: int
+        default: 8
+"""
+
+EXAMPLES = """
+- name: Collect the inventory of a Catalyst Center
+  catalystcenter_inventory_collect:
+    catalystcenter_host: "{{ catalystcenter_host }}"
+    catalystcenter_username: "{{ catalystcenter_username }}"
+    catalystcenter_password: "{{ catalystcenter_password }}"
+    dest: "../../../host_inventory_{{ inventory_hostname }}_{{ catalystcenter_host }}"
+    inventory_name: "{{ inventory_hostname }}"
+"""
+
+RETURN = """
+network_devices: {description: Number of switches, routers and wireless controllers written, type: int}
+unified_access_points: {description: Number of unified access points written, type: int}
+wireless_sensors: {description: Number of wireless sensors written, type: int}
+dest: {description: Directory the inventory was written to, type: str}
+"""
+
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+from ansible.module_utils.common.text.converters import to_native
+from ansible.parsing.yaml.dumper import AnsibleDumper
+from ansible.plugins.action import ActionBase
+
+try:
+    from catalystcentersdk import api as catalystcenter_api
+except ImportError:
+    catalystcenter_api = None
+
+NETWORK_FAMILIES = ["Switches and Hubs", "Routers", "Wireless Controller"]
+AP_FAMILIES = ["Unified AP"]
+SENSOR_FAMILIES = ["Wireless Sensor"]
+MAX_PAGE_SIZE = 500
+
+ARGUMENT_SPEC = dict(
+    catalystcenter_host=dict(type="str", required=True),
+    catalystcenter_username=dict(type="str", required=True),
+    catalystcenter_password=dict(type="str", required=True, no_log=True),
+    catalystcenter_port=dict(type="raw", default=443),
+    catalystcenter_version=dict(type="str", required=True),
+    catalystcenter_verify=dict(type="bool", default=True),
+    catalystcenter_debug=dict(type="bool", default=False),
+    dest=dict(type="path", required=True),
+    inventory_name=dict(type="str", required=True),
+    page_size=dict(type="int", default=MAX_PAGE_SIZE),
+    concurrency=dict(type="int", default=8),
+)
+# Credentials copied into hosts.yml, in the order the inventory files have always used
+CREDENTIAL_KEYS = (
+    "catalystcenter_host",
+    "catalystcenter_username",
+    "catalystcenter_password",
+    "catalystcenter_verify",
+    "catalystcenter_port",
+    "catalystcenter_version",
+    "catalystcenter_debug",
+)
+
+
+def _response(data):
+    return (data or {}).get("response") or []
+
+
+def iter_device_pages(api, families, page_size):
+    """Yield devices of ``families`` page by page until a page comes back short."""
+    offset = 1
+    while True:
+        page = _response(api.devices.get_device_list(family=families, offset=offset, limit=page_size))
+        for device in page:
+            yield device
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+
+def network_device_entry(device, detail):
+    return {
+        "serialNumber": detail.get("serialNumber"),
+        "hostname": detail.get("nwDeviceName"),
+        "role": detail.get("nwDeviceRole"),
+        "site": detail.get("location"),
+        "managementIpAddress": detail.get("managementIpAddr"),
+        "tagIdList": detail.get("tagIdList"),
+        "macAddress": detail.get("macAddress"),
+        "platformId": detail.get("platformId"),
+        "collectionInterval": device.get("collectionInterval"),
+        "stackType": detail.get("stackType"),
+        "series": detail.get("deviceSeries"),
+        "family": detail.get("nwDeviceFamily"),
+        "type": detail.get("nwDeviceType"),
+        "nwDeviceId": detail.get("nwDeviceId"),
+    }
+
+
+def wireless_device_entry(device):
+    return {
+        "serialNumber": device.get("serialNumber"),
+        "hostname": device.get("hostname"),
+        "role": device.get("role"),
+        "site": device.get("location"),
+        "managementIpAddress": device.get("managementIpAddress"),
+        "macAddress": device.get("macAddress"),
+        "platformId": device.get("platformId"),
+        "series": device.get("series"),
+        "family": device.get("family"),
+        "type": device.get("type"),
+        "id": device.get("id"),
+    }
+
+
+def collect_inventory(connect, page_size=MAX_PAGE_SIZE, concurrency=8):
+    """Return the host_vars document for one Catalyst Center.
+
+    ``connect`` returns a new SDK client. The SDK keeps a single requests
+    session per client, which is not documented as thread-safe, so every
+    detail worker connects once and reuses its own client.
+
+    Device details are fetched ``concurrency`` at a time; results keep the
+    order of the device list. Devices whose details come back empty are left
+    out, as the playbook did.
+    """
+    api = connect()
+    devices = list(iter_device_pages(api, NETWORK_FAMILIES, page_size))
+    worker = threading.local()
+
+    def detail(device):
+        if getattr(worker, "api", None) is None:
+            worker.api = connect()
+        return _response(worker.api.devices.get_device_detail(search_by=device["id"], identifier="uuid"))
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        details = pool.map(detail, devices)
+        network_devices = [
+            network_device_entry(device, found) for device, found in zip(devices, details) if found
+        ]
+
+    return {
+        "network_devices": network_devices,
+        "unified_access_points": [wireless_device_entry(device) for device in iter_device_pages(api, AP_FAMILIES, page_size)],
+        "wireless_sensors": [wireless_device_entry(device) for device in iter_device_pages(api, SENSOR_FAMILIES, page_size)],
+    }
+
+
+def write_yaml(path, data):
+    """Write ``data`` as the playbook's ``to_nice_yaml`` did, replacing ``path`` atomically."""
+    text = yaml.dump(data, Dumper=AnsibleDumper, indent=4, allow_unicode=True, default_flow_style=False)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w") as fh:
+            fh.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class ActionModule(ActionBase):
+    TRANSFERS_FILES = False
+    _requires_connection = False
+
+    def run(self, tmp=None, task_vars=None):
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp
+
+        _, args = self.validate_argument_spec(argument_spec=ARGUMENT_SPEC)
+        if catalystcenter_api is None:
+            result.update(failed=True, msg="The catalystcentersdk Python package is required (pip install catalystcentersdk)")
+            return result
+        page_size = min(MAX_PAGE_SIZE, max(1, args["page_size"]))
+
+        def connect():
+            return catalystcenter_api.CatalystCenterAPI(
+                username=args["catalystcenter_username"],
+                password=args["catalystcenter_password"],
+                base_url="https://{0}:{1}".format(args["catalystcenter_host"], args["catalystcenter_port"]),
+                version=args["catalystcenter_version"],
+                verify=args["catalystcenter_verify"],
+                debug=args["catalystcenter_debug"],
+            )
+
+        try:
+            host_vars = collect_inventory(connect, page_size, args["concurrency"])
+        except Exception as exc:
+            result.update(failed=True, msg="Collecting inventory failed: {0}".format(to_native(exc)))
+            return result
+
+        dest = args["dest"]
+        name = args["inventory_name"]
+        hosts = {
+            "catalyst_cennter_hosts": {
+                "hosts": {name: dict((key, args[key]) for key in CREDENTIAL_KEYS)},
+            },
+        }
+        try:
+            for directory in (dest, os.path.join(dest, "group_vars"), os.path.join(dest, "host_vars")):
+                os.makedirs(directory, exist_ok=True)
+            write_yaml(os.path.join(dest, "hosts.yml"), hosts)
+            write_yaml(os.path.join(dest, "host_vars", "{0}_{1}.yml".format(name, args["catalystcenter_host"])), host_vars)
+            write_yaml(os.path.join(dest, "group_vars", "all.yml"), {})
+        except OSError as exc:
+            result.update(failed=True, msg="Writing inventory to {0} failed: {1}".format(dest, to_native(exc)))
+            return result
+
+        result.update(
+            changed=True,
+            dest=dest,
+            network_devices=len(host_vars["network_devices"]),
+            unified_access_points=len(host_vars["unified_access_points"]),
+            wireless_sensors=len(host_vars["wireless_sensors"]),
+        )
+        return result
@@ -0,0 +1,180 @@
+"""Ansible filter that turns a Catalyst Center device CSV export into inventory host_vars."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+    name: catalystcenter_csv_inventory
+    short_description: Build network_devices, unified_access_points and wireless_sensors from a device CSV export
+    description:
+      - Reads the CSV file once, row by row, and sorts every row into its
+        device family with the inventory field names applied.
+      - Only the projected fields of each row are kept, so memory grows with
+        the inventory rather than with the full export.
+      - Rows of other device families are skipped.
+      - C(catalystcenter_csv_inventory_yaml) returns C(yaml), the same data
+        already rendered as C(to_nice_yaml) would, for writing host_vars
+        files without handing the device lists to the template engine, and
+        C(counts), the number of devices in each list, from the same pass.
+    positional: _input
+    options:
+      _input:
+        description: Path of the CSV file exported from the Catalyst Center inventory.
+        type: path
+        required: true
+"""
+
+EXAMPLES = """
+host_vars: "{{ CSV_FILE_PATH | catalystcenter_csv_inventory }}"
+host_vars_file: "{{ CSV_FILE_PATH | catalystcenter_csv_inventory_yaml }}"
+host_vars_yaml: "{{ host_vars_file.yaml }}"
+network_device_count: "{{ host_vars_file.counts.network_devices }}"
+"""
+
+import csv
+import re
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+
+import yaml
+from ansible.errors import AnsibleFilterError
+from ansible.module_utils.common.text.converters import to_native
+from ansible.parsing.yaml.dumper import AnsibleDumper
+
+# Inventory field name -> CSV column, in the order the inventory files list them
+FIELDS = (
+    ("hostname", "Device Name"),
+    ("role", "Device Role"),
+    ("managementIpAddress", "IP Address"),
+    ("site", "Site"),
+    ("serialNumber", "Serial Number"),
+    ("macAddress", "MAC Address"),
+    ("family", "Device Family"),
+    ("platformId", "Platform"),
+    ("collectionInterval", "Resync Interval"),
+    ("series", "Device Series"),
+    ("type", "Device Series"),
+    ("tags", "Tags"),
+    ("sitetag", "Site Tag"),
+)
+# Device Family -> inventory list; network_devices keeps this family order
+FAMILY_GROUPS = (
+    ("Switches and Hubs", "network_devices"),
+    ("Routers", "network_devices"),
+    ("Wireless Controller", "network_devices"),
+    ("Wireless Sensor", "wireless_sensors"),
+    ("Unified AP", "unified_access_points"),
+)
+
+
+def csv_inventory(path):
+    """Return ``{network_devices, unified_access_points, wireless_sensors}`` for a CSV export."""
+    buckets = dict((family, []) for family, _ in FAMILY_GROUPS)
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as fh:
+            for row in csv.DictReader(fh):
+                bucket = buckets.get(row.get("Device Family"))
+                if bucket is not None:
+                    bucket.append(dict((name, row.get(column)) for name, column in FIELDS))
+    except (OSError, UnicodeDecodeError, csv.Error) as exc:
+        raise AnsibleFilterError("Cannot read device CSV {0}: {1}".format(path, to_native(exc)))
+
+    host_vars = {"network_devices": [], "unified_access_points": [], "wireless_sensors": []}
+    for family, group in FAMILY_GROUPS:
+        host_vars[group].extend(buckets[family])
+    return host_vars
+
+
+# Strings PyYAML always writes unquoted when they also resolve to plain str:
+# no indicator at either end, no ": " or " #", short enough never to be folded.
+# Always applied with fullmatch: "$" would also accept a trailing newline
+_PLAIN = re.compile(r"[A-Za-z0-9_./(](?:[A-Za-z0-9 _./(),:-]{0,38}[A-Za-z0-9_./)])?")
+_RESOLVER = yaml.resolver.Resolver()
+_STR_TAG = "tag:yaml.org,2002:str"
+
+
+def _nice_yaml(data):
+    return yaml.dump(data, Dumper=AnsibleDumper, indent=4, allow_unicode=True, default_flow_style=False)
+
+
+@lru_cache(maxsize=65536)
+def _is_plain(value):
+    return (
+        _PLAIN.fullmatch(value) is not None
+        and ": " not in value
+        and _RESOLVER.resolve(yaml.ScalarNode, value, (True, False)) == _STR_TAG
+    )
+
+
+def _field_line(key, value, cache):
+    """``key: value`` line(s) of one device field, exactly as ``to_nice_yaml`` writes them."""
+    if value is None:
+        return key + ": null\n"
+    value = str(value)
+    if _is_plain(value):
+        return key + ": " + value + "\n"
+    line = cache.get((key, value))
+    if line is None:
+        # Dump the field in the same position it has in the document: the
+        # first key of a sequence item, at the same indentation
+        line = cache[(key, value)] = _nice_yaml([{key: value}])[4:]
+    return line
+
+
+def _is_device_list(devices):
+    return (
+        isinstance(devices, Sequence)
+        and not isinstance(devices, str)
+        and all(
+            isinstance(device, Mapping)
+            and device
+            and all(isinstance(key, str) and _is_plain(key) for key in device)
+            and all(value is None or isinstance(value, str) for value in device.values())
+            for device in devices
+        )
+    )
+
+
+def inventory_yaml(host_vars):
+    """Render host_vars exactly as ``to_nice_yaml`` would, without its per-scalar cost.
+
+    Handles a mapping of device lists whose entries map field names to strings
+    or nulls, which is what the inventory workflows write. Anything else is
+    passed to ``to_nice_yaml``'s dumper unchanged.
+    """
+    if not isinstance(host_vars, Mapping) or not host_vars or not all(
+        isinstance(key, str) and _is_plain(key) and _is_device_list(devices) for key, devices in host_vars.items()
+    ):
+        return _nice_yaml(host_vars)
+
+    cache = {}
+    parts = []
+    for group in sorted(host_vars):
+        devices = host_vars[group]
+        if not devices:
+            parts.append(group + ": []\n")
+            continue
+        parts.append(group + ":\n")
+        for device in devices:
+            lines = [_field_line(key, device[key], cache) for key in sorted(device)]
+            parts.append("-   " + lines[0])
+            parts.extend("    " + line for line in lines[1:])
+    return "".join(parts)
+
+
+def csv_inventory_yaml(path):
+    """``{yaml, counts}``: :func:`csv_inventory` rendered by :func:`inventory_yaml` and its list lengths."""
+    host_vars = csv_inventory(path)
+    return {
+        "yaml": inventory_yaml(host_vars),
+        "counts": dict((group, len(devices)) for group, devices in host_vars.items()),
+    }
+
+
+class FilterModule(object):
+    def filters(self):
+        return {
+            "catalystcenter_csv_inventory": csv_inventory,
+            "catalystcenter_csv_inventory_yaml": csv_inventory_yaml,
+        }